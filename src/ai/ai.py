@@ -1,10 +1,85 @@
+from ai.instrumentation import Instrumentation
 import random
-import copy
 
 
 class AI:
-    def __init__(self, board_service):
+    # The ways of finding the moves blocking the most positions: the scores kept up to date by the board, or all the scores computed at
+    # once with NumPy, which is only faster on large boards.
+    SCORING_BACKENDS = ('board', 'numpy')
+
+    def __init__(self, board_service, scoring='board'):
+        if scoring not in AI.SCORING_BACKENDS:
+            raise ValueError(f"Unknown scoring backend {scoring}, the backends are {', '.join(AI.SCORING_BACKENDS)}.")
+
         self._board_service = board_service
+        self._scorer = None
+        self._instrumentation = None
+
+        if scoring == 'numpy':
+            # NumPy takes a while to import, so it is only imported by the players using it.
+            from ai.numpy_scoring import NumpyScorer
+            self._scorer = NumpyScorer(board_service.get_board_size())
+
+    @property
+    def instrumentation(self):
+        """
+            The Instrumentation recording the turns of the player, or None if it is disabled.
+        """
+        return self._instrumentation
+
+    def enable_instrumentation(self, callback=None, profile=False):
+        """
+            This method starts recording the counters of every turn of the player: the time of every phase, the moves tried, and for the
+        players which search, the positions searched and the cache hits and misses.
+            Only the choose_move method of this player is replaced by one recording the turn, so the players without instrumentation
+        run exactly the same code as before.
+
+        :param callback: Function called with the TurnStats at the end of every turn, or None.
+        :param profile: True, to also run the turns under cProfile, so the profile can be written with Instrumentation.dump_profile.
+        :return: Instrumentation
+        """
+        self.disable_instrumentation()
+
+        instrumentation = Instrumentation(callback, profile)
+        choose_move = self.choose_move
+
+        def instrumented_choose_move(first_move=False):
+            instrumentation.start_turn()
+            try:
+                return choose_move(first_move)
+            finally:
+                self.collect_turn_stats(instrumentation.current_turn)
+                instrumentation.end_turn()
+
+        self.choose_move = instrumented_choose_move
+        self._instrumentation = instrumentation
+
+        return instrumentation
+
+    def disable_instrumentation(self):
+        """
+            This method stops recording the turns of the player.
+        """
+        if 'choose_move' in vars(self):
+            del self.choose_move
+        self._instrumentation = None
+
+    def collect_turn_stats(self, stats):
+        """
+            This method adds to the counters of a turn the ones kept by the player, at the end of the turn.
+
+        :param stats: TurnStats
+        """
+        pass
+
+    def start_phase(self, name):
+        """
+            This method tells the instrumentation, if it is enabled, that the turn moves on to another phase.
+
+        :param name: String
+        """
+        if self._instrumentation is not None:
+            self._instrumentation.start_phase(name)
 
     def search_valid_positions(self):
         """
@@ -13,14 +88,8 @@ class AI:
 
         :return: Dicitionary having as keys positions and as values the number of spaces blocked by each move.
         """
-        valid_positions = {}
-        for i in range(self._board_service.get_board_size()):
-            for j in range(self._board_service.get_board_size()):
-                # If the position is empty, it means a move there is valid. 
-                if self._board_service.get_symbol(i, j) == ' ':
-                    valid_positions[(i, j)] = self.calculate_num_of_positions_blocked(i, j)
-
-        return valid_positions
+        # Only the empty positions are valid moves, and the board keeps track of how many positions each of them blocks.
+        return self._board_service.get_move_scores()
 
     def calculate_num_of_positions_blocked(self, row, col):
         """
@@ -30,22 +99,32 @@ class AI:
         :param col: Integer
         :return: Integer
         """
-        count = 0
-        for i in range(row - 1, row + 2):
-            for j in range(col - 1, col + 2):
-                # If a position inside the board is empty and is not the one in which the move is made, then it is counted. 
-                if self._board_service.check_if_position_is_in_board(i, j) and (i != row or j != col) and self._board_service.get_symbol(i, j) == ' ':
-                    count += 1
+        return self._board_service.count_empty_neighbours(row, col)
 
-        return count
+    def get_top_moves(self, max_score=None):
+        """
+            This method returns the moves of the current board which block the highest number of positions, less than a given maximum,
+        found by the scoring backend of the player.
+
+        :param max_score: Integer, or None for no maximum.
+        :return: Tuple (list of the moves in row-major order, the number of positions they block)
+        """
+        if self._scorer is None:
+            return self._board_service.get_top_moves(max_score)
 
-    def find_best_moves(self, valid_positions):
+        return self._scorer.get_top_moves(self._board_service.get_empty_mask(), max_score)
+
+    def find_best_moves(self, valid_positions=None):
         """
             This method chooses and returns the moves from a list of valid moves which block the highest number of adjacent spaces. 
+            Without a list of valid moves, the moves of the current board are found by the get_top_moves method.
 
-        :param valid_positions: Dicitionary having as keys positions and as values the number of spaces blocked by each move.
+        :param valid_positions: Dicitionary having as keys positions and as values the number of spaces blocked by each move, or None.
         :return: List of the moves which block the largest number of spaces. 
         """
+        if valid_positions is None:
+            return self.get_top_moves()
+
         max_profit = 0
         best_moves = []
 
@@ -58,15 +137,19 @@ class AI:
 
         return best_moves, max_profit
 
-    def find_average_moves(self, valid_positions, max_profit):
+    def find_average_moves(self, valid_positions=None, max_profit=None):
         """
             This method works similarly to the one which searches for the best moves, only difference is that this one finds the best 
         set of moves worse than the best ones found previously. 
 
-        :param valid_positions: Dicitionary having as keys positions and as values the number of spaces blocked by each move.
+        :param valid_positions: Dicitionary having as keys positions and as values the number of spaces blocked by each move, or None for
+        the moves of the current board.
         :param max_profit: The maximum number of positions blocked by a previous set of moves. 
         :return: List of the moves which block the largest number of spaces, less than a given maximum.
         """
+        if valid_positions is None:
+            return self.get_top_moves(max_profit)
+
         average_profit = 0
         average_moves = []
 
@@ -79,146 +162,98 @@ class AI:
 
         return average_moves, average_profit
 
-    def computer_move(self, first_move=False):
+    def check_if_user_wins_after(self, row, col):
         """
-            This method executes the best computer move possible by choosing the one which blocks the highest number of adjacent positions. 
-            It also takes into account the situations when the user is one move away from winning. In this case, the computer looks for a move
-        which will stop the player from winning, even though it is not the one which blocks the highest number of spaces. 
+            This method checks if, after the computer makes a given move, the user can win the game straight away by choosing one of the
+        moves which block the highest number of spaces. The board is left unchanged.
+
+        :param row: Integer
+        :param col: Integer
+        :return: True, if the user wins with his reply, False otherwise.
         """
-        
-        if first_move:
-            valid_positions = self.search_valid_positions()
+        self._board_service.push_move(row, col, 'O')
+        moves_tried = 1
 
-            list_of_positions = []
-            for position in valid_positions:
-                list_of_positions.append(position)
+        user_wins = False
+        best_user_moves, max_user_profit = self.find_best_moves()
 
-            random_position_move = random.choice(list_of_positions)
-            random_row, random_col = random_position_move
+        # If the user can still make moves, pretend he chooses one of the best ones and check if it ends the game.
+        if len(best_user_moves) > 0:
+            user_row, user_col = random.choice(best_user_moves)
+            self._board_service.push_move(user_row, user_col, 'X')
+            moves_tried += 1
+            user_wins = self._board_service.check_if_game_over()
+            self._board_service.pop_move()
 
-            self._board_service.make_move(random_row, random_col, 'O')
+        self._board_service.pop_move()
 
-        else:
+        if self._instrumentation is not None and self._instrumentation.current_turn is not None:
+            self._instrumentation.current_turn.moves_tried += moves_tried
+
+        return user_wins
+
+    def choose_move(self, first_move=False):
+        """
+            This method chooses the best computer move possible, the one which blocks the highest number of adjacent positions.
+            It also takes into account the situations when the user is one move away from winning. In this case, the computer looks for a move
+        which will stop the player from winning, even though it is not the one which blocks the highest number of spaces.
+            The moves are tried on the board and reverted afterwards, so the board is left unchanged.
+
+        :param first_move: True, if this is the first move of the computer in the game.
+        :return: Tuple (row, col)
+        """
+        self.start_phase('find_moves')
 
-            # Figure out the valid moves and select those who are the best. 
-            valid_positions = self.search_valid_positions()
-            best_moves, max_profit = self.find_best_moves(valid_positions)
+        if first_move:
+            return random.choice(self._board_service.get_empty_positions())
+
+        # Figure out the valid moves and randomly choose between the best ones, if there are more than one.
+        best_moves, max_profit = self.find_best_moves()
+        move = random.choice(best_moves)
+
+        self.start_phase('look_ahead')
+        if not self.check_if_user_wins_after(*move):
+            return move
+
+        # The user is about to win the game, so the computer must try to prevent this by choosing an "average" move,
+        # one of the best moves worse than the max profit moves before.
+        self.start_phase('find_moves')
+        average_moves, average_profit = self.find_average_moves(max_profit=max_profit)
+
+        if len(average_moves) == 0:
+            return move
+
+        self.start_phase('look_ahead')
+        optimal_average_move = None
+        for average_move in average_moves:
+            # If the user can not win straight away after this move, then it is a good one.
+            if not self.check_if_user_wins_after(*average_move):
+                optimal_average_move = average_move
+                break
+
+        if optimal_average_move is None:
+            # Choose randomly one of them if there is no move that stops the player from winning.
+            move = random.choice(average_moves)
+        else:
+            move = optimal_average_move
 
-            # Randomly choose between the best moves, if there are more than one. 
-            row, col = random.choice(best_moves)
+        if not self.check_if_user_wins_after(*move):
+            return move
 
-            first_game_board_copy = copy.deepcopy(self._board_service.get_board())
+        # Search for "worse" moves, this way the user shouldn't be able to win by a single move.
+        self.start_phase('find_moves')
+        worst_moves, worst_profit = self.find_average_moves(max_profit=average_profit)
 
-            # Make the move.
-            self._board_service.make_move(row, col, 'O')
+        if len(worst_moves) > 0:
+            return random.choice(worst_moves)
 
-            second_game_board_copy = copy.deepcopy(self._board_service.get_board())
+        return move
 
-            # Make the move, then pretend the user will choose the best move possible.
-            # Check if the game is finished, if so, it means that the computer should not choose the "best move", but instead an average one
-            # will be better. 
+    def computer_move(self, first_move=False):
+        """
+            This method executes the best computer move possible, as chosen by the choose_move method.
 
-            user_valid_positions = self.search_valid_positions()
-            best_user_moves, max_user_profit = self.find_best_moves(user_valid_positions)
-
-            if len(best_user_moves) > 0:
-                row, col = random.choice(best_user_moves)
-
-                # Make a move from the player's perspective. 
-                self._board_service.make_move(row, col, 'X')
-
-                # Now, let's check if the board is full. 
-                if self._board_service.check_if_game_over():
-                    # This means that the user is about to win the game. 
-                    # The computer must try to prevent this. 
-                    # We have to search for the "average case" move. 
-                    
-                    # Revert back to the initial board. 
-                    self._board_service.undo_move(first_game_board_copy)
-
-                    # Find an average set of moves, the best moves worse than the max profit moves before. 
-                    average_moves, average_profit = self.find_average_moves(valid_positions, max_profit)
-
-                    if len(average_moves) > 0:
-                        # Make a copy of the board since we will try each move and see which one works the best.
-                        initial_board = copy.deepcopy(self._board_service.get_board())
-                        optimal_average_move = None
-
-                        for move in average_moves:
-                            # Reset the board. 
-                            self._board_service.undo_move(initial_board)
-
-                            # Make a move from the list. 
-                            self._board_service.make_move(move[0], move[1], 'O')
-
-                            # Search for the user's valid moves. 
-                            user_valid_positions = self.search_valid_positions()
-                            best_user_moves, max_user_profit = self.find_best_moves(user_valid_positions)
-
-                            if len(best_user_moves) > 0:
-                                # Execute the user's best move, if it is the only one, then it should be a winning move. 
-                                row, col = random.choice(best_user_moves)
-                                self._board_service.make_move(row, col, 'X')
-
-                                # If the game is not won by the user executing that previous move, then the computer's move is a good one. 
-                                if not self._board_service.check_if_game_over():
-                                    optimal_average_move = move
-                                    break
-                        
-                        if optimal_average_move is None:
-                            # Choose randomly one of them if there is no move that stops the player from winning. 
-                            row, col = random.choice(average_moves)
-                        else:
-                            # Save the move that prevents the player from winning straight away. 
-                            row, col = optimal_average_move
-
-                        # Go back to the initial board. 
-                        self._board_service.undo_move(initial_board)
-
-                        # Make a copy before doing the move. 
-                        third_game_board_copy = copy.deepcopy(self._board_service.get_board())
-
-                        # Make the optimal or the random average move. 
-                        self._board_service.make_move(row, col, 'O')
-
-                        # Make a copy of the board also after the move. 
-                        fourth_game_board_copy = copy.deepcopy(self._board_service.get_board())
-
-                        # Search through the user's valid moves. 
-                        user_valid_positions = self.search_valid_positions()
-                        best_user_moves, max_user_profit = self.find_best_moves(user_valid_positions)
-
-                        # If the user can still make moves, check if he is in game winning situation after the computer's move. 
-                        if len(best_user_moves) > 0:
-                            # Execute the user's best move. 
-                            row, col = random.choice(best_user_moves)
-
-                            self._board_service.make_move(row, col, 'X')
-
-                            # Check if it is a game winning move. 
-                            if self._board_service.check_if_game_over():
-                                # If that is the case, revert back to the third board. 
-                                self._board_service.undo_move(third_game_board_copy)
-                                
-                                # Search for "worse" moves.
-                                worst_moves, worst_profit = self.find_average_moves(valid_positions, average_profit)
-
-                                if len(worst_moves) > 0:
-                                    # Execute that move instead, this way the user shouldn't be able to win by a single move. 
-                                    row, col = random.choice(worst_moves)
-
-                                    self._board_service.make_move(row, col, 'O')
-
-                                else:
-                                    self._board_service.undo_move(fourth_game_board_copy)
-                            else:
-                                # Revert back to the move made by the computer if the user can't win the game yet. 
-                                self._board_service.undo_move(fourth_game_board_copy)
-
-                    else:
-                        self._board_service.undo_move(second_game_board_copy)
-            
-                else:
-                    # Revert back to the move made by the computer if the user can't win the game yet. 
-                    self._board_service.undo_move(second_game_board_copy)
-        
+        :param first_move: True, if this is the first move of the computer in the game.
+        """
+        row, col = self.choose_move(first_move)
+        self._board_service.make_move(row, col, 'O')
@@ -0,0 +1,139 @@
+from ai.solver import SolverAI
+from ai.opening_book import OpeningBook
+from ai.tablebase import EndgameTablebase
+from ai.position_cache import PositionCache
+from ai.position_store import PositionStore
+from board.bit_board import BitBoard
+from service.board_service import BoardService
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+
+# The computer player of the worker process. It is created once, so its transposition table is kept from one move to the next.
+_worker_board = None
+_worker_player = None
+
+
+def _initialise_worker(board_size, time_budget_ms, workers, cancel_event, max_cache_entries, cache_entries, store_path):
+    global _worker_board, _worker_player
+    # The worker starts with the positions solved so far by the application, and gives back the ones it adds when it is closed.
+    position_cache = PositionCache.shared()
+    position_cache.max_entries = max_cache_entries
+    position_cache.update(cache_entries)
+
+    _worker_board = BitBoard(board_size)
+    _worker_player = SolverAI(BoardService(_worker_board), time_budget_ms, opening_book=OpeningBook.load(board_size),
+                              tablebase=EndgameTablebase.load(), cancel_event=cancel_event, workers=workers, position_cache=position_cache,
+                              position_store=PositionStore.open(board_size, store_path))
+
+
+def _choose_move(board, first_move):
+    _worker_board.board = board
+    return _worker_player.choose_move(first_move), _worker_player.ponder_counts
+
+
+def _ponder(board):
+    _worker_board.board = board
+    return _worker_player.ponder()
+
+
+def _close_worker():
+    _worker_player.close()
+    if _worker_player.position_store is not None:
+        _worker_player.position_store.close()
+    return _worker_player.position_cache.entries()
+
+
+# The computer player running in a separate process, so the user interface keeps responding while it thinks. The search runs on another
+# core, so it does not slow down the interface either, which a thread would because of the global interpreter lock.
+# During the user's turn, the worker can ponder the positions after the user's likely moves, until a move is started.
+# The worker keeps its solved positions in the position store at store_path, or at the default path of the board size if it is None.
+class BackgroundAI:
+    def __init__(self, board_size, time_budget_ms=1000, workers=1, store_path=None):
+        position_cache = PositionCache.shared()
+        self._cancel_event = multiprocessing.Event()
+        self._executor = ProcessPoolExecutor(1, initializer=_initialise_worker, initargs=(board_size, time_budget_ms, workers, self._cancel_event,
+                                                                                          position_cache.max_entries, position_cache.entries(),
+                                                                                          store_path))
+        self._future = None
+        self._ponder_future = None
+        self._ponder_counts = {'hit': 0, 'partial': 0, 'miss': 0}
+        self._started = False
+
+    @property
+    def thinking(self):
+        """
+            True if a move was started and was not taken by poll yet.
+        """
+        return self._future is not None
+
+    @property
+    def ponder_counts(self):
+        """
+            The turns of the worker helped by pondering, as counted by SolverAI.ponder_counts, up to the last move taken by poll.
+        """
+        return dict(self._ponder_counts)
+
+    def start_move(self, board, first_move=False):
+        """
+            This method starts choosing the computer move for a board, without waiting for it.
+
+        :param board: Matrix (N x N), the symbols of the board, as returned by the board property of the boards.
+        :param first_move: True, if this is the first move of the computer in the game.
+        """
+        self.cancel()
+        self._future = self._executor.submit(_choose_move, board, first_move)
+        self._started = True
+
+    def start_pondering(self, board):
+        """
+            This method starts pondering the user's moves on a board, without waiting for it. The pondering goes on until the next move is
+        started, or it is cancelled.
+
+        :param board: Matrix (N x N), the symbols of the board, as returned by the board property of the boards.
+        """
+        self.cancel()
+        self._ponder_future = self._executor.submit(_ponder, board)
+        self._started = True
+
+    def poll(self):
+        """
+            This method returns the computer move if it was chosen.
+
+        :return: Tuple (row, col), or None if the computer is still thinking or no move was started.
+        """
+        if self._future is None or not self._future.done():
+            return None
+
+        move, self._ponder_counts = self._future.result()
+        self._future = None
+
+        return move
+
+    def cancel(self):
+        """
+            This method stops the move being chosen and the pondering, if there are any, and drops the move. The search stops at its next
+        position, so this only waits for a moment.
+        """
+        futures = [future for future in (self._ponder_future, self._future) if future is not None]
+        if not futures:
+            return
+
+        self._cancel_event.set()
+        try:
+            for future in futures:
+                future.result()
+        finally:
+            self._cancel_event.clear()
+            self._future = None
+            self._ponder_future = None
+
+    def shutdown(self):
+        """
+            This method stops the move being chosen and the worker process, together with the processes of its parallel search. The
+        positions solved by the worker are added to the position cache of this process.
+        """
+        self.cancel()
+        if self._started:
+            PositionCache.shared().update(self._executor.submit(_close_worker).result())
+        self._executor.shutdown()
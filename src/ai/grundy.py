@@ -0,0 +1,92 @@
+from ai.regions import split_cells, canonical_shape, remove_neighbourhood, mask_to_cells
+from collections import OrderedDict
+
+
+class GrundyCache:
+    # The Grundy values only depend on the shape of a region, not on the board, so all the caches share the values found so far.
+    # Both the shared values and the values kept by mask are bounded: once full, the value used the longest time ago is dropped to
+    # make room for a new one, as in PositionCache.
+    DEFAULT_MAX_ENTRIES = 1 << 16
+
+    _shared_values = OrderedDict()
+
+    def __init__(self, tablebase=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self._values = GrundyCache._shared_values
+        self._region_values = OrderedDict()
+        self._max_entries = max_entries
+        self._tablebase = tablebase
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def max_entries(self):
+        return self._max_entries
+
+    def _remember(self, values, key, value):
+        values[key] = value
+        while len(values) > self._max_entries:
+            values.popitem(last=False)
+
+    def grundy(self, cells):
+        """
+            This method returns the Grundy value of a connected region, the smallest value not reached by any of its moves, where the value
+        of a move is the XOR of the values of the regions it leaves. The values are taken from the tablebase when the region is small
+        enough, and remembered for every shape computed.
+
+        :param cells: List of tuples (row, col)
+        :return: Integer
+        """
+        if self._tablebase is not None and len(cells) <= self._tablebase.max_cells:
+            return self._tablebase.grundy(cells)
+
+        shape = canonical_shape(cells)
+        value = self._values.get(shape)
+        if value is not None:
+            self._values.move_to_end(shape)
+            self._hits += 1
+            return value
+
+        self._misses += 1
+
+        reachable = set()
+        for row, col in cells:
+            move_value = 0
+            for region in split_cells(remove_neighbourhood(cells, row, col)):
+                move_value ^= self.grundy(region)
+            reachable.add(move_value)
+
+        value = 0
+        while value in reachable:
+            value += 1
+
+        self._remember(self._values, shape, value)
+
+        return value
+
+    def region_value(self, region_mask, board_size):
+        """
+            This method returns the Grundy value of a region of a board.
+
+        :param region_mask: Integer, the bitmask of the cells of a connected region.
+        :param board_size: Integer
+        :return: Integer
+        """
+        # The same regions come back again and again during a search, so their values are also kept by mask, which is much cheaper
+        # to look up than the shape.
+        key = (region_mask, board_size)
+        value = self._region_values.get(key)
+        if value is None:
+            value = self.grundy(mask_to_cells(region_mask, board_size))
+            self._remember(self._region_values, key, value)
+        else:
+            self._region_values.move_to_end(key)
+
+        return value
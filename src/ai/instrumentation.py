@@ -0,0 +1,126 @@
+import cProfile
+import time
+
+
+class TurnStats:
+    # The counters of a single computer turn. The ones of the search are only set if the turn searched the position. The ponder one is
+    # 'hit', 'partial' or 'miss' if the player pondered before the turn, as counted by SolverAI.ponder_counts.
+    def __init__(self):
+        self.total_ms = 0
+        self.phase_ms = {}
+        self.moves_tried = 0
+        self.nodes = 0
+        self.depth = 0
+        self.time_budget_ms = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.grundy_hits = 0
+        self.grundy_misses = 0
+        self.ponder = None
+
+    def as_dict(self):
+        """
+            This method returns the counters of the turn, for example to write them as JSON.
+
+        :return: Dictionary
+        """
+        return dict(vars(self), phase_ms=dict(self.phase_ms))
+
+
+class Instrumentation:
+    # Records the counters of every turn of a computer player. The player reports the phases of its turns and what it tried, and the
+    # instrumentation times them, so a player without instrumentation does none of this work.
+    # The callback, if there is one, is called with the TurnStats at the end of every turn. With profile set, the turns also run under
+    # cProfile.
+    def __init__(self, callback=None, profile=False):
+        self._callback = callback
+        self._profiler = cProfile.Profile() if profile else None
+        self._turns = []
+        self._current = None
+        self._phase = None
+        self._phase_start = 0
+        self._turn_start = 0
+
+    @property
+    def turns(self):
+        """
+            The TurnStats of all the turns recorded so far.
+        """
+        return self._turns
+
+    @property
+    def last_turn(self):
+        """
+            The TurnStats of the last turn, or None if no turn was recorded yet.
+        """
+        return self._turns[-1] if self._turns else None
+
+    @property
+    def current_turn(self):
+        """
+            The TurnStats of the turn in progress, or None between turns.
+        """
+        return self._current
+
+    def start_turn(self):
+        self._current = TurnStats()
+        self._phase = None
+        self._turn_start = time.perf_counter()
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    def start_phase(self, name):
+        """
+            This method ends the current phase of the turn, if there is one, and starts a new one. A phase which comes back several times
+        in a turn adds up its times.
+
+        :param name: String
+        """
+        # The player may report phases outside its turns, while pondering.
+        if self._current is None:
+            return
+
+        now = time.perf_counter()
+        self._end_phase(now)
+        self._phase = name
+        self._phase_start = now
+
+    def _end_phase(self, now):
+        if self._phase is not None:
+            phase_ms = self._current.phase_ms
+            phase_ms[self._phase] = phase_ms.get(self._phase, 0) + (now - self._phase_start) * 1000
+            self._phase = None
+
+    def end_turn(self):
+        """
+            This method ends the turn in progress and reports its counters to the callback.
+
+        :return: TurnStats
+        """
+        if self._profiler is not None:
+            self._profiler.disable()
+
+        now = time.perf_counter()
+        self._end_phase(now)
+
+        stats = self._current
+        stats.total_ms = (now - self._turn_start) * 1000
+        self._turns.append(stats)
+        self._current = None
+
+        if self._callback is not None:
+            self._callback(stats)
+
+        return stats
+
+    def dump_profile(self, path):
+        """
+            This method writes the profile of all the turns recorded so far, in the pstats format read by snakeviz, flameprof, gprof2dot
+        and the other profile viewers.
+
+        :param path: String
+        """
+        if self._profiler is None:
+            raise ValueError("The turns were not profiled.")
+
+        self._profiler.dump_stats(path)
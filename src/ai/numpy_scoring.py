@@ -0,0 +1,139 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# The offsets of the 8 neighbours of a position.
+NEIGHBOUR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def stack_empty_masks(empty_masks, board_size):
+    """
+        This function turns the bitmasks of the empty positions of several boards into a stack of matrices, for evaluate_positions.
+
+    :param empty_masks: Iterable of integers, bit row * size + col being set if the position is empty.
+    :param board_size: Integer
+    :return: Array of booleans (number of boards x N x N)
+    """
+    if numpy is None:
+        raise ImportError("The batch evaluation needs NumPy to be installed.")
+
+    num_cells = board_size * board_size
+    num_bytes = (num_cells + 7) // 8
+    mask_bytes = numpy.frombuffer(b''.join(mask.to_bytes(num_bytes, 'little') for mask in empty_masks), dtype=numpy.uint8)
+    bits = numpy.unpackbits(mask_bytes.reshape(-1, num_bytes), axis=1, bitorder='little')[:, :num_cells]
+
+    return bits.reshape(-1, board_size, board_size).view(bool)
+
+
+def evaluate_positions(states):
+    """
+        This function evaluates many positions at once, without creating any board: for every position, it finds the valid moves, the
+    number of positions every move blocks, and whether the game is over.
+
+    :param states: Array (number of boards x N x N), 0 or False for the empty positions and anything else for the filled ones, such as the
+    codes of the symbols or the output of stack_empty_masks negated.
+    :return: Tuple (valid moves, array of booleans (number of boards x N x N); scores, array of integers (number of boards x N x N), 0
+    where there is no valid move; game over, array of booleans (number of boards))
+    """
+    if numpy is None:
+        raise ImportError("The batch evaluation needs NumPy to be installed.")
+
+    legal = numpy.asarray(states) == 0
+    num_boards, size = legal.shape[0], legal.shape[1]
+
+    padded = numpy.zeros((num_boards, size + 2, size + 2), dtype=numpy.uint8)
+    padded[:, 1:-1, 1:-1] = legal
+
+    scores = numpy.zeros((num_boards, size, size), dtype=numpy.uint8)
+    for i, j in NEIGHBOUR_OFFSETS:
+        scores += padded[:, 1 + i:1 + i + size, 1 + j:1 + j + size]
+    scores *= legal
+
+    return legal, scores, ~legal.any(axis=(1, 2))
+
+
+class NumpyScorer:
+    # Scores all the positions of a board at once with NumPy, instead of following the moves one by one. The number of positions a move
+    # blocks is the number of empty positions around it, so the scores are the convolution of the empty positions with a 3 x 3 kernel
+    # without its centre, computed as the sum of the 8 shifted copies of the padded board.
+    # It only needs the bitmask of the empty positions, so it works the same way with every kind of board.
+    def __init__(self, board_size):
+        if numpy is None:
+            raise ImportError("The numpy scoring backend needs NumPy to be installed.")
+
+        self._size = board_size
+        self._num_cells = board_size * board_size
+        self._num_bytes = (self._num_cells + 7) // 8
+
+        # The board with a border of blocked positions, and the scores, are kept from one call to the next instead of allocated every time.
+        self._padded = numpy.zeros((board_size + 2, board_size + 2), dtype=numpy.uint8)
+        self._scores = numpy.zeros((board_size, board_size), dtype=numpy.uint8)
+
+    @staticmethod
+    def available():
+        """
+            This method checks if NumPy is installed, so the scorer can be used.
+
+        :return: True, if NumPy is installed, False otherwise.
+        """
+        return numpy is not None
+
+    @property
+    def size(self):
+        return self._size
+
+    def empty_array(self, empty_mask):
+        """
+            This method turns the bitmask of the empty positions of a board into a matrix.
+
+        :param empty_mask: Integer, the bitmask of the empty positions, bit row * size + col being set if the position is empty.
+        :return: Array of booleans (N x N)
+        """
+        mask_bytes = numpy.frombuffer(empty_mask.to_bytes(self._num_bytes, 'little'), dtype=numpy.uint8)
+        bits = numpy.unpackbits(mask_bytes, bitorder='little')[:self._num_cells]
+
+        return bits.reshape(self._size, self._size).view(bool)
+
+    def scores(self, empty):
+        """
+            This method computes, for every position of a board, the number of its empty neighbours, which is the number of positions a
+        move there blocks.
+
+        :param empty: Array of booleans (N x N), True for the empty positions.
+        :return: Array of integers (N x N), which is overwritten by the next call.
+        """
+        size = self._size
+        padded = self._padded
+        padded[1:-1, 1:-1] = empty
+
+        scores = self._scores
+        numpy.add(padded[:size, :size], padded[:size, 1:size + 1], out=scores)
+        for i, j in ((0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (2, 2)):
+            scores += padded[i:i + size, j:j + size]
+
+        return scores
+
+    def get_top_moves(self, empty_mask, max_score=None):
+        """
+            This method returns the valid moves which block the highest number of positions, less than a given maximum, like the
+        get_top_moves method of the boards.
+
+        :param empty_mask: Integer, the bitmask of the empty positions.
+        :param max_score: Integer, the moves must block fewer positions than this, or None for no maximum.
+        :return: Tuple (list of the moves in row-major order, the number of positions they block). The list is empty if there is no such move.
+        """
+        empty = self.empty_array(empty_mask)
+        scores = self.scores(empty)
+
+        # The positions which are not moves, or block too many positions, are left out.
+        if max_score is not None:
+            empty = empty & (scores < max_score)
+        if not empty.any():
+            return [], 0
+
+        best_score = int(scores.max(where=empty, initial=0))
+        rows, cols = numpy.nonzero(empty & (scores == best_score))
+
+        return list(zip(rows.tolist(), cols.tolist())), best_score
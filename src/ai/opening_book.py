@@ -0,0 +1,186 @@
+from ai.solver import Solver
+from ai.symmetry import Symmetry
+from config.definitions import ROOT_DIR
+import argparse
+import mmap
+import os
+import struct
+
+
+class OpeningBookException(Exception):
+    pass
+
+
+class OpeningBook:
+    # The book is a binary file, looked up directly in its memory map, so it is never parsed.
+    # The file starts with a header (magic, version, board size, number of slots), followed by a hash table with open addressing.
+    # Every slot holds the canonical mask of the empty positions (0 for an unused slot), the best move in the canonical position and the
+    # value of the position for the player to move (1 for a win, -1 for a loss).
+    MAGIC = b'OBBK'
+    VERSION = 1
+    HEADER_FORMAT = '<4sHHI'
+    SLOT_FORMAT = '<Qhbx'
+    HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    SLOT_SIZE = struct.calcsize(SLOT_FORMAT)
+
+    # The keys are stored on 64 bits, so only boards of up to 8 x 8 positions can have a book.
+    MAX_BOARD_SIZE = 8
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise OpeningBookException("The opening book file is empty.")
+
+        magic, version, board_size, num_slots = struct.unpack_from(OpeningBook.HEADER_FORMAT, self._mmap, 0)
+        if magic != OpeningBook.MAGIC or version != OpeningBook.VERSION:
+            self.close()
+            raise OpeningBookException("The file is not an opening book.")
+
+        self._size = board_size
+        self._num_slots = num_slots
+
+    @staticmethod
+    def default_path(board_size):
+        """
+            This method returns the path where the opening book for a given board size is kept.
+
+        :param board_size: Integer
+        :return: String
+        """
+        return os.path.join(ROOT_DIR, f"assets/books/opening_book_{board_size}.bin")
+
+    @staticmethod
+    def load(board_size, path=None):
+        """
+            This method opens the opening book for a given board size, if there is one.
+
+        :param board_size: Integer
+        :param path: The path of the book, or None for the default one.
+        :return: OpeningBook, or None if there is no valid book for that board size.
+        """
+        if path is None:
+            path = OpeningBook.default_path(board_size)
+
+        try:
+            book = OpeningBook(path)
+        except (OSError, OpeningBookException):
+            return None
+
+        if book.size != board_size:
+            book.close()
+            return None
+
+        return book
+
+    @staticmethod
+    def slot_index(key, num_slots):
+        """
+            This method returns the first slot where a key is looked for. The number of slots is a power of two.
+
+        :param key: Integer
+        :param num_slots: Integer
+        :return: Integer
+        """
+        return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32 & (num_slots - 1)
+
+    @property
+    def size(self):
+        return self._size
+
+    def lookup(self, empty_mask):
+        """
+            This method looks up a position in the book.
+
+        :param empty_mask: Integer, the bitmask of the empty positions.
+        :return: Tuple (value, cell) as returned by Solver.solve, or None if the position is not in the book.
+        """
+        # The symmetry tables are only built at the first lookup, so opening the book costs nothing more than mapping the file.
+        symmetry = Symmetry.for_size(self._size)
+        canonical_mask, transform = symmetry.canonicalise(empty_mask)
+        if canonical_mask == 0:
+            return None
+
+        index = OpeningBook.slot_index(canonical_mask, self._num_slots)
+        for probe in range(self._num_slots):
+            offset = OpeningBook.HEADER_SIZE + ((index + probe) & (self._num_slots - 1)) * OpeningBook.SLOT_SIZE
+            key, cell, value = struct.unpack_from(OpeningBook.SLOT_FORMAT, self._mmap, offset)
+
+            if key == 0:
+                return None
+            if key == canonical_mask:
+                return value, symmetry.revert_cell(cell, transform)
+
+        return None
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+def build_opening_book(board_size, plies, path):
+    """
+        This function solves all the positions which can be reached from the empty board in at most a given number of moves, and writes
+    them to an opening book file.
+
+    :param board_size: Integer
+    :param plies: Integer, the number of moves.
+    :param path: String, the path of the file.
+    :return: Integer, the number of positions in the book.
+    """
+    if board_size > OpeningBook.MAX_BOARD_SIZE:
+        raise OpeningBookException(f"Opening books are limited to boards of at most {OpeningBook.MAX_BOARD_SIZE} x {OpeningBook.MAX_BOARD_SIZE}.")
+
+    solver = Solver(board_size)
+    symmetry = Symmetry.for_size(board_size)
+
+    entries = {}
+    level = {symmetry.canonicalise((1 << (board_size * board_size)) - 1)[0]}
+
+    for ply in range(plies + 1):
+        next_level = set()
+        for empty_mask in level:
+            # The canonical mask is solved, so the best move is already relative to it.
+            entries[empty_mask] = solver.solve(empty_mask)
+
+            for cell in solver.ordered_moves(empty_mask):
+                remaining = solver.play(empty_mask, cell)
+                if remaining != 0:
+                    next_level.add(symmetry.canonicalise(remaining)[0])
+
+        level = next_level - entries.keys()
+
+    # Keep the table at most half full, so the probe sequences stay short.
+    num_slots = 1
+    while num_slots < 2 * len(entries):
+        num_slots *= 2
+
+    slots = [(0, 0, 0)] * num_slots
+    for key, (value, cell) in entries.items():
+        index = OpeningBook.slot_index(key, num_slots)
+        while slots[index][0] != 0:
+            index = (index + 1) & (num_slots - 1)
+        slots[index] = (key, cell, value)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'wb') as book_file:
+        book_file.write(struct.pack(OpeningBook.HEADER_FORMAT, OpeningBook.MAGIC, OpeningBook.VERSION, board_size, num_slots))
+        for slot in slots:
+            book_file.write(struct.pack(OpeningBook.SLOT_FORMAT, *slot))
+
+    return len(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the opening book for the Obstruction computer player.")
+    parser.add_argument('--size', type=int, default=6, help="the size of the board")
+    parser.add_argument('--plies', type=int, default=4, help="the number of moves from the empty board to solve")
+    parser.add_argument('--output', default=None, help="the path of the book file")
+    arguments = parser.parse_args()
+
+    output = arguments.output if arguments.output is not None else OpeningBook.default_path(arguments.size)
+    count = build_opening_book(arguments.size, arguments.plies, output)
+
+    print(f"Wrote {count} positions to {output}")
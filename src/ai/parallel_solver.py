@@ -0,0 +1,317 @@
+from ai.grundy import GrundyCache
+from ai.solver import Solver, SearchTimeout
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import multiprocessing
+import time
+
+
+# The solver of every worker process. It is kept from one position to the next, so the positions it already searched are in its
+# transposition table.
+_worker_solver = None
+
+
+def _initialise_worker(board_size, tablebase, cancel_event):
+    global _worker_solver
+    _worker_solver = Solver(board_size, GrundyCache(tablebase), cancel_event)
+
+
+def _start_worker():
+    pass
+
+
+def _search_child(child_mask, deadline, depth, beta):
+    """
+        This function searches the position left by a move of the root, in a worker process.
+
+    :param child_mask: Integer, the empty positions left by the move.
+    :param deadline: The time.time() at which the search must stop, or None to solve the position.
+    :param depth: The number of moves to look ahead after the move, or None to solve the position.
+    :param beta: Integer, the value of the position above which its exact value is not needed, as in Solver.search_window.
+    :return: Tuple (value of the move, positions searched, transposition table hits, transposition table misses), where the value is None
+    if the search was stopped before it was done, or None if the deadline had already passed.
+    """
+    try:
+        if deadline is None:
+            value = _worker_solver.solve(child_mask)[0]
+        else:
+            time_budget_ms = (deadline - time.time()) * 1000
+            if time_budget_ms <= 0:
+                return None
+            value = _worker_solver.search_window(child_mask, time_budget_ms, depth, beta)
+    except SearchTimeout:
+        value = None
+
+    # The value of the position is for the player moving after the move, so it is negated.
+    return None if value is None else -value, _worker_solver.nodes, _worker_solver.cache_hits, _worker_solver.cache_misses
+
+
+class ParallelSolver:
+    # Splits the search of a position between several processes, every one of them searching the positions left by some of its moves.
+    # The positions are searched in the order of their moves and the first winning move in that order is returned, so the result of
+    # solving a position does not depend on the number of processes or on which of them finishes first.
+    # It has the same solve, search, ordered_moves and play methods as the Solver class, so the computer player can use either of them.
+
+    # How often, in seconds, the results of the worker processes are checked for a cancelled search.
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, board_size, workers, tablebase=None, cancel_event=None):
+        self._size = board_size
+        self._workers = workers
+        self._cancel_event = cancel_event
+
+        # The moves of the root are generated and ordered in this process, with a solver of its own.
+        self._solver = Solver(board_size, GrundyCache(tablebase))
+
+        self._worker_cancel_event = multiprocessing.Event()
+        self._executor = ProcessPoolExecutor(workers, initializer=_initialise_worker, initargs=(board_size, tablebase, self._worker_cancel_event))
+
+        # The worker processes are started now, by the thread creating the solver. Started by the first search, which may run in another
+        # thread while pondering, they could be forked while the main thread holds the lock of the standard input, waiting for the user,
+        # and wait for it forever.
+        self._executor.submit(_start_worker)
+
+        self._nodes = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._depth = 0
+        self._elapsed_ms = 0
+        self._time_budget_ms = None
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def workers(self):
+        return self._workers
+
+    @property
+    def nodes(self):
+        """
+            The number of positions searched by all the processes during the last call of the solve or search methods.
+        """
+        return self._nodes
+
+    @property
+    def cache_hits(self):
+        """
+            The number of positions found in the transposition tables of all the processes during the last call of the solve or search
+        methods.
+        """
+        return self._cache_hits
+
+    @property
+    def cache_misses(self):
+        return self._cache_misses
+
+    @property
+    def grundy_cache(self):
+        """
+            The Grundy values of the small regions found in this process, the worker processes having caches of their own.
+        """
+        return self._solver.grundy_cache
+
+    @property
+    def depth(self):
+        """
+            The number of moves looked ahead by the last depth the search method searched all the moves to.
+        """
+        return self._depth
+
+    @property
+    def elapsed_ms(self):
+        return self._elapsed_ms
+
+    @property
+    def time_budget_ms(self):
+        return self._time_budget_ms
+
+    def ordered_moves(self, empty_mask):
+        """
+            This method returns the valid moves of a position, in the order they are searched, as given by the solver of this process.
+
+        :param empty_mask: Integer
+        :return: List of cells
+        """
+        return self._solver.ordered_moves(empty_mask)
+
+    def play(self, empty_mask, cell):
+        """
+            This method returns the mask of the empty positions left after a move.
+
+        :param empty_mask: Integer
+        :param cell: Integer, row * size + col
+        :return: Integer
+        """
+        return self._solver.play(empty_mask, cell)
+
+    def root_moves(self, empty_mask):
+        """
+            This method returns the moves of a position which have to be searched, in the order of the Solver class. Moves which lead to
+        rotations or reflections of the position left by an earlier move are left out, since they have the same value.
+
+        :param empty_mask: Integer
+        :return: List of tuples (cell, mask of the empty positions left by the move)
+        """
+        moves = []
+        keys = set()
+        for cell in self._solver.ordered_moves(empty_mask):
+            child_mask = self._solver.play(empty_mask, cell)
+            key = self._solver.position_key(child_mask)[0]
+            if key not in keys:
+                keys.add(key)
+                moves.append((cell, child_mask))
+
+        return moves
+
+    def _search_wave(self, moves, deadline, child_depth):
+        """
+            This method searches the positions left by some moves in the worker processes, all of them to the same depth. It stops as soon
+        as a move is known to win and the values of all the moves before it are known.
+            With a deadline, only the value of the first move is needed exactly, as in Solver.search_root: the other moves are only searched
+        for a win, so their value is 0 unless they are found to win or to lose.
+
+        :param moves: List of tuples (cell, mask of the empty positions left by the move), as returned by root_moves.
+        :param deadline: The time.time() at which the search must stop, or None to solve the positions.
+        :param child_depth: The number of moves to look ahead after every move, or None to solve the positions.
+        :raises SearchTimeout: Exception raised if the search was cancelled.
+        :return: List of the values of the moves, None for the moves which were not searched in time.
+        """
+        futures = {}
+        for index, (cell, child_mask) in enumerate(moves):
+            beta = 1 if deadline is None or index == 0 else 0
+            futures[self._executor.submit(_search_child, child_mask, deadline, child_depth, beta)] = index
+
+        values = [None] * len(moves)
+        first_win = None
+        pending = set(futures)
+
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=ParallelSolver.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                if self._cancel_event is not None and self._cancel_event.is_set():
+                    raise SearchTimeout
+
+                for future in done:
+                    index = futures[future]
+                    result = future.result()
+                    if result is None:
+                        continue
+
+                    values[index] = result[0]
+                    self._nodes += result[1]
+                    self._cache_hits += result[2]
+                    self._cache_misses += result[3]
+                    if values[index] is not None and values[index] > 0 and (first_win is None or index < first_win):
+                        first_win = index
+
+                # Once a move wins, only the moves before it can change the result.
+                if first_win is not None and all(value is not None for value in values[:first_win]):
+                    break
+        finally:
+            if pending:
+                self._worker_cancel_event.set()
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+                self._worker_cancel_event.clear()
+
+        return values
+
+    def _search_moves(self, empty_mask, deadline, max_depth):
+        """
+            This method searches the moves of a position in the worker processes and combines their values. Without a deadline, every
+        move is solved. Otherwise the moves are searched with iterative deepening, like Solver.search does: all of them one move ahead, then
+        two, and so on, the result being the one of the last depth all the moves were searched to before the deadline. The moves which were
+        not searched in time are not counted.
+
+        :param empty_mask: Integer
+        :param deadline: The time.time() at which the search must stop, or None to solve the position.
+        :param max_depth: The maximum number of moves to look ahead, or None for no limit.
+        :raises SearchTimeout: Exception raised if the search was cancelled.
+        :return: Tuple (value, cell), as returned by Solver.search.
+        """
+        moves = self.root_moves(empty_mask)
+        first_move = moves[0][0]
+
+        depth = 1
+        while deadline is None or max_depth is None or depth <= max_depth:
+            if deadline is not None and time.time() >= deadline:
+                break
+
+            values = self._search_wave(moves, deadline, None if deadline is None else depth - 1)
+
+            for (cell, child_mask), value in zip(moves, values):
+                if value is not None and value > 0:
+                    return 1, cell
+
+            # The moves known to lose are not searched again.
+            first_lost = values[0] is not None and values[0] < 0
+            moves = [move for move, value in zip(moves, values) if value is None or value >= 0]
+            if not moves:
+                return -1, first_move
+
+            if deadline is None or None in values:
+                break
+
+            # The other moves were only searched for a win, so once the first one loses, the depth is searched again from the next one.
+            if first_lost:
+                continue
+
+            self._depth = depth
+            depth += 1
+
+        return 0, moves[0][0]
+
+    def _run(self, empty_mask, time_budget_ms, max_depth):
+        start = time.perf_counter()
+        self._nodes = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._depth = 0
+        self._time_budget_ms = time_budget_ms
+
+        try:
+            if empty_mask == 0:
+                return -1, None
+
+            # A position with only small regions is solved at once from their Grundy values, so it is not worth sending to the workers.
+            if self._solver.split_position(empty_mask)[0] == 0:
+                return self._solver.solve(empty_mask)
+
+            deadline = None if time_budget_ms is None else time.time() + time_budget_ms / 1000
+            return self._search_moves(empty_mask, deadline, max_depth)
+        finally:
+            self._elapsed_ms = (time.perf_counter() - start) * 1000
+
+    def solve(self, empty_mask):
+        """
+            This method solves a position, finding out if the player to move can force a win and with which move.
+
+        :param empty_mask: Integer
+        :raises SearchTimeout: Exception raised if the search was cancelled.
+        :return: Tuple (value, cell), as returned by Solver.solve.
+        """
+        return self._run(empty_mask, None, None)
+
+    def search(self, empty_mask, time_budget_ms, max_depth=None):
+        """
+            This method searches a position within a time budget, with iterative deepening, the moves of every depth being split between
+        the worker processes. Which moves are searched deep enough to be solved depends on the speed of the processes, so unlike the solve
+        method the result may change from one call to the next.
+
+        :param empty_mask: Integer
+        :param time_budget_ms: The maximum number of milliseconds the search may take.
+        :param max_depth: The maximum number of moves to look ahead, or None for no limit.
+        :return: Tuple (value, cell), as returned by Solver.search.
+        """
+        try:
+            return self._run(empty_mask, time_budget_ms, max_depth)
+        except SearchTimeout:
+            return 0, self._solver.ordered_moves(empty_mask)[0]
+
+    def close(self):
+        """
+            This method stops the worker processes.
+        """
+        self._executor.shutdown(cancel_futures=True)
@@ -0,0 +1,180 @@
+from ai.symmetry import Symmetry
+from config.definitions import ROOT_DIR
+from collections import OrderedDict
+import json
+import os
+
+
+class PositionCache:
+    # The results of the positions solved by the computer players, kept for the whole session, so a position which comes back in another
+    # game is answered without searching it again. The positions are stored by their canonical mask, so all their rotations and
+    # reflections share an entry. Only the results known for sure are kept, since the others depend on how long the search was given.
+    # Once the cache is full, the position used the longest time ago is dropped to make room for a new one.
+    DEFAULT_MAX_ENTRIES = 1 << 16
+
+    VERSION = 1
+
+    # The cache shared by all the computer players of the process.
+    _shared = None
+
+    @classmethod
+    def shared(cls):
+        """
+            This method returns the cache shared by all the computer players of the process, creating it the first time it is requested.
+
+        :return: PositionCache
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+
+        return cls._shared
+
+    @staticmethod
+    def default_path():
+        """
+            This method returns the path where the cache is saved between sessions, next to the settings file.
+
+        :return: String
+        """
+        return os.path.join(ROOT_DIR, "settings/position_cache.json")
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def max_entries(self):
+        return self._max_entries
+
+    @max_entries.setter
+    def max_entries(self, value):
+        self._max_entries = value
+        self._evict()
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def _evict(self):
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def lookup(self, empty_mask, board_size):
+        """
+            This method looks up the result of a position, which then becomes the most recently used one.
+
+        :param empty_mask: Integer, the bitmask of the empty positions.
+        :param board_size: Integer
+        :return: Tuple (value, cell) as returned by Solver.solve, or None if the position is not in the cache.
+        """
+        symmetry = Symmetry.for_size(board_size)
+        canonical_mask, transform = symmetry.canonicalise(empty_mask)
+        key = (board_size, canonical_mask)
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._entries.move_to_end(key)
+        value, cell = entry
+
+        return value, symmetry.revert_cell(cell, transform)
+
+    def store(self, empty_mask, board_size, value, cell):
+        """
+            This method adds the result of a position to the cache, if it is known for sure.
+
+        :param empty_mask: Integer, the bitmask of the empty positions.
+        :param board_size: Integer
+        :param value: Integer, 1 if the player to move wins, -1 if it loses and 0 if it is not known.
+        :param cell: Integer, the best move, or None if there are no moves.
+        """
+        if value == 0 or cell is None:
+            return
+
+        symmetry = Symmetry.for_size(board_size)
+        canonical_mask, transform = symmetry.canonicalise(empty_mask)
+        key = (board_size, canonical_mask)
+
+        self._entries[key] = (value, symmetry.transform_cell(cell, transform))
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def entries(self):
+        """
+            This method returns the entries of the cache, from the least to the most recently used one.
+
+        :return: List of tuples (board size, canonical mask, value, canonical cell)
+        """
+        return [(board_size, canonical_mask, value, cell) for (board_size, canonical_mask), (value, cell) in self._entries.items()]
+
+    def update(self, entries):
+        """
+            This method adds entries to the cache, for example the ones of the cache of another process, as the most recently used ones.
+
+        :param entries: Iterable of tuples, as returned by the entries method.
+        """
+        for board_size, canonical_mask, value, cell in entries:
+            key = (board_size, canonical_mask)
+            self._entries[key] = (value, cell)
+            self._entries.move_to_end(key)
+
+        self._evict()
+
+    def clear(self):
+        self._entries.clear()
+        self._hits = 0
+        self._misses = 0
+
+    def save(self, path=None):
+        """
+            This method writes the cache to a file, keeping the order in which the positions were used.
+
+        :param path: String, or None for the default path.
+        """
+        if path is None:
+            path = PositionCache.default_path()
+
+        # The file is replaced only once it is complete, so an interrupted save does not lose the previous cache.
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'w') as cache_file:
+            json.dump({'version': PositionCache.VERSION, 'entries': self.entries()}, cache_file)
+        os.replace(temporary_path, path)
+
+    def load(self, path=None):
+        """
+            This method adds to the cache the positions saved in a file. A missing or invalid file is ignored.
+
+        :param path: String, or None for the default path.
+        :return: Integer, the number of positions read.
+        """
+        if path is None:
+            path = PositionCache.default_path()
+
+        try:
+            with open(path) as cache_file:
+                contents = json.load(cache_file)
+        except (OSError, ValueError):
+            return 0
+
+        if not isinstance(contents, dict) or contents.get('version') != PositionCache.VERSION:
+            return 0
+
+        try:
+            entries = [tuple(entry) for entry in contents['entries']]
+            self.update(entries)
+        except (KeyError, TypeError, ValueError):
+            return 0
+
+        return len(entries)
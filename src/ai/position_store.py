@@ -0,0 +1,335 @@
+from ai.symmetry import Symmetry
+from config.definitions import ROOT_DIR
+import hashlib
+import mmap
+import os
+import struct
+
+try:
+    import fcntl
+except ImportError:
+    # There is no file locking on Windows, where only one process at a time should write to a store.
+    fcntl = None
+
+
+class PositionStoreException(Exception):
+    pass
+
+
+class PositionStore:
+    # The positions solved by the computer players, kept on disk so they outlive the process. Like the opening book, the file is a hash table
+    # with open addressing, looked up directly in its memory map, so several processes share the same pages instead of loading the table.
+    # The file starts with a header (magic, version, board size, number of slots, number of positions), followed by the slots. Every slot
+    # holds the key of a canonical position (0 for an unused slot), the best move in the canonical position and the value of the position
+    # for the player to move (1 for a win, -1 for a loss).
+    # New results are kept in memory and written in batches, under a lock of the file, so the processes sharing it do not overwrite each
+    # other's slots. A table more than half full is copied into a new file twice as large, which replaces the old one.
+    MAGIC = b'OBPS'
+    VERSION = 1
+    HEADER_FORMAT = '<4sHHII'
+    SLOT_FORMAT = '<Qhbx'
+    HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+    SLOT_SIZE = struct.calcsize(SLOT_FORMAT)
+
+    INITIAL_SLOTS = 1024
+    BATCH_SIZE = 64
+
+    # The canonical masks of boards of up to 8 x 8 positions are their own keys, the ones of larger boards are hashed to 64 bits.
+    MAX_EXACT_KEY_BITS = 64
+
+    def __init__(self, path, board_size):
+        self._path = path
+        self._size = board_size
+        self._symmetry = Symmetry.for_size(board_size)
+        self._pending = {}
+        self._file = None
+        self._mmap = None
+        self._num_slots = 0
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._lock(path):
+                if not os.path.exists(path):
+                    PositionStore._write_table(path, board_size, PositionStore.INITIAL_SLOTS, [])
+
+        self._map()
+
+    @staticmethod
+    def default_path(board_size):
+        """
+            This method returns the path where the store for a given board size is kept.
+
+        :param board_size: Integer
+        :return: String
+        """
+        return os.path.join(ROOT_DIR, f"assets/stores/positions_{board_size}.bin")
+
+    @staticmethod
+    def open(board_size, path=None):
+        """
+            This method opens the store for a given board size, creating it if it does not exist yet.
+
+        :param board_size: Integer
+        :param path: The path of the store, or None for the default one.
+        :return: PositionStore, or None if the file can not be created or is not a store for that board size.
+        """
+        if path is None:
+            path = PositionStore.default_path(board_size)
+
+        try:
+            return PositionStore(path, board_size)
+        except (OSError, PositionStoreException):
+            return None
+
+    @staticmethod
+    def slot_index(key, num_slots):
+        """
+            This method returns the first slot where a key is looked for. The number of slots is a power of two.
+
+        :param key: Integer
+        :param num_slots: Integer
+        :return: Integer
+        """
+        return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> 32 & (num_slots - 1)
+
+    @staticmethod
+    def _write_table(path, board_size, num_slots, entries):
+        """
+            This method writes a new table with the given entries. It is written next to the path and then moved there, so the processes
+        reading the old table never see a half written one.
+
+        :param path: String
+        :param board_size: Integer
+        :param num_slots: Integer, a power of two.
+        :param entries: Iterable of tuples (key, cell, value)
+        """
+        table = bytearray(PositionStore.HEADER_SIZE + num_slots * PositionStore.SLOT_SIZE)
+        count = 0
+        for key, cell, value in entries:
+            index = PositionStore.slot_index(key, num_slots)
+            while struct.unpack_from('<Q', table, PositionStore.HEADER_SIZE + index * PositionStore.SLOT_SIZE)[0] != 0:
+                index = (index + 1) & (num_slots - 1)
+            struct.pack_into(PositionStore.SLOT_FORMAT, table, PositionStore.HEADER_SIZE + index * PositionStore.SLOT_SIZE, key, cell, value)
+            count += 1
+
+        struct.pack_into(PositionStore.HEADER_FORMAT, table, 0, PositionStore.MAGIC, PositionStore.VERSION, board_size, num_slots, count)
+
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as store_file:
+            store_file.write(table)
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def _lock(path):
+        """
+            This method returns a lock on the store, held by the processes writing to it. It is a separate file, since the store itself is
+        replaced when it grows.
+
+        :param path: String
+        :return: Context manager
+        """
+        return _FileLock(path + '.lock')
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def path(self):
+        return self._path
+
+    def __len__(self):
+        return self._read_header()[4] + len(self._pending)
+
+    def _read_header(self):
+        return struct.unpack_from(PositionStore.HEADER_FORMAT, self._mmap, 0)
+
+    def _map(self):
+        """
+            This method maps the current file of the store, and checks that it is a store for the board size.
+
+        :raises PositionStoreException: Exception raised if the file is not a store for the board size.
+        """
+        self._unmap()
+
+        self._file = open(self._path, 'r+b')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+        except ValueError:
+            self._file.close()
+            raise PositionStoreException("The position store file is empty.")
+
+        magic, version, board_size, num_slots, count = self._read_header()
+        if magic != PositionStore.MAGIC or version != PositionStore.VERSION or board_size != self._size:
+            self._unmap()
+            raise PositionStoreException("The file is not a position store for this board size.")
+
+        self._num_slots = num_slots
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+    def _unmap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def refresh(self):
+        """
+            This method maps the file of the store again if another process replaced it with a larger one, so the positions added since
+        then are seen.
+        """
+        try:
+            replaced = os.stat(self._path).st_ino != self._inode
+        except OSError:
+            return
+
+        if replaced:
+            self._map()
+
+    def position_key(self, canonical_mask):
+        """
+            This method returns the key of a canonical position in the table, which is never 0.
+
+        :param canonical_mask: Integer
+        :return: Integer
+        """
+        num_cells = self._size * self._size
+        if num_cells <= PositionStore.MAX_EXACT_KEY_BITS:
+            return canonical_mask
+
+        digest = hashlib.blake2b(canonical_mask.to_bytes((num_cells + 7) // 8, 'little'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') or 1
+
+    def _find_slot(self, key):
+        """
+            This method finds the slot of a key, or the unused slot where it would go.
+
+        :param key: Integer
+        :return: Tuple (offset of the slot, True if the key is in it)
+        """
+        index = PositionStore.slot_index(key, self._num_slots)
+        for probe in range(self._num_slots):
+            offset = PositionStore.HEADER_SIZE + ((index + probe) & (self._num_slots - 1)) * PositionStore.SLOT_SIZE
+            slot_key = struct.unpack_from('<Q', self._mmap, offset)[0]
+            if slot_key == 0 or slot_key == key:
+                return offset, slot_key == key
+
+        return None, False
+
+    def lookup(self, empty_mask):
+        """
+            This method looks up a position in the store, including the results not written yet.
+
+        :param empty_mask: Integer, the bitmask of the empty positions.
+        :return: Tuple (value, cell) as returned by Solver.solve, or None if the position is not in the store.
+        """
+        canonical_mask, transform = self._symmetry.canonicalise(empty_mask)
+        if canonical_mask == 0:
+            return None
+
+        self.refresh()
+        key = self.position_key(canonical_mask)
+        entry = self._pending.get(key)
+        if entry is None:
+            offset, found = self._find_slot(key)
+            if not found:
+                return None
+            entry = struct.unpack_from(PositionStore.SLOT_FORMAT, self._mmap, offset)[1:]
+
+        cell, value = entry
+        return value, self._symmetry.revert_cell(cell, transform)
+
+    def store(self, empty_mask, value, cell):
+        """
+            This method adds the result of a position to the store, if it is known for sure. The results are written once there are
+        BATCH_SIZE of them, or when the store is flushed.
+
+        :param empty_mask: Integer, the bitmask of the empty positions.
+        :param value: Integer, 1 if the player to move wins, -1 if it loses and 0 if it is not known.
+        :param cell: Integer, the best move, or None if there are no moves.
+        """
+        if value == 0 or cell is None:
+            return
+
+        canonical_mask, transform = self._symmetry.canonicalise(empty_mask)
+        self._pending[self.position_key(canonical_mask)] = (self._symmetry.transform_cell(cell, transform), value)
+
+        if len(self._pending) >= PositionStore.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+            This method writes the results added since the last flush to the file.
+        """
+        if not self._pending:
+            return
+
+        with self._lock(self._path):
+            self.refresh()
+
+            count = self._read_header()[4]
+            if 2 * (count + len(self._pending)) > self._num_slots:
+                self._grow(count + len(self._pending))
+            else:
+                for key, (cell, value) in self._pending.items():
+                    offset, found = self._find_slot(key)
+                    if found:
+                        continue
+
+                    # The move and the value are written before the key, so a process reading the slot at the same time either finds it
+                    # unused or finds all of it.
+                    struct.pack_into('<hb', self._mmap, offset + 8, cell, value)
+                    struct.pack_into('<Q', self._mmap, offset, key)
+                    count += 1
+
+                struct.pack_into('<I', self._mmap, PositionStore.HEADER_SIZE - 4, count)
+                self._mmap.flush()
+
+        self._pending.clear()
+
+    def _grow(self, count):
+        """
+            This method copies the table and the results not written yet into a new file, large enough to stay at most half full.
+
+        :param count: Integer, at most the number of positions of the new table.
+        """
+        num_slots = self._num_slots
+        while 2 * count > num_slots:
+            num_slots *= 2
+
+        entries = dict(self._pending)
+        for index in range(self._num_slots):
+            key, cell, value = struct.unpack_from(PositionStore.SLOT_FORMAT, self._mmap, PositionStore.HEADER_SIZE + index * PositionStore.SLOT_SIZE)
+            if key != 0:
+                entries.setdefault(key, (cell, value))
+
+        PositionStore._write_table(self._path, self._size, num_slots, [(key, cell, value) for key, (cell, value) in entries.items()])
+        self._map()
+
+    def close(self):
+        """
+            This method writes the results not written yet and closes the file.
+        """
+        if self._mmap is not None:
+            self.flush()
+        self._unmap()
+
+
+class _FileLock:
+    # An exclusive lock on a file, held while a process writes to the store.
+    def __init__(self, path):
+        self._path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self._path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
@@ -0,0 +1,14 @@
+from ai.ai import AI
+import random
+
+
+class RandomAI(AI):
+    def choose_move(self, first_move=False):
+        """
+            This method chooses one of the valid moves at random. It is the weakest possible player, against which the strength of the
+        others is measured.
+
+        :param first_move: True, if this is the first move of the computer in the game.
+        :return: Tuple (row, col)
+        """
+        return random.choice(self._board_service.get_empty_positions())
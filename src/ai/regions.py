@@ -0,0 +1,145 @@
+# Placing a symbol only affects its neighbours, so the empty positions of a board which are not adjacent to each other form independent
+# regions. A region plays the same wherever it is on the board, so it is identified by its shape: the set of its cells, moved to the top
+# left corner and brought to the smallest of its rotations and reflections.
+
+# The 8 rotations and reflections of a box of a given height and width, as functions mapping (row, col) inside the box to the new
+# position, together with telling if they swap the height and the width of the box.
+SHAPE_TRANSFORMS = (
+    (lambda row, col, height, width: (row, col), False),
+    (lambda row, col, height, width: (col, height - 1 - row), True),
+    (lambda row, col, height, width: (height - 1 - row, width - 1 - col), False),
+    (lambda row, col, height, width: (width - 1 - col, row), True),
+    (lambda row, col, height, width: (row, width - 1 - col), False),
+    (lambda row, col, height, width: (height - 1 - row, col), False),
+    (lambda row, col, height, width: (col, row), True),
+    (lambda row, col, height, width: (width - 1 - col, height - 1 - row), True),
+)
+
+
+def split_regions(empty_mask, neighbourhood):
+    """
+        This function splits the empty positions of a board into regions of positions connected through their neighbours.
+
+    :param empty_mask: Integer, the bitmask of the empty positions.
+    :param neighbourhood: Tuple, the bitmask of the neighbours of every cell, as returned by BitBoard.get_neighbourhood_masks.
+    :return: List of bitmasks, one for every region.
+    """
+    regions = []
+    while empty_mask:
+        region = 0
+        frontier = empty_mask & -empty_mask
+        while frontier:
+            region |= frontier
+
+            grown = 0
+            while frontier:
+                low_bit = frontier & -frontier
+                grown |= neighbourhood[low_bit.bit_length() - 1]
+                frontier ^= low_bit
+
+            frontier = grown & empty_mask & ~region
+
+        regions.append(region)
+        empty_mask &= ~region
+
+    return regions
+
+
+def mask_to_cells(mask, board_size):
+    """
+        This function returns the positions of the cells of a bitmask.
+
+    :param mask: Integer
+    :param board_size: Integer
+    :return: List of tuples (row, col)
+    """
+    cells = []
+    while mask:
+        low_bit = mask & -mask
+        cells.append(divmod(low_bit.bit_length() - 1, board_size))
+        mask ^= low_bit
+
+    return cells
+
+
+def split_cells(cells):
+    """
+        This function splits a set of cells into regions of cells connected through their neighbours.
+
+    :param cells: Iterable of tuples (row, col)
+    :return: List of lists of tuples (row, col)
+    """
+    remaining = set(cells)
+    regions = []
+    while remaining:
+        start = remaining.pop()
+        region = [start]
+        frontier = [start]
+        while frontier:
+            row, col = frontier.pop()
+            for i in range(row - 1, row + 2):
+                for j in range(col - 1, col + 2):
+                    if (i, j) in remaining:
+                        remaining.remove((i, j))
+                        region.append((i, j))
+                        frontier.append((i, j))
+
+        regions.append(region)
+
+    return regions
+
+
+def canonical_shape(cells):
+    """
+        This function returns the shape of a region: the smallest of its rotations and reflections, moved to the top left corner.
+
+    :param cells: Iterable of tuples (row, col)
+    :return: Tuple (height, width, bitmask of the cells, with bit row * width + col set for every cell)
+    """
+    min_row = min(row for row, col in cells)
+    min_col = min(col for row, col in cells)
+    moved = [(row - min_row, col - min_col) for row, col in cells]
+    height = max(row for row, col in moved) + 1
+    width = max(col for row, col in moved) + 1
+
+    best_shape = None
+    for transform, swaps in SHAPE_TRANSFORMS:
+        new_height, new_width = (width, height) if swaps else (height, width)
+
+        # The shapes are compared by height first, so the transforms giving a taller box can be skipped.
+        if best_shape is not None and new_height > best_shape[0]:
+            continue
+
+        mask = 0
+        for row, col in moved:
+            new_row, new_col = transform(row, col, height, width)
+            mask |= 1 << (new_row * new_width + new_col)
+
+        shape = (new_height, new_width, mask)
+        if best_shape is None or shape < best_shape:
+            best_shape = shape
+
+    return best_shape
+
+
+def shape_cells(shape):
+    """
+        This function returns the cells of a shape, as returned by canonical_shape.
+
+    :param shape: Tuple (height, width, mask)
+    :return: List of tuples (row, col)
+    """
+    height, width, mask = shape
+    return mask_to_cells(mask, width)
+
+
+def remove_neighbourhood(cells, row, col):
+    """
+        This function returns the cells left empty by a move, meaning all the cells except the move and its neighbours.
+
+    :param cells: Iterable of tuples (row, col)
+    :param row: Integer
+    :param col: Integer
+    :return: List of tuples (row, col)
+    """
+    return [(i, j) for i, j in cells if abs(i - row) > 1 or abs(j - col) > 1]
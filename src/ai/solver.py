@@ -0,0 +1,683 @@
+from ai.ai import AI
+from ai.grundy import GrundyCache
+from ai.regions import split_regions
+from ai.symmetry import Symmetry
+from board.bit_board import BitBoard
+import time
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Solver:
+    # Flags telling if the value stored in the transposition table is exact or only a bound of the real one.
+    EXACT = 0
+    LOWER_BOUND = 1
+    UPPER_BOUND = 2
+
+    # The depth of a search which is not limited. No game lasts that many moves.
+    UNLIMITED_DEPTH = 1 << 30
+
+    # Positions with fewer empty cells than this are searched quickly anyway, so they are not worth the cost of canonicalising them.
+    MIN_CANONICAL_EMPTY_CELLS = 12
+
+    # Regions with at most this many cells are not searched, they are replaced by a nim heap of their Grundy value.
+    MAX_GRUNDY_REGION_CELLS = 10
+
+    def __init__(self, board_size, grundy_cache=None, cancel_event=None):
+        self._size = board_size
+        self._cancel_event = cancel_event
+        self._num_cells = board_size * board_size
+
+        # A move empties its own cell and all of its neighbours, so the solver works with the closed neighbourhoods.
+        self._neighbourhood = BitBoard.get_neighbourhood_masks(board_size)
+        self._closed_neighbourhood = tuple(mask | (1 << cell) for cell, mask in enumerate(self._neighbourhood))
+
+        self._grundy_cache = grundy_cache if grundy_cache is not None else GrundyCache()
+        # The symmetry tables are only built the first time a position large enough to be canonicalised is searched.
+        self._symmetry = None
+        self._transposition_table = {}
+        self._deadline = None
+        self._nodes = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._depth = 0
+        self._elapsed_ms = 0
+        self._time_budget_ms = None
+        self._root_best = None
+        self._root_moves_searched = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def nodes(self):
+        """
+            The number of positions searched by the last call of the solve method.
+        """
+        return self._nodes
+
+    @property
+    def cache_hits(self):
+        """
+            The number of positions found in the transposition table by the last call of the search or solve methods.
+        """
+        return self._cache_hits
+
+    @property
+    def cache_misses(self):
+        return self._cache_misses
+
+    @property
+    def grundy_cache(self):
+        return self._grundy_cache
+
+    @property
+    def symmetry(self):
+        if self._symmetry is None:
+            self._symmetry = Symmetry.for_size(self._size)
+
+        return self._symmetry
+
+    @property
+    def depth(self):
+        """
+            The number of moves looked ahead by the last completed iteration of the search method.
+        """
+        return self._depth
+
+    @property
+    def elapsed_ms(self):
+        """
+            The number of milliseconds taken by the last call of the search or solve methods.
+        """
+        return self._elapsed_ms
+
+    @property
+    def time_budget_ms(self):
+        """
+            The time budget of the last call of the search or solve methods, or None if it had no limit.
+        """
+        return self._time_budget_ms
+
+    def check_if_stopped(self):
+        """
+            This method checks if the search must stop, because its deadline has passed or because it was cancelled from another thread or
+        process through the cancel event of the solver.
+
+        :return: True, if the search must stop, False otherwise.
+        """
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            return True
+
+        return self._cancel_event is not None and self._cancel_event.is_set()
+
+    def position_key(self, empty_mask, nim_heap=0):
+        """
+            This method returns the key under which a position is stored in the transposition table.
+            Obstruction is an impartial game: whose symbols are on the board does not matter for the rest of the game, only which positions
+        are still empty. The game is also the same on all the rotations and reflections of a position, so all of them share the entry of
+        their canonical mask, and the best move is stored relative to it.
+            Small positions use their own mask as the key. Symmetries keep the number of empty cells, so the two kinds of keys never mix.
+        The nim heap which replaces the small regions is stored above the bits of the cells.
+
+        :param empty_mask: Integer, the bitmask of the empty positions which are searched.
+        :param nim_heap: Integer, the XOR of the Grundy values of the small regions.
+        :return: Tuple (key, index of the symmetry which transforms the position into the canonical one)
+        """
+        if empty_mask.bit_count() < Solver.MIN_CANONICAL_EMPTY_CELLS:
+            key, transform = empty_mask, 0
+        else:
+            key, transform = self.symmetry.canonicalise(empty_mask)
+
+        return key | (nim_heap << self._num_cells), transform
+
+    def split_position(self, empty_mask):
+        """
+            This method splits a position into its independent regions. The small regions are replaced by their Grundy values, which are
+        all combined in a single nim heap, and only the large ones are left to search.
+
+        :param empty_mask: Integer, the bitmask of the empty positions.
+        :return: Tuple (bitmask of the large regions, size of the nim heap)
+        """
+        searched_mask = 0
+        nim_heap = 0
+        for region in split_regions(empty_mask, self._neighbourhood):
+            if region.bit_count() <= Solver.MAX_GRUNDY_REGION_CELLS:
+                nim_heap ^= self._grundy_cache.region_value(region, self._size)
+            else:
+                searched_mask |= region
+
+        return searched_mask, nim_heap
+
+    def play(self, empty_mask, cell):
+        """
+            This method returns the mask of the empty positions left after a move.
+
+        :param empty_mask: Integer
+        :param cell: Integer, row * size + col
+        :return: Integer
+        """
+        return empty_mask & ~self._closed_neighbourhood[cell]
+
+    def ordered_moves(self, empty_mask, first_move=None, nim_heap=0):
+        """
+            This method returns the valid moves of a position, the ones which leave fewer empty positions first, since they are the most
+        likely to win and finding a winning move early prunes the rest of the search. They are followed by the moves which reduce the nim
+        heap to a smaller size h, represented by the negative number -1 - h.
+
+        :param empty_mask: Integer
+        :param first_move: A move which should be tried before all the others, or None.
+        :param nim_heap: Integer, the size of the nim heap.
+        :return: List of moves
+        """
+        moves = []
+        remaining = empty_mask
+        while remaining:
+            low_bit = remaining & -remaining
+            cell = low_bit.bit_length() - 1
+            if cell != first_move:
+                moves.append(((empty_mask & ~self._closed_neighbourhood[cell]).bit_count(), cell))
+            remaining ^= low_bit
+
+        moves.sort()
+        ordered = [cell for count, cell in moves]
+        ordered.extend(-1 - size for size in range(nim_heap) if -1 - size != first_move)
+
+        if first_move is not None:
+            ordered.insert(0, first_move)
+
+        return ordered
+
+    def negamax(self, empty_mask, alpha, beta, nim_heap=0, depth=UNLIMITED_DEPTH):
+        """
+            This method computes the value of a position for the player who has to move, using negamax with alpha-beta pruning. The
+        player unable to make a move loses, so the value is 1 if the player to move can force a win and -1 otherwise.
+            The small regions of the position are not searched: by the Sprague-Grundy theorem, they play like a nim heap of the XOR of their
+        Grundy values, which are cached by shape. If only small regions are left, the position is lost exactly when that heap is empty.
+            The search can be limited to a number of moves, in which case the value is 0 if the result of the game is not known after them.
+
+        :param empty_mask: Integer
+        :param alpha: Integer, the value the player to move is already guaranteed.
+        :param beta: Integer, the value the opponent is already guaranteed, negated.
+        :param nim_heap: Integer, the size of a nim heap played together with the position.
+        :param depth: Integer, the number of moves to look ahead.
+        :raises SearchTimeout: Exception raised if the deadline of the search has passed or the search was cancelled.
+        :return: Integer (1, 0 or -1)
+        """
+        if depth <= 0:
+            # Splitting a large position is expensive, so the positions past the last move looked at are only checked for the end of the game.
+            if empty_mask == 0:
+                return 1 if nim_heap else -1
+            return 0
+
+        searched_mask, small_regions_heap = self.split_position(empty_mask)
+        nim_heap ^= small_regions_heap
+
+        if searched_mask == 0:
+            return 1 if nim_heap else -1
+
+        key, transform = self.position_key(searched_mask, nim_heap)
+        entry = self._transposition_table.get(key)
+        tt_move = None
+
+        if entry is None:
+            self._cache_misses += 1
+        else:
+            self._cache_hits += 1
+            value, flag, canonical_move, entry_depth = entry
+            tt_move = self.symmetry.revert_cell(canonical_move, transform) if canonical_move >= 0 else canonical_move
+
+            # A won or lost result holds whatever the depth, but an unknown one only if it was searched at least as deep.
+            if entry_depth >= depth or value != 0:
+                if flag == Solver.EXACT:
+                    return value
+                elif flag == Solver.LOWER_BOUND:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+
+                if alpha >= beta:
+                    return value
+
+        self._nodes += 1
+        if self.check_if_stopped():
+            raise SearchTimeout
+
+        original_alpha = alpha
+        best_value = -1
+        best_move = None
+
+        for move in self.ordered_moves(searched_mask, tt_move, nim_heap):
+            if move >= 0:
+                value = -self.negamax(self.play(searched_mask, move), -beta, -alpha, nim_heap, depth - 1)
+            else:
+                value = -self.negamax(searched_mask, -beta, -alpha, -1 - move, depth - 1)
+
+            if best_move is None or value > best_value:
+                best_value = value
+                best_move = move
+
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = Solver.UPPER_BOUND
+        elif best_value >= beta:
+            flag = Solver.LOWER_BOUND
+        else:
+            flag = Solver.EXACT
+
+        canonical_move = self.symmetry.transform_cell(best_move, transform) if best_move >= 0 else best_move
+        self._transposition_table[key] = (best_value, flag, canonical_move, depth)
+
+        return best_value
+
+    def _solve_position(self, empty_mask):
+        """
+            This method solves a non empty position without any depth limit.
+
+        :param empty_mask: Integer
+        :raises SearchTimeout: Exception raised if the deadline of the search has passed.
+        :return: Tuple (value, cell), as returned by the solve method.
+        """
+        # The full window [-1, 1] makes the value of the root exact.
+        value = self.negamax(empty_mask, -1, 1)
+
+        best_move = None
+        searched_mask, nim_heap = self.split_position(empty_mask)
+        if searched_mask != 0:
+            key, transform = self.position_key(searched_mask, nim_heap)
+            canonical_move = self._transposition_table[key][2]
+            if canonical_move >= 0:
+                best_move = self.symmetry.revert_cell(canonical_move, transform)
+
+        if best_move is None:
+            # The best move is in one of the small regions, so the moves on the board are tried one by one.
+            for cell in self.ordered_moves(empty_mask):
+                if best_move is None:
+                    best_move = cell
+                if value > 0 and self.negamax(self.play(empty_mask, cell), -1, 1) < 0:
+                    best_move = cell
+                    break
+
+        return value, best_move
+
+    def solve(self, empty_mask, time_budget_ms=None):
+        """
+            This method solves a position, finding out if the player to move can force a win and with which move.
+
+        :param empty_mask: Integer
+        :param time_budget_ms: The maximum number of milliseconds the search may take, or None for no limit.
+        :raises SearchTimeout: Exception raised if the position could not be solved in time.
+        :return: Tuple (value, cell), where value is 1 for a win and -1 for a loss and cell is the best move, or None if there are no moves.
+        """
+        start = time.perf_counter()
+        self._nodes = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._time_budget_ms = time_budget_ms
+        self._deadline = None if time_budget_ms is None else start + time_budget_ms / 1000
+
+        try:
+            if empty_mask == 0:
+                return -1, None
+
+            return self._solve_position(empty_mask)
+        finally:
+            self._deadline = None
+            self._elapsed_ms = (time.perf_counter() - start) * 1000
+
+    def search_root(self, empty_mask, moves, depth):
+        """
+            This method looks a number of moves ahead from a position, trying its moves in the given order. The best move found so far is
+        kept in the solver, so it is not lost if the deadline passes before all the moves are tried.
+
+        :param empty_mask: Integer
+        :param moves: List of cells, the valid moves of the position.
+        :param depth: Integer, the number of moves to look ahead.
+        :raises SearchTimeout: Exception raised if the deadline of the search has passed.
+        :return: Tuple (value, cell), where value is 1 for a win, -1 for a loss and 0 if the result is not known after depth moves.
+        """
+        self._root_best = None
+        self._root_moves_searched = 0
+        alpha = -1
+        for cell in moves:
+            if self.check_if_stopped():
+                raise SearchTimeout
+
+            value = -self.negamax(self.play(empty_mask, cell), -1, -alpha, 0, depth - 1)
+            self._root_moves_searched += 1
+            if self._root_best is None or value > self._root_best[0]:
+                self._root_best = (value, cell)
+
+            # A win can't be improved on, and the other moves only have to be searched for a win.
+            alpha = max(alpha, value)
+            if alpha >= 1:
+                break
+
+        return self._root_best
+
+    def search_window(self, empty_mask, time_budget_ms, depth, beta=1):
+        """
+            This method looks a number of moves ahead from a position within a time budget, without iterative deepening. With a beta below
+        1, the search only finds out if the value of the position is below it, which prunes much more of it: the value returned is then
+        exact if it is below beta, and at least beta otherwise.
+
+        :param empty_mask: Integer
+        :param time_budget_ms: The maximum number of milliseconds the search may take.
+        :param depth: Integer, the number of moves to look ahead.
+        :param beta: Integer, the value above which the exact value of the position is not needed.
+        :raises SearchTimeout: Exception raised if the deadline of the search has passed or the search was cancelled.
+        :return: Integer (1, 0 or -1), as returned by the negamax method.
+        """
+        start = time.perf_counter()
+        self._nodes = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._time_budget_ms = time_budget_ms
+        self._deadline = start + time_budget_ms / 1000
+
+        try:
+            return self.negamax(empty_mask, -1, beta, 0, depth)
+        finally:
+            self._deadline = None
+            self._elapsed_ms = (time.perf_counter() - start) * 1000
+
+    def search(self, empty_mask, time_budget_ms, max_depth=None):
+        """
+            This method searches a position with iterative deepening: it looks one move ahead, then two, and so on, until the result of
+        the game is known or the time budget is spent. Every iteration starts with the best move of the previous one, so a move is always
+        ready, and the search returns within the budget whatever the size of the board.
+            Before the first iteration is complete, the best move is the one leaving the fewest empty positions.
+
+        :param empty_mask: Integer
+        :param time_budget_ms: The maximum number of milliseconds the search may take.
+        :param max_depth: The maximum number of moves to look ahead, or None for no limit.
+        :return: Tuple (value, cell), where value is 1 for a win, -1 for a loss and 0 if the result is not known, and cell is the best move,
+        or None if there are no moves.
+        """
+        start = time.perf_counter()
+        self._nodes = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._depth = 0
+        self._time_budget_ms = time_budget_ms
+        self._deadline = start + time_budget_ms / 1000
+
+        try:
+            if empty_mask == 0:
+                return -1, None
+
+            searched_mask, nim_heap = self.split_position(empty_mask)
+            if searched_mask == 0:
+                # Only small regions are left, so the position is solved straight away from their Grundy values.
+                self._deadline = None
+                return self._solve_position(empty_mask)
+
+            moves = self.ordered_moves(empty_mask)
+            best_value, best_move = 0, moves[0]
+
+            depth = 1
+            while max_depth is None or depth <= max_depth:
+                try:
+                    best_value, best_move = self.search_root(empty_mask, moves, depth)
+                except SearchTimeout:
+                    # The moves tried in the unfinished iteration were searched deeper, but the rest of them may be better, so its best move
+                    # is only kept if it is not known to lose. Otherwise the first move which was not tried yet is as good a guess as any.
+                    if self._root_best is not None and self._root_best[0] >= 0:
+                        best_value, best_move = self._root_best
+                    elif self._root_best is not None and self._root_moves_searched < len(moves):
+                        best_move = moves[self._root_moves_searched]
+                    break
+
+                self._depth = depth
+                if best_value != 0:
+                    break
+
+                moves.remove(best_move)
+                moves.insert(0, best_move)
+                depth += 1
+
+            return best_value, best_move
+        finally:
+            self._deadline = None
+            self._elapsed_ms = (time.perf_counter() - start) * 1000
+
+    def close(self):
+        """
+            This method releases the resources of the solver. The search runs in the calling process, so there is nothing to stop.
+        """
+        pass
+
+
+class SolverAI(AI):
+    # The endgame tablebase is consulted once fewer positions than this are empty.
+    ENDGAME_THRESHOLD = 16
+
+    def __init__(self, board_service, time_budget_ms=1000, opening_book=None, tablebase=None, cancel_event=None, workers=1,
+                 position_cache=None, position_store=None):
+        super().__init__(board_service)
+        self._time_budget_ms = time_budget_ms
+        self._opening_book = opening_book
+        self._tablebase = tablebase
+        self._position_cache = position_cache
+        self._position_store = position_store
+        self._cancel_event = cancel_event
+
+        if workers > 1:
+            # The module of the parallel solver imports this one, so it is only imported when it is needed.
+            from ai.parallel_solver import ParallelSolver
+            self._solver = ParallelSolver(board_service.get_board_size(), workers, tablebase, cancel_event)
+        else:
+            self._solver = Solver(board_service.get_board_size(), GrundyCache(tablebase), cancel_event)
+
+        # What the last turn searched, for the instrumentation.
+        self._searched = False
+        self._grundy_counts = (0, 0)
+
+        # The positions searched while pondering, with their results and the milliseconds spent on them, or None if the player did not
+        # ponder since its last turn. What the pondering did for the last turn is 'hit', 'partial' or 'miss', or None if the turn did not
+        # need a search, and the counters add up all the turns.
+        self._pondered = None
+        self._last_ponder = None
+        self._ponder_counts = {'hit': 0, 'partial': 0, 'miss': 0}
+
+    @property
+    def time_budget_ms(self):
+        return self._time_budget_ms
+
+    @property
+    def position_cache(self):
+        return self._position_cache
+
+    @property
+    def position_store(self):
+        return self._position_store
+
+    @property
+    def last_ponder(self):
+        return self._last_ponder
+
+    @property
+    def ponder_counts(self):
+        """
+            The number of turns whose position was searched for a whole turn while pondering ('hit'), for part of a turn ('partial') or
+        not at all ('miss'), counting only the turns which needed a search.
+        """
+        return dict(self._ponder_counts)
+
+    @property
+    def solver(self):
+        """
+            The solver searching the positions, which also reports the depth, the number of positions and the time of its last search.
+        """
+        return self._solver
+
+    def close(self):
+        """
+            This method stops the worker processes of the solver, if it has any.
+        """
+        self._solver.close()
+
+    def collect_turn_stats(self, stats):
+        """
+            This method adds to the counters of a turn the ones of the search, if the turn searched the position.
+
+        :param stats: TurnStats
+        """
+        stats.ponder = self._last_ponder
+        if not self._searched:
+            return
+
+        stats.nodes = self._solver.nodes
+        stats.depth = self._solver.depth
+        stats.time_budget_ms = self._solver.time_budget_ms
+        stats.cache_hits = self._solver.cache_hits
+        stats.cache_misses = self._solver.cache_misses
+
+        grundy_hits, grundy_misses = self._grundy_counts
+        stats.grundy_hits = self._solver.grundy_cache.hits - grundy_hits
+        stats.grundy_misses = self._solver.grundy_cache.misses - grundy_misses
+
+    def look_up(self, empty_mask):
+        """
+            This method looks for the result of a position in the opening book, in the endgame tablebase near the end of the game, in the
+        position cache and in the position store, the ones the player has, in this order.
+
+        :param empty_mask: Integer
+        :return: Tuple (value, cell) as returned by Solver.solve, or None if the result is not known.
+        """
+        result = None
+        if self._opening_book is not None:
+            self.start_phase('opening_book')
+            result = self._opening_book.lookup(empty_mask)
+
+        if result is None and self._tablebase is not None and empty_mask.bit_count() < SolverAI.ENDGAME_THRESHOLD:
+            self.start_phase('tablebase')
+            result = self._tablebase.lookup(empty_mask, self._solver.size)
+
+        if result is None and self._position_cache is not None:
+            self.start_phase('position_cache')
+            result = self._position_cache.lookup(empty_mask, self._solver.size)
+
+        if result is None and self._position_store is not None:
+            self.start_phase('position_store')
+            result = self._position_store.lookup(empty_mask)
+
+        return result
+
+    def remember_result(self, empty_mask, result):
+        """
+            This method adds the result of a search to the position cache and to the position store, if the player has them and the
+        result is known for sure.
+
+        :param empty_mask: Integer
+        :param result: Tuple (value, cell) as returned by Solver.search.
+        """
+        if self._position_cache is not None:
+            self._position_cache.store(empty_mask, self._solver.size, *result)
+        if self._position_store is not None:
+            self._position_store.store(empty_mask, *result)
+
+    def ponder(self, max_ms=None):
+        """
+            This method thinks ahead while the user is thinking: it searches the positions after the moves the user is the most likely to
+        make, the best ones first, each of them for the time budget of a turn. The positions solved are remembered like the ones of the
+        turns, and the transposition table keeps what was found about the others, so when the user moves, the answer is ready, or its search
+        starts from where the pondering left it.
+            It returns once all the moves are searched, the time is up or the pondering is cancelled through the cancel event of the player.
+        It can be started again for the same position, and goes on with the moves which were not searched yet.
+
+        :param max_ms: Integer, the maximum number of milliseconds spent pondering, or None for no limit.
+        :return: Integer, the number of positions searched.
+        """
+        empty_mask = self._board_service.get_empty_mask()
+        deadline = None if max_ms is None else time.perf_counter() + max_ms / 1000
+        if self._pondered is None:
+            self._pondered = {}
+
+        searched = 0
+        for cell in self._solver.ordered_moves(empty_mask):
+            if self._cancel_event is not None and self._cancel_event.is_set():
+                break
+
+            time_budget_ms = self._time_budget_ms
+            if deadline is not None:
+                time_budget_ms = min(time_budget_ms, (deadline - time.perf_counter()) * 1000)
+                if time_budget_ms <= 0:
+                    break
+
+            # The positions ending the game, and the ones whose result is known anyway, are not worth searching.
+            reply_mask = self._solver.play(empty_mask, cell)
+            previous = self._pondered.get(reply_mask)
+            if reply_mask == 0 or (previous is not None and (previous[0] != 0 or previous[2] >= self._time_budget_ms)):
+                continue
+            if previous is None and self.look_up(reply_mask) is not None:
+                continue
+
+            value, best_cell = self._solver.search(reply_mask, time_budget_ms)
+            searched_ms = self._solver.elapsed_ms + (0 if previous is None else previous[2])
+            self._pondered[reply_mask] = (value, best_cell, searched_ms)
+            self.remember_result(reply_mask, (value, best_cell))
+            searched += 1
+
+        return searched
+
+    def choose_move(self, first_move=False):
+        """
+            This method chooses the computer move by searching the game from the current position for as long as the time budget allows,
+        unless the position is in the opening book or, near the end of the game, it can be answered by the endgame tablebase. The positions
+        solved by the search are remembered in the position cache and in the position store, if the player has them, so they are not
+        searched again in the next games, or by the other processes sharing the store. If there is a winning move, it is returned.
+            If the position was searched while pondering, the result found then is used, or the search only takes the rest of the time
+        budget.
+            If the result of the game is still unknown when the time is up, the best move found by the search is returned. If the position
+        is lost against perfect play, the move is chosen by the heuristic of the AI class, which gives the user the most chances to go wrong.
+
+        :param first_move: True, if this is the first move of the computer in the game.
+        :return: Tuple (row, col)
+        """
+        empty_mask = self._board_service.get_empty_mask()
+        self._searched = False
+
+        # The positions searched while pondering are only useful for this turn.
+        pondered, self._pondered = self._pondered, None
+        ponder_result = None if pondered is None else pondered.get(empty_mask)
+
+        result = self.look_up(empty_mask)
+
+        time_budget_ms = self._time_budget_ms
+        if result is None and ponder_result is not None:
+            self.start_phase('ponder')
+            value, cell, searched_ms = ponder_result
+            if value != 0 or searched_ms >= time_budget_ms:
+                result = (value, cell)
+            else:
+                # The transposition table keeps what the pondering found, so the search goes on from there.
+                time_budget_ms -= searched_ms
+
+        if result is None:
+            self.start_phase('search')
+            grundy_cache = self._solver.grundy_cache
+            self._grundy_counts = (grundy_cache.hits, grundy_cache.misses)
+            result = self._solver.search(empty_mask, time_budget_ms)
+            self._searched = True
+            self.remember_result(empty_mask, result)
+
+        self._last_ponder = None
+        if ponder_result is not None:
+            self._last_ponder = 'partial' if self._searched else 'hit'
+        elif pondered is not None and self._searched:
+            self._last_ponder = 'miss'
+        if self._last_ponder is not None:
+            self._ponder_counts[self._last_ponder] += 1
+
+        value, cell = result
+        if value >= 0:
+            return divmod(cell, self._solver.size)
+
+        return super().choose_move(first_move)
@@ -0,0 +1,166 @@
+class Symmetry:
+    # The 8 rotations and reflections of a square board, as functions mapping (row, col) to the new position.
+    TRANSFORMS = (
+        lambda row, col, last: (row, col),
+        lambda row, col, last: (col, last - row),
+        lambda row, col, last: (last - row, last - col),
+        lambda row, col, last: (last - col, row),
+        lambda row, col, last: (row, last - col),
+        lambda row, col, last: (last - row, col),
+        lambda row, col, last: (col, row),
+        lambda row, col, last: (last - col, last - row),
+    )
+
+    # Masks are transformed 12 bits at a time, using a lookup table for every transform and every group of 12 cells. On large boards
+    # that would take too much memory, so groups of 8 cells are used instead.
+    CHUNK_BITS = 12
+    LARGE_BOARD_CHUNK_BITS = 8
+    LARGE_BOARD_MIN_CELLS = 100
+
+    # Above this many cells even those tables would take hundreds of megabytes, so no tables are built and the masks are left as they
+    # are: every position is its own canonical one.
+    MAX_TABLE_CELLS = 400
+
+    # The tables only depend on the size of the board, so the instances are shared.
+    _instances = {}
+
+    @classmethod
+    def for_size(cls, board_size):
+        """
+            This method returns the shared Symmetry instance for a given board size, creating it the first time it is requested.
+
+        :param board_size: Integer
+        :return: Symmetry
+        """
+        if board_size not in cls._instances:
+            cls._instances[board_size] = cls(board_size)
+
+        return cls._instances[board_size]
+
+    def __init__(self, board_size):
+        self._size = board_size
+
+        num_cells = board_size * board_size
+        last = board_size - 1
+
+        self._chunk_bits = Symmetry.CHUNK_BITS if num_cells < Symmetry.LARGE_BOARD_MIN_CELLS else Symmetry.LARGE_BOARD_CHUNK_BITS
+        self._chunk_mask = (1 << self._chunk_bits) - 1
+
+        # For every transform, the cell each cell is moved to, and the transform which reverts it.
+        self._cell_maps = []
+        for transform in Symmetry.TRANSFORMS:
+            cell_map = []
+            for cell in range(num_cells):
+                row, col = transform(*divmod(cell, board_size), last)
+                cell_map.append(row * board_size + col)
+            self._cell_maps.append(tuple(cell_map))
+
+        identity = tuple(range(num_cells))
+        self._inverses = []
+        for cell_map in self._cell_maps:
+            for index, other_map in enumerate(self._cell_maps):
+                if tuple(other_map[cell] for cell in cell_map) == identity:
+                    self._inverses.append(index)
+                    break
+
+        self._chunk_tables = None
+        if num_cells <= Symmetry.MAX_TABLE_CELLS:
+            self._chunk_tables = [self._create_chunk_tables(cell_map) for cell_map in self._cell_maps]
+
+    def _create_chunk_tables(self, cell_map):
+        """
+            This method creates the lookup tables of a transform. Table k maps every value of the k-th group of bits of a mask to the
+        mask of the cells those bits are moved to.
+
+        :param cell_map: Tuple, the cell each cell is moved to.
+        :return: List of tuples of integers
+        """
+        tables = []
+        for first_cell in range(0, len(cell_map), self._chunk_bits):
+            cells = cell_map[first_cell:first_cell + self._chunk_bits]
+            table = [0]
+            # Every value is the value without its highest bit, plus the cell of that bit.
+            for bit, cell in enumerate(cells):
+                table.extend(mask | (1 << cell) for mask in table[:1 << bit])
+            tables.append(tuple(table))
+
+        return tables
+
+    @property
+    def size(self):
+        return self._size
+
+    def transform_mask(self, mask, transform):
+        """
+            This method applies one of the 8 symmetries of the board to a mask of cells.
+
+        :param mask: Integer, the bitmask of the cells.
+        :param transform: Integer, the index of the symmetry (0 to 7).
+        :return: Integer
+        """
+        result = 0
+        if self._chunk_tables is None:
+            cell_map = self._cell_maps[transform]
+            while mask:
+                lowest_bit = mask & -mask
+                result |= 1 << cell_map[lowest_bit.bit_length() - 1]
+                mask ^= lowest_bit
+
+            return result
+
+        for table in self._chunk_tables[transform]:
+            result |= table[mask & self._chunk_mask]
+            mask >>= self._chunk_bits
+
+        return result
+
+    def transform_cell(self, cell, transform):
+        """
+            This method returns the cell a given cell is moved to by one of the symmetries of the board.
+
+        :param cell: Integer, row * size + col
+        :param transform: Integer, the index of the symmetry (0 to 7).
+        :return: Integer
+        """
+        return self._cell_maps[transform][cell]
+
+    def revert_cell(self, cell, transform):
+        """
+            This method returns the cell which is moved to a given cell by one of the symmetries of the board. It is used to bring back a
+        move found for a canonical position to the position it came from.
+
+        :param cell: Integer, row * size + col
+        :param transform: Integer, the index of the symmetry (0 to 7).
+        :return: Integer
+        """
+        return self._cell_maps[self._inverses[transform]][cell]
+
+    def canonicalise(self, mask):
+        """
+            This method finds the representative of all the masks which are symmetric to a given one, which is the smallest of them.
+
+        :param mask: Integer, the bitmask of the cells.
+        :return: Tuple (canonical mask, index of the symmetry which transforms the given mask into the canonical one)
+        """
+        if self._chunk_tables is None:
+            return mask, 0
+
+        # The mask is split into chunks only once, and then every transform looks them up in its own tables.
+        chunks = []
+        while mask:
+            chunks.append(mask & self._chunk_mask)
+            mask >>= self._chunk_bits
+
+        canonical_mask = None
+        canonical_transform = 0
+
+        for transform, tables in enumerate(self._chunk_tables):
+            transformed_mask = 0
+            for table, chunk in zip(tables, chunks):
+                transformed_mask |= table[chunk]
+
+            if canonical_mask is None or transformed_mask < canonical_mask:
+                canonical_mask = transformed_mask
+                canonical_transform = transform
+
+        return canonical_mask, canonical_transform
@@ -0,0 +1,276 @@
+from ai.regions import split_regions, split_cells, mask_to_cells, canonical_shape, shape_cells, remove_neighbourhood
+from board.bit_board import BitBoard
+from config.definitions import ROOT_DIR
+import argparse
+import os
+import struct
+
+
+class TablebaseException(Exception):
+    pass
+
+
+# Every region is a game of its own, and by the Sprague-Grundy theorem a set of regions is lost for the player to move exactly when the
+# XOR of the Grundy values of the regions is 0. So the tablebase stores the Grundy value of every region shape of up to a number of
+# cells, and any position whose regions are all that small is answered without searching.
+#
+# The shapes with k cells are stored in the file layer_<k>.bin, as records of (height, width, mask, Grundy value). A region with k cells
+# only leads to smaller regions, so the layers are generated in increasing order, each from the ones before it. Every layer is written
+# as soon as it is complete, so an interrupted generation resumes from the first missing layer.
+RECORD_FORMAT = '<BBQB'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# The bounding box of a region with k connected cells is at most k x k, and the masks are stored on 64 bits.
+MAX_TABLEBASE_CELLS = 8
+
+
+def compute_grundy(cells, grundy_values):
+    """
+        This function computes the Grundy value of a region, which is the smallest value not reached by any of its moves. The value of a
+    move is the XOR of the Grundy values of the regions it leaves, which must all be in the given table.
+
+    :param cells: List of tuples (row, col), the cells of a connected region.
+    :param grundy_values: Dictionary having as keys shapes and as values their Grundy values.
+    :return: Integer
+    """
+    reachable = set()
+    for row, col in cells:
+        value = 0
+        for region in split_cells(remove_neighbourhood(cells, row, col)):
+            value ^= grundy_values[canonical_shape(region)]
+        reachable.add(value)
+
+    grundy = 0
+    while grundy in reachable:
+        grundy += 1
+
+    return grundy
+
+
+def layer_path(directory, num_cells):
+    return os.path.join(directory, f"layer_{num_cells}.bin")
+
+
+def read_layer(path):
+    """
+        This function reads a layer file of the tablebase.
+
+    :param path: String
+    :return: Dictionary having as keys shapes and as values their Grundy values.
+    """
+    grundy_values = {}
+    with open(path, 'rb') as layer_file:
+        data = layer_file.read()
+
+    if len(data) % RECORD_SIZE != 0:
+        raise TablebaseException(f"The tablebase layer {path} is corrupted.")
+
+    for height, width, mask, grundy in struct.iter_unpack(RECORD_FORMAT, data):
+        grundy_values[(height, width, mask)] = grundy
+
+    return grundy_values
+
+
+def write_layer(path, grundy_values):
+    """
+        This function writes a layer file of the tablebase. The file is written under a temporary name and renamed once complete, so a
+    layer file is never left half written.
+
+    :param path: String
+    :param grundy_values: Dictionary having as keys shapes and as values their Grundy values.
+    """
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as layer_file:
+        for (height, width, mask), grundy in sorted(grundy_values.items()):
+            layer_file.write(struct.pack(RECORD_FORMAT, height, width, mask, grundy))
+
+    os.replace(temporary_path, path)
+
+
+def extend_shapes(shapes):
+    """
+        This function returns all the shapes obtained by adding a neighbouring cell to one of the given shapes. Every connected region has
+    a cell which can be removed without disconnecting it, so extending all the shapes with k cells gives all the shapes with k + 1 cells.
+
+    :param shapes: Iterable of shapes
+    :return: Set of shapes
+    """
+    extended = set()
+    for shape in shapes:
+        cells = set(shape_cells(shape))
+        neighbours = set()
+        for row, col in cells:
+            for i in range(row - 1, row + 2):
+                for j in range(col - 1, col + 2):
+                    neighbours.add((i, j))
+
+        for cell in neighbours - cells:
+            extended.add(canonical_shape(list(cells) + [cell]))
+
+    return extended
+
+
+_worker_grundy_values = None
+
+
+def _initialise_worker(grundy_values):
+    global _worker_grundy_values
+    _worker_grundy_values = grundy_values
+
+
+def _compute_chunk(shapes):
+    return [(shape, compute_grundy(shape_cells(shape), _worker_grundy_values)) for shape in shapes]
+
+
+def generate_tablebase(max_cells, directory, workers=1):
+    """
+        This function generates the tablebase layers up to a given number of cells, skipping the layers which already exist. The shapes of
+    a layer are split between several processes.
+
+    :param max_cells: Integer
+    :param directory: String, the directory of the layer files.
+    :param workers: Integer, the number of processes.
+    :return: Integer, the number of shapes in the tablebase.
+    """
+    if max_cells > MAX_TABLEBASE_CELLS:
+        raise TablebaseException(f"The tablebase is limited to regions of at most {MAX_TABLEBASE_CELLS} cells.")
+
+    os.makedirs(directory, exist_ok=True)
+
+    grundy_values = {}
+    shapes = {canonical_shape([(0, 0)])}
+
+    for num_cells in range(1, max_cells + 1):
+        path = layer_path(directory, num_cells)
+
+        if os.path.exists(path):
+            layer = read_layer(path)
+        else:
+            if workers > 1:
+                # The processes are only needed to generate the tablebase, so playing does not wait for their module to be imported.
+                from concurrent.futures import ProcessPoolExecutor
+
+                ordered_shapes = sorted(shapes)
+                chunks = [ordered_shapes[index::workers * 4] for index in range(workers * 4)]
+                with ProcessPoolExecutor(workers, initializer=_initialise_worker, initargs=(grundy_values,)) as executor:
+                    layer = dict(pair for chunk in executor.map(_compute_chunk, chunks) for pair in chunk)
+            else:
+                layer = {shape: compute_grundy(shape_cells(shape), grundy_values) for shape in shapes}
+
+            write_layer(path, layer)
+
+        grundy_values.update(layer)
+        shapes = extend_shapes(layer)
+
+    return len(grundy_values)
+
+
+class EndgameTablebase:
+    def __init__(self, grundy_values, max_cells):
+        self._grundy_values = grundy_values
+        self._max_cells = max_cells
+
+    @staticmethod
+    def default_directory():
+        return os.path.join(ROOT_DIR, "assets/tablebase")
+
+    @staticmethod
+    def load(directory=None):
+        """
+            This method loads the consecutive layers of the tablebase found in a directory, starting from the one with 1 cell.
+
+        :param directory: String, or None for the default directory.
+        :return: EndgameTablebase, or None if there are no layers.
+        """
+        if directory is None:
+            directory = EndgameTablebase.default_directory()
+
+        grundy_values = {}
+        max_cells = 0
+        while max_cells < MAX_TABLEBASE_CELLS and os.path.exists(layer_path(directory, max_cells + 1)):
+            try:
+                grundy_values.update(read_layer(layer_path(directory, max_cells + 1)))
+            except (OSError, TablebaseException):
+                break
+            max_cells += 1
+
+        if max_cells == 0:
+            return None
+
+        return EndgameTablebase(grundy_values, max_cells)
+
+    @property
+    def max_cells(self):
+        """
+            The number of cells of the largest regions in the tablebase.
+        """
+        return self._max_cells
+
+    def grundy(self, cells):
+        """
+            This method returns the Grundy value of a region.
+
+        :param cells: List of tuples (row, col), the cells of a connected region.
+        :return: Integer, or None if the region is too large for the tablebase.
+        """
+        if len(cells) > self._max_cells:
+            return None
+
+        return self._grundy_values.get(canonical_shape(cells))
+
+    def lookup(self, empty_mask, board_size):
+        """
+            This method answers a position from the tablebase, if all of its regions are small enough.
+
+        :param empty_mask: Integer, the bitmask of the empty positions.
+        :param board_size: Integer
+        :return: Tuple (value, cell) as returned by Solver.solve, or None if the position can not be answered.
+        """
+        if empty_mask == 0:
+            return -1, None
+
+        regions = [mask_to_cells(region, board_size) for region in split_regions(empty_mask, BitBoard.get_neighbourhood_masks(board_size))]
+
+        region_values = []
+        for cells in regions:
+            grundy = self.grundy(cells)
+            if grundy is None:
+                return None
+            region_values.append(grundy)
+
+        total = 0
+        for grundy in region_values:
+            total ^= grundy
+
+        if total == 0:
+            row, col = regions[0][0]
+            return -1, row * board_size + col
+
+        # A winning move changes the value of one of the regions so that the XOR of all of them becomes 0.
+        for cells, grundy in zip(regions, region_values):
+            target = grundy ^ total
+            if target >= grundy:
+                continue
+
+            for row, col in cells:
+                value = 0
+                for region in split_cells(remove_neighbourhood(cells, row, col)):
+                    value ^= self._grundy_values[canonical_shape(region)]
+
+                if value == target:
+                    return 1, row * board_size + col
+
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the endgame tablebase for the Obstruction computer player.")
+    parser.add_argument('--max-cells', type=int, default=7, help="the number of cells of the largest regions")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="the number of processes")
+    parser.add_argument('--output', default=None, help="the directory of the layer files")
+    arguments = parser.parse_args()
+
+    output = arguments.output if arguments.output is not None else EndgameTablebase.default_directory()
+    count = generate_tablebase(arguments.max_cells, output, arguments.workers)
+
+    print(f"The tablebase in {output} has {count} shapes")
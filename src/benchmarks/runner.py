@@ -0,0 +1,268 @@
+from ai.ai import AI
+from ai.solver import SolverAI
+from ai.numpy_scoring import NumpyScorer
+from board.board import Board
+from board.bit_board import BitBoard
+from service.board_service import BoardService
+from config.definitions import ROOT_DIR
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+
+# Every benchmark runs on positions reached by random moves from the empty board, with a fixed seed, at several board sizes and
+# several phases of the game. A phase is the fraction of the positions of the board which are still empty.
+SEED = 2024
+SIZES = (6, 10, 20)
+PHASES = {'opening': 1.0, 'middlegame': 0.5, 'endgame': 0.2}
+ENGINES = {'board': Board, 'bit_board': BitBoard}
+
+# The search is only benchmarked on the boards it solves, so its time does not just measure its budget.
+SEARCH_MAX_SIZE = 6
+SEARCH_TIME_BUDGET_MS = 1000
+
+# Every benchmark is repeated this many times, each time running it long enough to be timed accurately, and the fastest time is kept.
+REPEAT = 5
+MIN_ROUND_TIME = 0.05
+
+# A benchmark is a regression if it is slower than its baseline by more than this fraction.
+DEFAULT_THRESHOLD = 0.25
+
+
+def default_baseline_path():
+    return os.path.join(ROOT_DIR, "benchmarks/baseline.json")
+
+
+def create_position(board_size, phase, seed=SEED):
+    """
+        This function plays random moves from the empty board until the phase of the game is reached.
+
+    :param board_size: Integer
+    :param phase: String, one of PHASES.
+    :param seed: Integer
+    :return: Matrix (N x N), the symbols of the board.
+    """
+    generator = random.Random(f"{seed}-{board_size}-{phase}")
+    board = BitBoard(board_size)
+    symbols = ['X', 'O']
+
+    while len(board.get_empty_positions()) > PHASES[phase] * board_size * board_size:
+        row, col = generator.choice(board.get_empty_positions())
+        board.make_move(row, col, symbols[0])
+        symbols.reverse()
+
+    return board.board
+
+
+def measure(function, repeat=REPEAT, min_round_time=MIN_ROUND_TIME):
+    """
+        This function measures how long a function takes. The number of calls of a round is doubled until the round takes long enough, and
+    the fastest of the rounds is kept, since the slower ones were only disturbed by other work of the machine.
+
+    :param function: Function without parameters.
+    :param repeat: Integer, the number of rounds.
+    :param min_round_time: Float, the minimum number of seconds of a round.
+    :return: Tuple (seconds per call, calls per round)
+    """
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for call in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_time:
+            break
+        calls *= 2
+
+    best = elapsed
+    for round in range(repeat - 1):
+        start = time.perf_counter()
+        for call in range(calls):
+            function()
+        best = min(best, time.perf_counter() - start)
+
+    return best / calls, calls
+
+
+def create_benchmarks(board_size, phase):
+    """
+        This function creates the benchmarks of a position: the board operations and the computer turns, for every board engine.
+
+    :param board_size: Integer
+    :param phase: String, one of PHASES.
+    :return: Dictionary having as keys the names of the benchmarks and as values functions without parameters.
+    """
+    position = create_position(board_size, phase)
+    benchmarks = {}
+
+    for engine_name, engine in ENGINES.items():
+        board = engine(board_size)
+        board.board = copy.deepcopy(position)
+        board_service = BoardService(board)
+        computer_player = AI(board_service)
+        row, col = board.get_empty_positions()[len(board.get_empty_positions()) // 2]
+
+        def push_pop_move(board=board, row=row, col=col):
+            board.push_move(row, col, 'X')
+            board.pop_move()
+
+        def greedy_turn(computer_player=computer_player):
+            # The heuristic breaks ties at random, so it is seeded to look at the same moves every time.
+            random.seed(SEED)
+            computer_player.choose_move()
+
+        def score_moves_loop(board_service=board_service):
+            # The scores counted position by position, looking at the 3 x 3 window around every empty position through the board service,
+            # which is what the vectorised scoring is measured against.
+            scores = {}
+            for row, col in board_service.get_empty_positions():
+                count = 0
+                for i in range(row - 1, row + 2):
+                    for j in range(col - 1, col + 2):
+                        if (i != row or j != col) and board_service.check_if_position_is_in_board(i, j) and board_service.get_symbol(i, j) == ' ':
+                            count += 1
+                scores[(row, col)] = count
+            return scores
+
+        name = f"{engine_name}.{{}}[{board_size}x{board_size},{phase}]"
+        benchmarks[name.format('push_pop_move')] = push_pop_move
+        benchmarks[name.format('check_full_board')] = board.check_full_board
+        benchmarks[name.format('search_valid_positions')] = computer_player.search_valid_positions
+        benchmarks[name.format('score_moves_loop')] = score_moves_loop
+        benchmarks[name.format('top_moves')] = board.get_top_moves
+        benchmarks[name.format('greedy_turn')] = greedy_turn
+
+        if engine is BitBoard and board_size <= SEARCH_MAX_SIZE:
+            # A new player every time, so the positions solved before are not remembered.
+            benchmarks[name.format('search_turn')] = lambda board_service=board_service: SolverAI(board_service, SEARCH_TIME_BUDGET_MS).choose_move()
+
+    if NumpyScorer.available():
+        # The scorer only needs the empty positions, so it is measured on a single board.
+        board = BitBoard(board_size)
+        board.board = copy.deepcopy(position)
+        board_service = BoardService(board)
+        scorer = NumpyScorer(board_size)
+        numpy_player = AI(board_service, scoring='numpy')
+
+        def numpy_greedy_turn(computer_player=numpy_player):
+            random.seed(SEED)
+            computer_player.choose_move()
+
+        name = f"numpy.{{}}[{board_size}x{board_size},{phase}]"
+        benchmarks[name.format('score_moves')] = lambda board=board, scorer=scorer: scorer.scores(scorer.empty_array(board.empty_mask))
+        benchmarks[name.format('top_moves')] = lambda board=board, scorer=scorer: scorer.get_top_moves(board.empty_mask)
+        benchmarks[name.format('greedy_turn')] = numpy_greedy_turn
+
+    return benchmarks
+
+
+def run_benchmarks(sizes=SIZES, phases=tuple(PHASES), name_filter=None, repeat=REPEAT, min_round_time=MIN_ROUND_TIME):
+    """
+        This function runs the benchmarks of all the positions.
+
+    :param sizes: Iterable of board sizes.
+    :param phases: Iterable of phases.
+    :param name_filter: String, only the benchmarks whose names contain it are run, or None for all of them.
+    :param repeat: Integer, the number of rounds of every benchmark.
+    :param min_round_time: Float, the minimum number of seconds of a round.
+    :return: Dictionary having as keys the names of the benchmarks and as values dictionaries with the seconds per call and the calls
+    per round.
+    """
+    results = {}
+    for board_size in sizes:
+        for phase in phases:
+            for name, function in create_benchmarks(board_size, phase).items():
+                if name_filter is not None and name_filter not in name:
+                    continue
+
+                seconds, calls = measure(function, repeat, min_round_time)
+                results[name] = {'seconds_per_call': seconds, 'calls': calls}
+
+    return results
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+        This function compares the results of the benchmarks with the ones of a baseline.
+
+    :param results: Dictionary, as returned by run_benchmarks.
+    :param baseline: Dictionary, as returned by run_benchmarks.
+    :param threshold: Float, the fraction by which a benchmark must be slower than its baseline to be a regression.
+    :return: Dictionary having as keys the names of the benchmarks in both and as values tuples (ratio of the time to the one of the
+    baseline, True if it is a regression).
+    """
+    comparison = {}
+    for name, result in results.items():
+        if name in baseline:
+            ratio = result['seconds_per_call'] / baseline[name]['seconds_per_call']
+            comparison[name] = (ratio, ratio > 1 + threshold)
+
+    return comparison
+
+
+def write_report(results, path):
+    """
+        This function writes the results of the benchmarks to a JSON file, together with the machine they were run on.
+
+    :param results: Dictionary, as returned by run_benchmarks.
+    :param path: String
+    """
+    report = {
+        'python': sys.version.split()[0],
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'benchmarks': results,
+    }
+    with open(path, 'w') as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+
+
+def read_report(path):
+    """
+        This function reads the results of the benchmarks from a JSON file written by write_report.
+
+    :param path: String
+    :return: Dictionary, as returned by run_benchmarks.
+    """
+    with open(path) as report_file:
+        return json.load(report_file)['benchmarks']
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the board operations and the computer turns of Obstruction.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help="the sizes of the boards")
+    parser.add_argument('--filter', default=None, help="only run the benchmarks whose names contain this text")
+    parser.add_argument('--output', default=None, help="the JSON file of the results")
+    parser.add_argument('--baseline', default=default_baseline_path(), help="the JSON file of the results to compare with")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="the slowdown, as a fraction, reported as a regression")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results as the new baseline")
+    arguments = parser.parse_args()
+
+    results = run_benchmarks(arguments.sizes, name_filter=arguments.filter)
+
+    baseline = {}
+    if not arguments.save_baseline and os.path.exists(arguments.baseline):
+        baseline = read_report(arguments.baseline)
+    comparison = compare_results(results, baseline, arguments.threshold)
+
+    for name, result in results.items():
+        line = f"{name:<60} {result['seconds_per_call'] * 1e6:>12.2f} us"
+        if name in comparison:
+            ratio, regression = comparison[name]
+            line += f"   {ratio:>5.2f}x baseline" + ("   REGRESSION" if regression else "")
+        print(line)
+
+    if arguments.output is not None:
+        write_report(results, arguments.output)
+    if arguments.save_baseline:
+        write_report(results, arguments.baseline)
+
+    regressions = [name for name, (ratio, regression) in comparison.items() if regression]
+    if regressions:
+        print(f"\n{len(regressions)} benchmarks are slower than the baseline by more than {arguments.threshold:.0%}")
+        sys.exit(1)
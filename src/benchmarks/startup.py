@@ -0,0 +1,169 @@
+from benchmarks.runner import write_report
+from config.definitions import ROOT_DIR
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# Every user interface is started in a new interpreter, the way main.py starts it, and timed until it is ready for the user: the main
+# menu and the console until their prompts, and the window until its first frame and until its sounds are loaded. The interpreter runs
+# with -X importtime, so the time spent importing modules is reported too.
+PREAMBLE = """
+import main
+from settings.settings import Settings
+config = Settings().read_file()
+position_cache = main.PositionCache.shared()
+if main.read_save_position_cache(config):
+    position_cache.load()
+"""
+
+# For every user interface, the code starting it, the input given to it and the texts it writes when it is ready, with their labels.
+STARTUPS = {
+    'menu': (
+        "import main\nmain.display_title()\nmain.read_choice()\n",
+        "0\n",
+        [('prompt', '>> ')],
+    ),
+    'console': (
+        PREAMBLE + "from ui.console_ui import ConsoleUI\nConsoleUI(None, {board_size}, {time_budget_ms}).start()\n",
+        "exit\n\n",
+        [('prompt', '>> ')],
+    ),
+    'graphical': (
+        PREAMBLE + "from ui.graphical_ui import GraphicalUI\nui = GraphicalUI(None, {board_size}, {time_budget_ms})\nui.show_menu()\n"
+                   "print('<first frame>', flush=True)\nui.sound_effects.start_loading()\nui.sound_effects.wait()\n"
+                   "print('<sounds loaded>', flush=True)\nui.computer_player.shutdown()\n",
+        "",
+        [('first_frame', '<first frame>'), ('sounds_loaded', '<sounds loaded>')],
+    ),
+}
+
+DEFAULT_REPEAT = 5
+NUM_SLOWEST_IMPORTS = 5
+
+
+def read_import_times(text):
+    """
+        This function reads the times written by -X importtime.
+
+    :param text: String, the standard error of the interpreter.
+    :return: Dictionary having as keys the modules imported directly by the code which was run and as values their seconds, including
+    the modules they imported.
+    """
+    import_times = {}
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+
+        # The modules imported by other modules are indented under them.
+        module = fields[2]
+        if not module.startswith('  '):
+            import_times[module.strip()] = int(fields[1]) / 1e6
+
+    return import_times
+
+
+def time_startup(code, stdin_text, markers, environment=None):
+    """
+        This function runs code in a new interpreter and times it until it writes every marker.
+
+    :param code: String, the Python code which is run, from the source directory.
+    :param stdin_text: String, the standard input of the interpreter.
+    :param markers: List of tuples (label, text), in the order the texts are written.
+    :param environment: Dictionary, the environment variables of the interpreter, or None for the ones of this process.
+    :raises RuntimeError: Exception raised if the interpreter exits before writing all the markers.
+    :return: Tuple (dictionary having as keys the labels and as values the seconds until their texts were written, dictionary as
+    returned by read_import_times)
+    """
+    # The import times are written to a file, since they are too many for a pipe which is only read at the end.
+    with tempfile.TemporaryFile() as stderr_file:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-u', '-X', 'importtime', '-c', code], cwd=ROOT_DIR, env=environment,
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr_file)
+        process.stdin.write(stdin_text.encode())
+        process.stdin.close()
+
+        times = {}
+        output = b''
+        for label, text in markers:
+            while text.encode() not in output:
+                chunk = os.read(process.stdout.fileno(), 4096)
+                if not chunk:
+                    break
+                output += chunk
+            else:
+                times[label] = time.perf_counter() - start
+                output = output[output.index(text.encode()) + len(text):]
+
+        process.stdout.read()
+        process.wait()
+
+        stderr_file.seek(0)
+        stderr_text = stderr_file.read().decode(errors='replace')
+
+    if len(times) != len(markers):
+        raise RuntimeError(f"The interpreter exited with code {process.returncode} before it was ready:\n{stderr_text}")
+
+    return times, read_import_times(stderr_text)
+
+
+def run_startup_benchmarks(names=tuple(STARTUPS), board_size=6, time_budget_ms=1000, repeat=DEFAULT_REPEAT, headless=False):
+    """
+        This function times the startup of the user interfaces. The first run of every one is not counted, so the modules are compiled
+    and read from the disk before the runs which are.
+
+    :param names: Iterable of keys of STARTUPS.
+    :param board_size: Integer
+    :param time_budget_ms: Integer
+    :param repeat: Integer, the number of runs of every user interface, the fastest of which is kept.
+    :param headless: True to show the window with the dummy drivers of SDL, for machines without a display.
+    :return: Dictionary having as keys the names of the user interfaces and as values dictionaries with the seconds until every marker
+    and the seconds spent importing the modules.
+    """
+    environment = dict(os.environ)
+    if headless:
+        environment.update(SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+
+    results = {}
+    for name in names:
+        code, stdin_text, markers = STARTUPS[name]
+        code = code.format(board_size=board_size, time_budget_ms=time_budget_ms)
+
+        time_startup(code, stdin_text, markers, environment)
+        runs = [time_startup(code, stdin_text, markers, environment) for run in range(repeat)]
+        times, import_times = min(runs, key=lambda run: run[0][markers[0][0]])
+
+        results[name] = dict(times, imports=sum(import_times.values()), import_times=import_times)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the startup of the user interfaces of Obstruction.")
+    parser.add_argument('--interfaces', nargs='+', choices=list(STARTUPS), default=list(STARTUPS), help="the user interfaces to start")
+    parser.add_argument('--board-size', type=int, default=6, help="the size of the board")
+    parser.add_argument('--time-budget', type=int, default=1000, help="the milliseconds the computer may think about a move")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="the number of runs of every user interface")
+    parser.add_argument('--headless', action='store_true', help="use the dummy video and audio drivers of SDL")
+    parser.add_argument('--output', default=None, help="the JSON file of the results")
+    arguments = parser.parse_args()
+
+    results = run_startup_benchmarks(arguments.interfaces, arguments.board_size, arguments.time_budget, arguments.repeat, arguments.headless)
+
+    for name, result in results.items():
+        for label, seconds in result.items():
+            if label != 'import_times':
+                print(f"{name:<12} {label:<16} {seconds * 1000:>9.1f} ms")
+
+        slowest = sorted(result['import_times'].items(), key=lambda item: item[1], reverse=True)[:NUM_SLOWEST_IMPORTS]
+        print(f"{'':<12} slowest imports: " + ", ".join(f"{module} {seconds * 1000:.1f} ms" for module, seconds in slowest) + "\n")
+
+    if arguments.output is not None:
+        write_report(results, arguments.output)
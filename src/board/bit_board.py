@@ -0,0 +1,376 @@
+from board.board import InvalidMoveException
+import texttable
+
+
+class BitBoard:
+    # A position has at most 8 neighbours, so a move blocks between 0 and 8 positions.
+    MAX_SCORE = 8
+
+    # Neighbourhood masks are the same for every board of a given size, so they are computed once and shared.
+    _neighbourhood_cache = {}
+    _neighbour_cells_cache = {}
+
+    def __init__(self, board_size):
+        self._size = board_size
+        self._full_mask = (1 << (board_size * board_size)) - 1
+        self._neighbourhood = self.get_neighbourhood_masks(board_size)
+        self._x_mask = 0
+        self._o_mask = 0
+        self._blocked_mask = 0
+        self._show_indices = False
+        self._move_stack = []
+
+        # For every cell, the number of its empty neighbours, which is the number of positions a move there would block, and for every
+        # such number, the empty cells having it. Both are kept up to date by every move, so the scores of all the moves are available
+        # without counting again.
+        self._neighbour_cells = self.get_neighbour_cells(board_size)
+        self._scores = None
+        self._score_buckets = None
+        self._compute_scores()
+
+    @classmethod
+    def get_neighbourhood_masks(cls, board_size):
+        """
+            This method returns, for every cell of a board of the given size, the bitmask of its adjacent cells (the cell itself excluded).
+        The masks are computed only the first time a board of that size is created.
+
+        :param board_size: Integer
+        :return: Tuple of integers, indexed by row * board_size + col.
+        """
+        if board_size not in cls._neighbourhood_cache:
+            masks = []
+            for row in range(board_size):
+                for col in range(board_size):
+                    mask = 0
+                    for i in range(row - 1, row + 2):
+                        for j in range(col - 1, col + 2):
+                            if 0 <= i < board_size and 0 <= j < board_size and (i != row or j != col):
+                                mask |= 1 << (i * board_size + j)
+                    masks.append(mask)
+
+            cls._neighbourhood_cache[board_size] = tuple(masks)
+
+        return cls._neighbourhood_cache[board_size]
+
+    @classmethod
+    def get_neighbour_cells(cls, board_size):
+        """
+            This method returns, for every cell of a board of the given size, the list of its adjacent cells. Like the masks, the lists are
+        computed only once for every size.
+
+        :param board_size: Integer
+        :return: Tuple of tuples of integers, indexed by row * board_size + col.
+        """
+        if board_size not in cls._neighbour_cells_cache:
+            masks = cls.get_neighbourhood_masks(board_size)
+            cls._neighbour_cells_cache[board_size] = tuple(tuple(cell for cell in range(board_size * board_size) if mask & (1 << cell))
+                                                           for mask in masks)
+
+        return cls._neighbour_cells_cache[board_size]
+
+    def _compute_scores(self):
+        """
+            This method counts the empty neighbours of every cell from scratch and puts the empty cells in the buckets of their scores.
+        """
+        empty = self.empty_mask
+        self._scores = [(mask & empty).bit_count() for mask in self._neighbourhood]
+        self._score_buckets = [set() for score in range(BitBoard.MAX_SCORE + 1)]
+        while empty:
+            low_bit = empty & -empty
+            cell = low_bit.bit_length() - 1
+            self._score_buckets[self._scores[cell]].add(cell)
+            empty ^= low_bit
+
+    def _update_scores(self, changed_mask, change):
+        """
+            This method updates the scores of the neighbours of the cells which were emptied or filled, and moves the empty ones to the
+        buckets of their new scores. The masks of the board must already be changed.
+
+        :param changed_mask: Integer, the bitmask of the cells which changed.
+        :param change: Integer, -1 if the cells were filled or 1 if they were emptied.
+        """
+        scores = self._scores
+        buckets = self._score_buckets
+
+        # The cells which changed are taken out of the buckets with the scores they had, or put back once all of them are updated.
+        if change < 0:
+            remaining = changed_mask
+            while remaining:
+                low_bit = remaining & -remaining
+                cell = low_bit.bit_length() - 1
+                buckets[scores[cell]].discard(cell)
+                remaining ^= low_bit
+
+        unchanged_empty = self.empty_mask & ~changed_mask
+        remaining = changed_mask
+        while remaining:
+            low_bit = remaining & -remaining
+            for neighbour in self._neighbour_cells[low_bit.bit_length() - 1]:
+                score = scores[neighbour]
+                scores[neighbour] = score + change
+                if unchanged_empty >> neighbour & 1:
+                    buckets[score].discard(neighbour)
+                    buckets[score + change].add(neighbour)
+            remaining ^= low_bit
+
+        if change > 0:
+            remaining = changed_mask
+            while remaining:
+                low_bit = remaining & -remaining
+                cell = low_bit.bit_length() - 1
+                buckets[scores[cell]].add(cell)
+                remaining ^= low_bit
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def empty_mask(self):
+        """
+            The bitmask of the empty cells of the board. Bit row * size + col is set if the cell is empty.
+        """
+        return self._full_mask & ~(self._x_mask | self._o_mask | self._blocked_mask)
+
+    @property
+    def board(self):
+        """
+            The game board as a matrix of symbols. The matrix is built on request, so changing it does not change the board.
+        """
+        return [[self.get_symbol(i, j) for j in range(self.size)] for i in range(self.size)]
+
+    @board.setter
+    def board(self, new_board):
+        self._x_mask = 0
+        self._o_mask = 0
+        self._blocked_mask = 0
+
+        for i in range(self.size):
+            for j in range(self.size):
+                bit = 1 << (i * self.size + j)
+                if new_board[i][j] == 'X':
+                    self._x_mask |= bit
+                elif new_board[i][j] == 'O':
+                    self._o_mask |= bit
+                elif new_board[i][j] == '-':
+                    self._blocked_mask |= bit
+
+        self._compute_scores()
+
+    def add_indices_to_board(self):
+        """
+            This method makes the board display indices on the sides in order to help with choosing the desired spot.
+        Unlike the matrix based board, the indices are only added when the board is displayed.
+        """
+        self._show_indices = True
+
+    def get_symbol(self, row, col):
+        """
+            This method returns the symbol of a position inside the board.
+
+        :param row: Integer
+        :param col: Integer
+        :return: String ('X' or 'O' or '-' or ' ')
+        """
+        bit = 1 << (row * self.size + col)
+        if self._x_mask & bit:
+            return 'X'
+        if self._o_mask & bit:
+            return 'O'
+        if self._blocked_mask & bit:
+            return '-'
+        return ' '
+
+    def check_if_position_is_in_board(self, row, col):
+        """
+            This method checks if a position given by its row and column is inside the game board.
+
+        :param row: Integer
+        :param col: Integer
+        :return: True, if the position is inside the board, False otherwise.
+        """
+        return 0 <= row < self.size and 0 <= col < self.size
+
+    def check_if_valid_move(self, row, col):
+        """
+            This method checks if a move can be made, meaning the position is inside the board and it is empty.
+
+        :param row: Integer
+        :param col: Integer
+        :raises InvalidMoveException: Exception raised if the move is invalid.
+        """
+        if not self.check_if_position_is_in_board(row, col):
+            raise InvalidMoveException
+
+        if not self.empty_mask & (1 << (row * self.size + col)):
+            raise InvalidMoveException
+
+    def block_adjacent_positions(self, row, col):
+        """
+            This method blocks the adjacent spaces of a position which was occupied.
+
+        :param row: Integer
+        :param col: Integer
+        """
+        newly_blocked = self._neighbourhood[row * self.size + col] & self.empty_mask
+        self._blocked_mask |= self._neighbourhood[row * self.size + col] & ~(self._x_mask | self._o_mask)
+        self._update_scores(newly_blocked, -1)
+
+    def make_move(self, row, col, symbol):
+        """
+            This method checks if a given move can be executed and if so, it makes the move and blocks the adjacent spaces.
+
+        :param row: Integer
+        :param col: Integer
+        :param symbol: String ('X' or 'O')
+        """
+        self.check_if_valid_move(row, col)
+
+        cell = row * self.size + col
+        filled = (1 << cell) | (self._neighbourhood[cell] & self.empty_mask)
+
+        if symbol == 'X':
+            self._x_mask |= 1 << cell
+        else:
+            self._o_mask |= 1 << cell
+
+        # The neighbours of an empty cell are never occupied, so all of them can be blocked at once.
+        self._blocked_mask |= self._neighbourhood[cell]
+        self._update_scores(filled, -1)
+
+    def push_move(self, row, col, symbol):
+        """
+            This method makes a move which can later be reverted by pop_move.
+
+        :param row: Integer
+        :param col: Integer
+        :param symbol: String ('X' or 'O')
+        :raises InvalidMoveException: Exception raised if the move is invalid.
+        :return: The undo record of the move, a tuple (row, col, bitmask of the newly blocked positions).
+        """
+        self.check_if_valid_move(row, col)
+
+        # Since the move is valid, none of its neighbours is occupied, so the empty ones are exactly the ones it will block.
+        newly_blocked = self._neighbourhood[row * self.size + col] & self.empty_mask
+
+        self.make_move(row, col, symbol)
+
+        record = (row, col, newly_blocked)
+        self._move_stack.append(record)
+
+        return record
+
+    def pop_move(self):
+        """
+            This method reverts the last move made by push_move, emptying its position and the positions it blocked.
+
+        :return: The undo record of the reverted move.
+        """
+        record = self._move_stack.pop()
+        row, col, newly_blocked = record
+
+        bit = 1 << (row * self.size + col)
+        self._x_mask &= ~bit
+        self._o_mask &= ~bit
+        self._blocked_mask &= ~newly_blocked
+        self._update_scores(bit | newly_blocked, 1)
+
+        return record
+
+    def undo_move(self, previous_board):
+        """
+            This method replaces the game board with a previous copy of it.
+
+        :param previous_board: Previous copy of the game board, as returned by the board property.
+        """
+        self.board = previous_board
+
+    def check_full_board(self):
+        """
+            This method checks if the game board is full.
+
+        :return: True, if the board is full, False if it finds at least an empty space.
+        """
+        return self.empty_mask == 0
+
+    def count_empty_neighbours(self, row, col):
+        """
+            This method returns the number of empty positions adjacent to a given one, which is the number of positions a move there blocks.
+
+        :param row: Integer
+        :param col: Integer
+        :return: Integer
+        """
+        return (self._neighbourhood[row * self.size + col] & self.empty_mask).bit_count()
+
+    def get_empty_positions(self):
+        """
+            This method returns the empty positions of the board, in row-major order.
+
+        :return: List of tuples (row, col)
+        """
+        positions = []
+        empty = self.empty_mask
+        while empty:
+            low_bit = empty & -empty
+            cell = low_bit.bit_length() - 1
+            positions.append(divmod(cell, self.size))
+            empty ^= low_bit
+
+        return positions
+
+    def get_move_scores(self):
+        """
+            This method returns the valid moves together with the number of positions each of them blocks, read from the scores which are
+        kept up to date by the moves.
+
+        :return: Dictionary having as keys positions and as values the number of positions blocked by a move there.
+        """
+        move_scores = {}
+        empty = self.empty_mask
+        while empty:
+            low_bit = empty & -empty
+            cell = low_bit.bit_length() - 1
+            move_scores[divmod(cell, self.size)] = self._scores[cell]
+            empty ^= low_bit
+
+        return move_scores
+
+    def get_top_moves(self, max_score=None):
+        """
+            This method returns the valid moves which block the highest number of positions, less than a given maximum. Only the buckets
+        of the scores are looked at, so the board is not searched.
+
+        :param max_score: Integer, the moves must block fewer positions than this, or None for no maximum.
+        :return: Tuple (list of the moves in row-major order, the number of positions they block). The list is empty if there is no such move.
+        """
+        score = BitBoard.MAX_SCORE if max_score is None else min(max_score - 1, BitBoard.MAX_SCORE)
+        while score >= 0:
+            if self._score_buckets[score]:
+                return [divmod(cell, self.size) for cell in sorted(self._score_buckets[score])], score
+            score -= 1
+
+        return [], 0
+
+    def get_empty_mask(self):
+        """
+            This method returns the empty positions of the board as a bitmask, in which bit row * size + col is set if the position is empty.
+
+        :return: Integer
+        """
+        return self.empty_mask
+
+    def __str__(self):
+        table = texttable.Texttable()
+        for i, row in enumerate(self.board):
+            if self._show_indices:
+                row.append(i + 1)
+            table.add_row(row)
+
+        if self._show_indices:
+            table.add_row([i + 1 for i in range(self.size)] + ['/'])
+
+        return table.draw()
+
+    def __repr__(self):
+        return self.__str__()
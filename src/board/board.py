@@ -1,5 +1,4 @@
 import texttable
-import copy
 
 
 class InvalidMoveException(Exception):
@@ -7,9 +6,53 @@ class InvalidMoveException(Exception):
 
 
 class Board:
+    __slots__ = ('_size', '_cells', '_num_empty', '_move_stack', '_show_indices')
+
+    # A position has at most 8 neighbours, so a move blocks between 0 and 8 positions.
+    MAX_SCORE = 8
+
+    # Every position is a single byte of the board: its high bits hold the index of its symbol in SYMBOLS, and its low 4 bits the number
+    # of its empty neighbours, which is the number of positions a move there would block. The scores are kept up to date by the moves.
+    # The empty positions are the only bytes smaller than 16, so the empty positions of a given score are found by looking for the score
+    # itself among the bytes.
+    SYMBOLS = ' XO-'
+    SYMBOL_SHIFT = 4
+    SCORE_MASK = 0x0F
+    EMPTY, X, O, BLOCKED = 0x00, 0x10, 0x20, 0x30
+    SYMBOL_CODES = {' ': EMPTY, 'X': X, 'O': O, '-': BLOCKED}
+
+    # The neighbours are the same for every board of a given size, so they are computed once and shared.
+    _neighbour_cells_cache = {}
+
     def __init__(self, board_size):
         self._size = board_size
-        self._board = self._create_board()
+        self._cells = self._create_board()
+        self._num_empty = board_size * board_size
+
+        # The moves which can be reverted, a list created by the first of them.
+        self._move_stack = ()
+        self._show_indices = False
+
+        self._compute_scores()
+
+    @classmethod
+    def get_neighbour_cells(cls, board_size):
+        """
+            This method returns, for every position of a board of the given size, its adjacent positions (the position itself excluded).
+
+        :param board_size: Integer
+        :return: Tuple of tuples of integers, indexed by row * board_size + col.
+        """
+        if board_size not in cls._neighbour_cells_cache:
+            neighbour_cells = []
+            for row in range(board_size):
+                for col in range(board_size):
+                    neighbour_cells.append(tuple(i * board_size + j for i in range(row - 1, row + 2) for j in range(col - 1, col + 2)
+                                                 if 0 <= i < board_size and 0 <= j < board_size and (i != row or j != col)))
+
+            cls._neighbour_cells_cache[board_size] = tuple(neighbour_cells)
+
+        return cls._neighbour_cells_cache[board_size]
 
     @property
     def size(self):
@@ -17,40 +60,81 @@ class Board:
 
     @property
     def board(self):
-        return self._board
+        """
+            The game board as a matrix of symbols. The matrix is built on request, so changing it does not change the board.
+        """
+        cells = self._cells
+        size = self._size
+        return [[Board.SYMBOLS[byte >> Board.SYMBOL_SHIFT] for byte in cells[i * size:(i + 1) * size]] for i in range(size)]
 
     @board.setter
     def board(self, new_board):
-        self._board = new_board
+        for i in range(self._size):
+            for j in range(self._size):
+                self._cells[i * self._size + j] = Board.SYMBOL_CODES[new_board[i][j]]
+
+        self._compute_scores()
 
     def _create_board(self):
         """
-            This method creates the game board. It is called when the constructor of the class is called. 
+            This method creates the game board, with all of its positions empty. It is called when the constructor of the class is called.
+
+        :return: Bytearray (N * N)
+        """
+        return bytearray(self._size * self._size)
 
-        :return: Matrix (N x N)
+    def clone(self):
         """
-        board = []
-        for i in range(self.size):
-            row = []
-            for j in range(self.size):
-                row.append(' ')
+            This method returns a copy of the board, together with the moves which can be reverted. Only the bytes of the board are copied.
 
-            board.append(row)
+        :return: Board
+        """
+        board = Board.__new__(Board)
+        board._size = self._size
+        board._cells = bytearray(self._cells)
+        board._num_empty = self._num_empty
+        board._move_stack = list(self._move_stack) if self._move_stack else ()
+        board._show_indices = self._show_indices
 
         return board
 
-    def add_indices_to_board(self):
+    def __copy__(self):
+        return self.clone()
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+    def _compute_scores(self):
         """
-            This method adds to the board indices on the sides in order to help with choosing the desired spot.
+            This method counts the empty positions and the empty neighbours of every position from scratch.
         """
-        for i, row in enumerate(self.board):
-            row.append(i + 1)
-        column_indices = []
-        for i in range(self.size):
-            column_indices.append(i + 1)
-        column_indices.append('/')
+        cells = self._cells
+        self._num_empty = sum(1 for byte in cells if byte <= Board.SCORE_MASK)
+        for cell, neighbours in enumerate(Board.get_neighbour_cells(self._size)):
+            score = 0
+            for neighbour in neighbours:
+                if cells[neighbour] <= Board.SCORE_MASK:
+                    score += 1
+            cells[cell] = (cells[cell] & ~Board.SCORE_MASK) | score
+
+    def _update_scores(self, cell, change):
+        """
+            This method updates the number of empty positions and the scores of the neighbours of a position which was filled or emptied.
 
-        self.board.append(column_indices)
+        :param cell: Integer, row * size + col
+        :param change: Integer, -1 if the position was filled or 1 if it was emptied.
+        """
+        self._num_empty += change
+        cells = self._cells
+        for neighbour in Board.get_neighbour_cells(self._size)[cell]:
+            cells[neighbour] += change
+
+    def add_indices_to_board(self):
+        """
+            This method makes the board display indices on the sides in order to help with choosing the desired spot. The indices are only
+        added when the board is displayed, they are not stored in the board.
+        """
+        self._show_indices = True
 
     def get_symbol(self, row, col):
         """
@@ -60,7 +144,7 @@ class Board:
         :param col: Integer
         :return: String ('X' or 'O' or '-' or ' ')
         """
-        return self._board[row][col]
+        return Board.SYMBOLS[self._cells[row * self._size + col] >> Board.SYMBOL_SHIFT]
 
     def check_if_position_is_in_board(self, row, col):
         """
@@ -89,7 +173,7 @@ class Board:
             raise InvalidMoveException
 
         # If the position is already occupied, raise an exception.
-        if self.board[row][col] != ' ':
+        if self._cells[row * self._size + col] > Board.SCORE_MASK:
             raise InvalidMoveException
 
     def block_adjacent_positions(self, row, col):
@@ -101,10 +185,12 @@ class Board:
         """
         # Given the row and column of a executed move, block the adjacent spaces. 
         # Blocked spaces are marked with '-'. 
-        for i in range(row - 1, row + 2):
-            for j in range(col - 1, col + 2):
-                if self.check_if_position_is_in_board(i, j) and (i != row or j != col):
-                    self.board[i][j] = '-'
+        cells = self._cells
+        for neighbour in Board.get_neighbour_cells(self._size)[row * self._size + col]:
+            was_empty = cells[neighbour] <= Board.SCORE_MASK
+            cells[neighbour] = Board.BLOCKED | (cells[neighbour] & Board.SCORE_MASK)
+            if was_empty:
+                self._update_scores(neighbour, -1)
 
     def make_move(self, row, col, symbol):
         """
@@ -112,24 +198,75 @@ class Board:
 
         :param row: Integer
         :param col: Integer
-        :param symbol: String
+        :param symbol: String ('X' or 'O')
         """
         # Check if the move is possible. 
         self.check_if_valid_move(row, col)
 
         # If that's the case, make the move. 
-        self.board[row][col] = symbol
+        cell = row * self._size + col
+        self._cells[cell] |= Board.SYMBOL_CODES[symbol]
+        self._update_scores(cell, -1)
 
         # Block the adjacent positions. 
         self.block_adjacent_positions(row, col)
 
+    def push_move(self, row, col, symbol):
+        """
+            This method makes a move which can later be reverted by pop_move. Instead of copying the board, it remembers only the position
+        of the move and the positions it newly blocked.
+
+        :param row: Integer
+        :param col: Integer
+        :param symbol: String ('X' or 'O')
+        :raises InvalidMoveException: Exception raised if the move is invalid.
+        :return: The undo record of the move, a tuple (row, col, tuple of the newly blocked positions as row * size + col).
+        """
+        self.check_if_valid_move(row, col)
+
+        cells = self._cells
+        newly_blocked = tuple(neighbour for neighbour in Board.get_neighbour_cells(self._size)[row * self._size + col]
+                              if cells[neighbour] <= Board.SCORE_MASK)
+
+        self.make_move(row, col, symbol)
+
+        record = (row, col, newly_blocked)
+        if not self._move_stack:
+            self._move_stack = []
+        self._move_stack.append(record)
+
+        return record
+
+    def pop_move(self):
+        """
+            This method reverts the last move made by push_move, emptying its position and the positions it blocked.
+
+        :raises IndexError: Exception raised if there is no move to revert.
+        :return: The undo record of the reverted move.
+        """
+        if not self._move_stack:
+            raise IndexError("There is no move to revert.")
+
+        record = self._move_stack.pop()
+        row, col, newly_blocked = record
+
+        cells = self._cells
+        cell = row * self._size + col
+        cells[cell] &= Board.SCORE_MASK
+        self._update_scores(cell, 1)
+        for neighbour in newly_blocked:
+            cells[neighbour] &= Board.SCORE_MASK
+            self._update_scores(neighbour, 1)
+
+        return record
+
     def undo_move(self, previous_board):
         """
-            This method replaces the game board with a previous copy of it. 
+            This method replaces the game board with a previous copy of it. The scores are computed again for the restored board.
 
-        :param previous_board: Previous copy of the game board.
+        :param previous_board: Previous copy of the game board, as returned by the board property.
         """
-        self.board = copy.deepcopy(previous_board)
+        self.board = previous_board
 
     def check_full_board(self):
         """
@@ -137,17 +274,80 @@ class Board:
 
         :return: True, if the board is full, False if it finds at least an empty space. 
         """
-        for row in self.board:
-            for position in row:
-                if position == ' ':
-                    return False
-        return True
+        return self._num_empty == 0
+
+    def count_empty_neighbours(self, row, col):
+        """
+            This method returns the number of empty positions adjacent to a given one, which is the number of positions a move there blocks.
+
+        :param row: Integer
+        :param col: Integer
+        :return: Integer
+        """
+        return self._cells[row * self._size + col] & Board.SCORE_MASK
+
+    def get_empty_positions(self):
+        """
+            This method returns the empty positions of the board, in row-major order.
+
+        :return: List of tuples (row, col)
+        """
+        return [divmod(cell, self._size) for cell, byte in enumerate(self._cells) if byte <= Board.SCORE_MASK]
+
+    def get_move_scores(self):
+        """
+            This method returns the valid moves together with the number of positions each of them blocks, read from the scores which are
+        kept up to date by the moves.
+
+        :return: Dictionary having as keys positions and as values the number of positions blocked by a move there.
+        """
+        return {divmod(cell, self._size): byte for cell, byte in enumerate(self._cells) if byte <= Board.SCORE_MASK}
+
+    def get_top_moves(self, max_score=None):
+        """
+            This method returns the valid moves which block the highest number of positions, less than a given maximum. The bytes of the
+        empty positions are their scores, so the moves of a score are found by searching the bytes of the board for it.
+
+        :param max_score: Integer, the moves must block fewer positions than this, or None for no maximum.
+        :return: Tuple (list of the moves in row-major order, the number of positions they block). The list is empty if there is no such move.
+        """
+        cells = self._cells
+        score = Board.MAX_SCORE if max_score is None else min(max_score - 1, Board.MAX_SCORE)
+        while score >= 0:
+            cell = cells.find(score)
+            if cell >= 0:
+                moves = []
+                while cell >= 0:
+                    moves.append(divmod(cell, self._size))
+                    cell = cells.find(score, cell + 1)
+                return moves, score
+            score -= 1
+
+        return [], 0
+
+    def get_empty_mask(self):
+        """
+            This method returns the empty positions of the board as a bitmask, in which bit row * size + col is set if the position is empty.
+
+        :return: Integer
+        """
+        mask = 0
+        for cell, byte in enumerate(self._cells):
+            if byte <= Board.SCORE_MASK:
+                mask |= 1 << cell
+
+        return mask
 
     def __str__(self):
         table = texttable.Texttable()
-        for row in self.board:
+        for i, row in enumerate(self.board):
+            if self._show_indices:
+                row.append(i + 1)
             table.add_row(row)
 
+        if self._show_indices:
+            table.add_row([i + 1 for i in range(self.size)] + ['/'])
+
         return table.draw()
 
     def __repr__(self):
@@ -1,8 +1,23 @@
-from ui.console_ui import ConsoleUI
-from ui.graphical_ui import GraphicalUI
-import os
+from ai.position_cache import PositionCache
+from ui.terminal_renderer import CLEAR_SCREEN, enable_ansi_sequences
+import argparse
+import sys
 from settings.settings import Settings
 
+DEFAULT_BOARD_SIZE = 6
+MIN_BOARD_SIZE = 3
+
+# Larger boards would leave less than 12 pixels to the cells of the graphical interface, and take the computer far too long to play.
+MAX_BOARD_SIZE = 50
+
+# The number of milliseconds the computer may think about a move, for every difficulty level. They can be changed in the settings file.
+DEFAULT_DIFFICULTY = 'normal'
+DEFAULT_TIME_BUDGETS = {'easy': 100, 'normal': 1000, 'hard': 5000}
+
+# The positions solved by the computer are kept for the whole session, and saved next to the settings file for the next one if the
+# settings ask for it.
+DEFAULT_POSITION_CACHE_SIZE = PositionCache.DEFAULT_MAX_ENTRIES
+
 
 class InvalidInputException(Exception):
     pass
@@ -43,18 +58,149 @@ def invalid_input_message():
     return "Invalid input!\n"
 
 
+def parse_arguments():
+    """
+        This function reads the command line arguments of the application.
+
+    :return: Namespace having the board_size, difficulty, workers and ponder attributes, which are None if they were not given.
+    """
+    parser = argparse.ArgumentParser(description="Play Obstruction against the computer.")
+    parser.add_argument('--board-size', type=int, default=None, help="the size of the board, overriding the one in settings.properties")
+    parser.add_argument('--difficulty', choices=list(DEFAULT_TIME_BUDGETS), default=None,
+                        help="how long the computer thinks about its moves, overriding the one in settings.properties")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="the number of processes searching the computer moves, overriding the one in settings.properties")
+    parser.add_argument('--ponder', action=argparse.BooleanOptionalAction, default=None,
+                        help="let the computer think during the user's turns, overriding the setting in settings.properties")
+
+    arguments = parser.parse_args()
+
+    if arguments.board_size is not None and not MIN_BOARD_SIZE <= arguments.board_size <= MAX_BOARD_SIZE:
+        parser.error(f"the board size must be between {MIN_BOARD_SIZE} and {MAX_BOARD_SIZE}")
+
+    if arguments.workers is not None and arguments.workers < 1:
+        parser.error("there must be at least one worker")
+
+    return arguments
+
+
+def read_board_size(config, arguments):
+    """
+        This function returns the size of the board, given on the command line or else in the settings file.
+
+    :param config: Dictionary, the settings read from the settings file.
+    :param arguments: Namespace, the command line arguments.
+    :return: Integer
+    """
+    if arguments.board_size is not None:
+        return arguments.board_size
+
+    board_size = config.get('board_size', str(DEFAULT_BOARD_SIZE))
+    if not board_size.isnumeric() or not MIN_BOARD_SIZE <= int(board_size) <= MAX_BOARD_SIZE:
+        return DEFAULT_BOARD_SIZE
+
+    return int(board_size)
+
+
+def read_time_budget(config, arguments):
+    """
+        This function returns the time budget of the computer moves, in milliseconds, for the difficulty level given on the command line or
+    else in the settings file. The budget of every level is read from the settings file, under the key time_budget_<level>.
+
+    :param config: Dictionary, the settings read from the settings file.
+    :param arguments: Namespace, the command line arguments.
+    :return: Integer
+    """
+    difficulty = arguments.difficulty
+    if difficulty is None:
+        difficulty = config.get('difficulty', DEFAULT_DIFFICULTY)
+    if difficulty not in DEFAULT_TIME_BUDGETS:
+        difficulty = DEFAULT_DIFFICULTY
+
+    time_budget = config.get('time_budget_' + difficulty, str(DEFAULT_TIME_BUDGETS[difficulty]))
+    if not time_budget.isnumeric():
+        return DEFAULT_TIME_BUDGETS[difficulty]
+
+    return int(time_budget)
+
+
+def read_workers(config, arguments):
+    """
+        This function returns the number of processes searching the computer moves, given on the command line or else in the settings file.
+    With more than one, the moves of every position are split between them.
+
+    :param config: Dictionary, the settings read from the settings file.
+    :param arguments: Namespace, the command line arguments.
+    :return: Integer
+    """
+    if arguments.workers is not None:
+        return arguments.workers
+
+    workers = config.get('workers', '1')
+    if not workers.isnumeric() or int(workers) < 1:
+        return 1
+
+    return int(workers)
+
+
+def read_position_cache_size(config):
+    """
+        This function returns the maximum number of solved positions the computer remembers, read from the settings file.
+
+    :param config: Dictionary, the settings read from the settings file.
+    :return: Integer
+    """
+    position_cache_size = config.get('position_cache_size', str(DEFAULT_POSITION_CACHE_SIZE))
+    if not position_cache_size.isnumeric():
+        return DEFAULT_POSITION_CACHE_SIZE
+
+    return int(position_cache_size)
+
+
+def read_ponder(config, arguments):
+    """
+        This function returns whether the computer thinks about its answers during the user's turns, given on the command line or else in
+    the settings file.
+
+    :param config: Dictionary, the settings read from the settings file.
+    :param arguments: Namespace, the command line arguments.
+    :return: True, if the computer ponders, False otherwise.
+    """
+    if arguments.ponder is not None:
+        return arguments.ponder
+
+    return config.get('ponder', 'no') == 'yes'
+
+
+def read_save_position_cache(config):
+    """
+        This function returns whether the solved positions are saved at exit and loaded at startup, read from the settings file.
+
+    :param config: Dictionary, the settings read from the settings file.
+    :return: True, if the positions are saved, False otherwise.
+    """
+    return config.get('save_position_cache', 'no') == 'yes'
+
+
 if __name__ == "__main__":
     error_message = None
     last_winner = None
     settings = Settings()
+    arguments = parse_arguments()
 
     config = settings.read_file()
 
     last_winner = config['last_winner']
+    board_size = read_board_size(config, arguments)
+    time_budget_ms = read_time_budget(config, arguments)
+    workers = read_workers(config, arguments)
+    ponder = read_ponder(config, arguments)
+
+    enable_ansi_sequences()
 
     while True:
         try:
-            os.system('cls')
+            sys.stdout.write(CLEAR_SCREEN)
             display_title()
 
             if error_message is not None:
@@ -69,11 +215,24 @@ if __name__ == "__main__":
             error_message = invalid_input_message()
 
     if user_choice != '0':
+        # The saved positions are only read once the user chose to play, so the menu is shown without waiting for them.
+        position_cache = PositionCache.shared()
+        position_cache.max_entries = read_position_cache_size(config)
+        save_position_cache = read_save_position_cache(config)
+        if save_position_cache:
+            position_cache.load()
+
+        # The user interfaces are only imported once chosen, so pygame is not imported for the console one.
         if user_choice == '1':
-            user_interface = GraphicalUI(last_winner)
+            from ui.graphical_ui import GraphicalUI
+            user_interface = GraphicalUI(last_winner, board_size, time_budget_ms, workers, ponder)
         else:
-            user_interface = ConsoleUI(last_winner)
+            from ui.console_ui import ConsoleUI
+            user_interface = ConsoleUI(last_winner, board_size, time_budget_ms, workers, ponder)
     
         last_winner = user_interface.start()
 
+        if save_position_cache:
+            position_cache.save()
+
     settings.write_file(last_winner)
\ No newline at end of file
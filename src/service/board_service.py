@@ -1,4 +1,6 @@
 class BoardService:
+    __slots__ = ('_board',)
+
     def __init__(self, board):
         self._board = board
 
@@ -8,6 +10,25 @@ class BoardService:
         """
         self._board.add_indices_to_board()
 
+    def push_move(self, row, col, symbol):
+        """
+            This method calls the method from the Board class which makes a move that can later be reverted with pop_move.
+
+        :param row: Integer
+        :param col: Integer
+        :param symbol: String
+        :return: The undo record of the move.
+        """
+        return self._board.push_move(row, col, symbol)
+
+    def pop_move(self):
+        """
+            This method calls the method from the Board class which reverts the last move made with push_move.
+
+        :return: The undo record of the reverted move.
+        """
+        return self._board.pop_move()
+
     def undo_move(self, previous_board):
         """
             This method calls the method from the Board class which undoes a move by replacing the current game board with a copy
@@ -56,6 +77,51 @@ class BoardService:
         """
         return self._board.check_if_position_is_in_board(row, col)
 
+    def count_empty_neighbours(self, row, col):
+        """
+            This method calls the method from the Board class which counts the empty positions adjacent to a given one.
+
+        :param row: Integer
+        :param col: Integer
+        :return: Integer
+        """
+        return self._board.count_empty_neighbours(row, col)
+
+    def get_empty_positions(self):
+        """
+            This method calls the method from the Board class which returns the empty positions of the board.
+
+        :return: List of tuples (row, col)
+        """
+        return self._board.get_empty_positions()
+
+    def get_move_scores(self):
+        """
+            This method calls the method from the Board class which returns the valid moves together with the number of positions each
+        of them blocks.
+
+        :return: Dictionary having as keys positions and as values the number of positions blocked by a move there.
+        """
+        return self._board.get_move_scores()
+
+    def get_top_moves(self, max_score=None):
+        """
+            This method calls the method from the Board class which returns the valid moves blocking the highest number of positions, less
+        than a given maximum.
+
+        :param max_score: Integer, or None for no maximum.
+        :return: Tuple (list of moves, the number of positions they block)
+        """
+        return self._board.get_top_moves(max_score)
+
+    def get_empty_mask(self):
+        """
+            This method calls the method from the Board class which returns the empty positions of the board as a bitmask.
+
+        :return: Integer
+        """
+        return self._board.get_empty_mask()
+
     def get_board_size(self):
         """
             This method returns the size of the game board. 
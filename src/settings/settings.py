@@ -19,7 +19,11 @@ class Settings:
         config = {}
 
         for line in lines:
-            tokens = line.split(' ')
+            tokens = line.strip().split(' ')
+
+            # Skip the empty lines. 
+            if len(tokens) < 2:
+                continue
 
             key = tokens[0]
             key = key.replace(':', '')
@@ -34,15 +38,20 @@ class Settings:
 
     def write_file(self, winner):
         """
-            This method opens the settings.properties file and writes to it the winner of the previous game. 
+            This method opens the settings.properties file and writes to it the winner of the previous game, keeping the other settings.
 
         :param winner: String
         """
-        open_file = open(os.path.join(ROOT_DIR, "settings/settings.properties"), 'w')
+        config = self.read_file()
 
         if winner is None:
             winner = 'computer'
 
-        open_file.write('last_winner: ' + winner)
+        config['last_winner'] = winner
+
+        open_file = open(os.path.join(ROOT_DIR, "settings/settings.properties"), 'w')
+
+        for key, value in config.items():
+            open_file.write(key + ': ' + str(value) + '\n')
 
         open_file.close()
\ No newline at end of file
@@ -0,0 +1,416 @@
+from ai.ai import AI
+from ai.random_ai import RandomAI
+from ai.solver import SolverAI
+from ai.opening_book import OpeningBook
+from ai.tablebase import EndgameTablebase
+from ai.position_store import PositionStore
+from ai.numpy_scoring import evaluate_positions, NEIGHBOUR_OFFSETS
+from board.bit_board import BitBoard
+from service.board_service import BoardService
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import csv
+import json
+import math
+import os
+import pstats
+import random
+import sys
+import tempfile
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# The players which can take part in the games: the heuristic of the AI class, random moves and the search of the SolverAI class.
+STRATEGIES = ('greedy', 'random', 'search')
+
+SYMBOLS = ('X', 'O')
+
+DEFAULT_TIME_BUDGET_MS = 50
+
+# The games are sent to the worker processes in chunks, so the cost of sending them is spread over many games.
+CHUNK_SIZE = 200
+
+# The players of the batched games, which are all played at the same time with a single evaluation of all their positions per move: random
+# moves, and the moves blocking the most positions, without looking ahead.
+BATCH_STRATEGIES = ('random', 'best_score')
+
+# The columns of the CSV result files. The move latencies are written separated by spaces.
+CSV_FIELDS = ('game', 'seed', 'player_1', 'player_2', 'first', 'winner', 'moves', 'latencies_ms')
+
+# The opening book and the endgame tablebase of the search players, loaded once per process.
+_search_resources = {}
+
+
+def create_player(strategy, board_service, time_budget_ms=DEFAULT_TIME_BUDGET_MS, position_store=None):
+    """
+        This function creates the computer player of a strategy.
+
+    :param strategy: String, one of STRATEGIES.
+    :param board_service: BoardService
+    :param time_budget_ms: Integer, the time budget of the search players.
+    :param position_store: PositionStore shared by the search players, or None.
+    :raises ValueError: Exception raised if the strategy is unknown.
+    :return: AI
+    """
+    if strategy == 'greedy':
+        return AI(board_service)
+    elif strategy == 'random':
+        return RandomAI(board_service)
+    elif strategy == 'search':
+        board_size = board_service.get_board_size()
+        if board_size not in _search_resources:
+            _search_resources[board_size] = (OpeningBook.load(board_size), EndgameTablebase.load())
+        opening_book, tablebase = _search_resources[board_size]
+
+        return SolverAI(board_service, time_budget_ms, opening_book=opening_book, tablebase=tablebase, position_store=position_store)
+
+    raise ValueError(f"Unknown strategy {strategy}, the strategies are {', '.join(STRATEGIES)}.")
+
+
+def play_game(board_size, strategies, seed, first=1, time_budget_ms=DEFAULT_TIME_BUDGET_MS, position_store=None):
+    """
+        This function plays a game between two computer players. The random number generator is seeded first, so a game is played the
+    same way every time it is given the same seed.
+
+    :param board_size: Integer
+    :param strategies: Tuple (strategy of player 1, strategy of player 2)
+    :param seed: Integer
+    :param first: Integer, the player who moves first (1 or 2).
+    :param time_budget_ms: Integer, the time budget of the search players.
+    :param position_store: PositionStore shared by the search players, or None.
+    :return: Dictionary having the fields of CSV_FIELDS except game, with the move latencies as a list. The winner is 1 or 2.
+    """
+    random.seed(seed)
+
+    board_service = BoardService(BitBoard(board_size))
+    players = [create_player(strategy, board_service, time_budget_ms, position_store) for strategy in strategies]
+    first_moves = [True, True]
+    latencies = []
+
+    player = first - 1
+    while not board_service.check_if_game_over():
+        start = time.perf_counter()
+        row, col = players[player].choose_move(first_moves[player])
+        latencies.append(round((time.perf_counter() - start) * 1000, 4))
+
+        board_service.make_move(row, col, SYMBOLS[player])
+        first_moves[player] = False
+        player = 1 - player
+
+    # The player who made the last move filled the board, so the other one can't move and loses.
+    return {
+        'seed': seed,
+        'player_1': strategies[0],
+        'player_2': strategies[1],
+        'first': first,
+        'winner': 2 - player,
+        'moves': len(latencies),
+        'latencies_ms': latencies,
+    }
+
+
+def profile_game(board_size, strategies, seed, path, time_budget_ms=DEFAULT_TIME_BUDGET_MS):
+    """
+        This function plays a game between two computer players with their instrumentation enabled, and writes the profile of their turns
+    to a file in the pstats format.
+
+    :param board_size: Integer
+    :param strategies: Tuple (strategy of player 1, strategy of player 2)
+    :param seed: Integer
+    :param path: String
+    :param time_budget_ms: Integer, the time budget of the search players.
+    :return: List of tuples (player, TurnStats), one per move of the game.
+    """
+    random.seed(seed)
+
+    board_service = BoardService(BitBoard(board_size))
+    players = [create_player(strategy, board_service, time_budget_ms) for strategy in strategies]
+    turns = []
+    instrumentations = [players[player].enable_instrumentation(lambda stats, player=player: turns.append((player, stats)), profile=True)
+                        for player in range(2)]
+    first_moves = [True, True]
+
+    player = 0
+    while not board_service.check_if_game_over():
+        row, col = players[player].choose_move(first_moves[player])
+        board_service.make_move(row, col, SYMBOLS[player])
+        first_moves[player] = False
+        player = 1 - player
+
+    # The turns of both players go in the same profile.
+    with tempfile.TemporaryDirectory() as directory:
+        player_paths = [os.path.join(directory, f"player_{player + 1}.prof") for player in range(2)]
+        for instrumentation, player_path in zip(instrumentations, player_paths):
+            instrumentation.dump_profile(player_path)
+        pstats.Stats(*player_paths).dump_stats(path)
+
+    return [(player + 1, stats) for player, stats in turns]
+
+
+def _play_chunk(board_size, strategies, time_budget_ms, games, store_path=None):
+    # The processes playing the games share the store through its file, and every chunk writes the positions it solved at its end.
+    position_store = PositionStore.open(board_size, store_path) if store_path is not None else None
+    try:
+        return [dict(game=game, **play_game(board_size, strategies, seed, first, time_budget_ms, position_store)) for game, seed, first in games]
+    finally:
+        if position_store is not None:
+            position_store.close()
+
+
+def run_games(board_size, strategies, num_games, seed=0, workers=1, time_budget_ms=DEFAULT_TIME_BUDGET_MS, store_path=None):
+    """
+        This function plays a number of games between two computer players, which take turns in moving first. The games are split between
+    several processes, and their results are returned as soon as they are known, in the order of the games.
+
+    :param board_size: Integer
+    :param strategies: Tuple (strategy of player 1, strategy of player 2)
+    :param num_games: Integer
+    :param seed: Integer, the seed of the first game. Game i is played with the seed seed + i.
+    :param workers: Integer, the number of processes.
+    :param time_budget_ms: Integer, the time budget of the search players.
+    :param store_path: String, the file of the PositionStore shared by the search players, or None for no store.
+    :return: Generator of the results of the games, as returned by play_game with the number of the game added.
+    """
+    games = [(game, seed + game, 1 + game % 2) for game in range(num_games)]
+    chunks = [games[index:index + CHUNK_SIZE] for index in range(0, num_games, CHUNK_SIZE)]
+
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _play_chunk(board_size, strategies, time_budget_ms, chunk, store_path)
+        return
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(_play_chunk, board_size, strategies, time_budget_ms, chunk, store_path) for chunk in chunks]
+        for future in futures:
+            yield from future.result()
+
+
+def play_batched_games(board_size, strategies, num_games, seed=0):
+    """
+        This function plays many games between two simple players at the same time, taking turns in moving first like run_games. Every
+    move of all the games is chosen from a single call of evaluate_positions, so no board is created.
+
+    :param board_size: Integer
+    :param strategies: Tuple (strategy of player 1, strategy of player 2), each one of BATCH_STRATEGIES.
+    :param num_games: Integer
+    :param seed: Integer, the seed of all the games.
+    :raises ValueError: Exception raised if a strategy is unknown.
+    :return: List of the results of the games, as returned by run_games, without the move latencies.
+    """
+    for strategy in strategies:
+        if strategy not in BATCH_STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy}, the strategies of the batched games are {', '.join(BATCH_STRATEGIES)}.")
+    if numpy is None:
+        raise ImportError("The batched games need NumPy to be installed.")
+
+    generator = numpy.random.default_rng(seed)
+    games = numpy.arange(num_games)
+    first = 1 + games % 2
+
+    # The filled positions of every board, with a border which is always filled, so the neighbours of a move never fall outside.
+    filled = numpy.ones((num_games, board_size + 2, board_size + 2), dtype=bool)
+    filled[:, 1:-1, 1:-1] = False
+
+    player = first - 1
+    moves = numpy.zeros(num_games, dtype=int)
+    winners = numpy.zeros(num_games, dtype=int)
+    playing = numpy.ones(num_games, dtype=bool)
+
+    while playing.any():
+        legal, scores, game_over = evaluate_positions(filled[:, 1:-1, 1:-1])
+
+        # The player who can't move loses.
+        finished = playing & game_over
+        winners[finished] = 2 - player[finished]
+        playing &= ~game_over
+        if not playing.any():
+            break
+
+        # The random players pick the valid move with the highest random priority, the others the one blocking the most positions, ties
+        # being broken at random.
+        priorities = generator.random(legal.shape)
+        best_score = numpy.array([strategies[index] == 'best_score' for index in range(2)])[player]
+        priorities = numpy.where(best_score[:, None, None], scores + priorities * 0.5, priorities)
+        priorities[~legal] = -1
+
+        cells = priorities.reshape(num_games, -1).argmax(axis=1)
+        rows, cols = numpy.divmod(cells, board_size)
+
+        played = games[playing]
+        rows, cols = rows[playing] + 1, cols[playing] + 1
+        filled[played, rows, cols] = True
+        for i, j in NEIGHBOUR_OFFSETS:
+            filled[played, rows + i, cols + j] = True
+
+        moves[playing] += 1
+        player[playing] = 1 - player[playing]
+
+    return [{
+        'game': game,
+        'seed': seed,
+        'player_1': strategies[0],
+        'player_2': strategies[1],
+        'first': int(first[game]),
+        'winner': int(winners[game]),
+        'moves': int(moves[game]),
+        'latencies_ms': [],
+    } for game in range(num_games)]
+
+
+def write_results(results, path):
+    """
+        This function writes the results of games to a file as they come, one line per game. The format is CSV if the name of the file ends
+    with .csv, and JSON Lines otherwise.
+
+    :param results: Iterable of the results of the games, as returned by run_games.
+    :param path: String
+    :return: Generator of the results, which are written while it is consumed.
+    """
+    with open(path, 'w', newline='') as results_file:
+        if path.endswith('.csv'):
+            writer = csv.DictWriter(results_file, CSV_FIELDS)
+            writer.writeheader()
+            for result in results:
+                writer.writerow(dict(result, latencies_ms=' '.join(str(latency) for latency in result['latencies_ms'])))
+                yield result
+        else:
+            for result in results:
+                results_file.write(json.dumps(result) + '\n')
+                yield result
+
+
+def wilson_interval(wins, games, z=1.96):
+    """
+        This function returns the Wilson score interval of a win rate, which stays inside [0, 1] and is accurate even for few games or
+    win rates close to 0 or 1.
+
+    :param wins: Integer
+    :param games: Integer
+    :param z: Float, the quantile of the normal distribution for the confidence level, 1.96 for 95%.
+    :return: Tuple (lower bound, upper bound)
+    """
+    if games == 0:
+        return 0.0, 1.0
+
+    rate = wins / games
+    denominator = 1 + z * z / games
+    centre = (rate + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def summarise(results):
+    """
+        This function computes the win rates of the players and of the player moving first, with their 95% confidence intervals, and the
+    move latencies of every strategy.
+
+    :param results: Iterable of the results of the games.
+    :return: Dictionary
+    """
+    games = 0
+    wins = [0, 0]
+    first_player_wins = 0
+    moves = 0
+    latencies = {}
+
+    for result in results:
+        games += 1
+        wins[result['winner'] - 1] += 1
+        if result['winner'] == result['first']:
+            first_player_wins += 1
+        moves += result['moves']
+
+        # The players alternate, starting with the one moving first.
+        for index, latency in enumerate(result['latencies_ms']):
+            player = (result['first'] - 1 + index) % 2
+            latencies.setdefault(result[f"player_{player + 1}"], []).append(latency)
+
+    summary = {'games': games, 'average_moves': moves / games if games else 0}
+    for player in range(2):
+        summary[f"player_{player + 1}_win_rate"] = wins[player] / games if games else 0
+        summary[f"player_{player + 1}_win_rate_95"] = wilson_interval(wins[player], games)
+    summary['first_player_win_rate'] = first_player_wins / games if games else 0
+    summary['first_player_win_rate_95'] = wilson_interval(first_player_wins, games)
+
+    for strategy, strategy_latencies in latencies.items():
+        strategy_latencies.sort()
+        summary[f"{strategy}_mean_latency_ms"] = sum(strategy_latencies) / len(strategy_latencies)
+        summary[f"{strategy}_p99_latency_ms"] = strategy_latencies[min(len(strategy_latencies) - 1, len(strategy_latencies) * 99 // 100)]
+
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play games between computer players of Obstruction, without any user interface.")
+    all_strategies = list(dict.fromkeys(STRATEGIES + BATCH_STRATEGIES))
+    strategies_help = f"one of {', '.join(STRATEGIES)}, or with --batched one of {', '.join(BATCH_STRATEGIES)}"
+    parser.add_argument('--player-1', choices=all_strategies, default=None,
+                        help=f"the strategy of the first player, {strategies_help} (greedy, or best_score with --batched)")
+    parser.add_argument('--player-2', choices=all_strategies, default='random',
+                        help=f"the strategy of the second player, {strategies_help}")
+    parser.add_argument('--games', type=int, default=1000, help="the number of games, the players take turns in moving first")
+    parser.add_argument('--size', type=int, default=6, help="the size of the board")
+    parser.add_argument('--seed', type=int, default=0, help="the seed of the first game")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="the number of processes")
+    parser.add_argument('--time-budget', type=int, default=DEFAULT_TIME_BUDGET_MS, help="the milliseconds per move of the search players")
+    parser.add_argument('--output', default=None, help="the file of the results of the games, CSV if it ends with .csv and JSON Lines otherwise")
+    parser.add_argument('--batched', action='store_true', help="play all the games at the same time, evaluating all of their positions "
+                                                               "at once, with the strategies " + ', '.join(BATCH_STRATEGIES))
+    parser.add_argument('--store', default=None, help="the file of the solved positions shared by the search players of all the processes")
+    parser.add_argument('--profile', default=None, help="instead of the games, play a single one with the counters of every turn "
+                                                        "printed and write the profile of the turns to this file")
+    arguments = parser.parse_args()
+
+    # The batched games have their own strategies, and the profiled game is never batched.
+    batched = arguments.batched and arguments.profile is None
+    valid_strategies = BATCH_STRATEGIES if batched else STRATEGIES
+    if arguments.player_1 is None:
+        arguments.player_1 = 'best_score' if batched else 'greedy'
+    for option, strategy in [('--player-1', arguments.player_1), ('--player-2', arguments.player_2)]:
+        if strategy not in valid_strategies:
+            parser.error(f"{option} {strategy} is not a strategy of the {'batched games' if batched else 'games without --batched'}, "
+                         f"which are {', '.join(valid_strategies)}")
+
+    if arguments.profile is not None:
+        turns = profile_game(arguments.size, (arguments.player_1, arguments.player_2), arguments.seed, arguments.profile,
+                             arguments.time_budget)
+        for player, stats in turns:
+            phases = ', '.join(f"{phase} {phase_ms:.3f} ms" for phase, phase_ms in stats.phase_ms.items())
+            line = f"Player {player}: {stats.total_ms:.3f} ms ({phases}), {stats.moves_tried} moves tried"
+            if stats.nodes:
+                line += (f", {stats.nodes} positions searched {stats.depth} moves deep, transposition table "
+                         f"{stats.cache_hits} hits {stats.cache_misses} misses, Grundy values {stats.grundy_hits} hits {stats.grundy_misses} misses")
+            print(line)
+        print(f"The profile of the turns is in {arguments.profile}")
+        sys.exit(0)
+
+    start = time.perf_counter()
+    if arguments.batched:
+        results = play_batched_games(arguments.size, (arguments.player_1, arguments.player_2), arguments.games, arguments.seed)
+    else:
+        results = run_games(arguments.size, (arguments.player_1, arguments.player_2), arguments.games, arguments.seed, arguments.workers,
+                            arguments.time_budget, arguments.store)
+    if arguments.output is not None:
+        results = write_results(results, arguments.output)
+
+    summary = summarise(results)
+    elapsed = time.perf_counter() - start
+
+    print(f"{summary['games']} games in {elapsed:.2f} s ({summary['games'] / elapsed:.0f} games per second), "
+          f"{summary['average_moves']:.1f} moves per game")
+    for player, strategy in [(1, arguments.player_1), (2, arguments.player_2)]:
+        low, high = summary[f"player_{player}_win_rate_95"]
+        print(f"Player {player} ({strategy}) wins {summary[f'player_{player}_win_rate']:.1%} of the games, 95% CI [{low:.1%}, {high:.1%}]")
+    low, high = summary['first_player_win_rate_95']
+    print(f"The player moving first wins {summary['first_player_win_rate']:.1%} of the games, 95% CI [{low:.1%}, {high:.1%}]")
+    for strategy in sorted({arguments.player_1, arguments.player_2}):
+        if f'{strategy}_mean_latency_ms' not in summary:
+            continue
+        print(f"{strategy}: {summary[f'{strategy}_mean_latency_ms']:.3f} ms per move on average, "
+              f"{summary[f'{strategy}_p99_latency_ms']:.3f} ms at the 99th percentile")
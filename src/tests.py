@@ -1,9 +1,39 @@
 import unittest
 import copy
+import os
 import random
+import sys
+import tempfile
+import threading
+import multiprocessing
+import time
 from board.board import Board, InvalidMoveException
+from board.bit_board import BitBoard
 from service.board_service import BoardService
 from ai.ai import AI
+from ai.solver import Solver, SolverAI, SearchTimeout
+from ai.symmetry import Symmetry
+from ai.opening_book import OpeningBook, build_opening_book
+from ai.tablebase import EndgameTablebase, generate_tablebase
+from ai.regions import split_regions, canonical_shape
+from ai.grundy import GrundyCache
+from ai.background_ai import BackgroundAI
+from ai.parallel_solver import ParallelSolver
+from ai.instrumentation import Instrumentation
+from ai.position_cache import PositionCache
+from ai.position_store import PositionStore
+from ai.numpy_scoring import NumpyScorer, stack_empty_masks, evaluate_positions
+from simulation.self_play import play_game, run_games, write_results, wilson_interval, summarise, create_player, profile_game, play_batched_games
+import json
+from benchmarks.runner import create_position, measure, run_benchmarks, compare_results, write_report, read_report
+from benchmarks.startup import read_import_times, time_startup
+from ui.board_renderer import BoardRenderer
+from ui.terminal_renderer import TerminalRenderer, CLEAR_SCREEN
+import io
+import re
+import argparse
+import main
+import pygame
 
 
 class TestBoard(unittest.TestCase):
@@ -92,6 +122,41 @@ class TestBoard(unittest.TestCase):
                 if self.game_board.check_if_position_is_in_board(i, j):
                     self.assertRaises(InvalidMoveException, self.game_board.make_move, random_row, random_col, 'O')
 
+    def test_push_and_pop_move(self):
+        self.game_board.make_move(0, 0, 'X')
+        previous_board = copy.deepcopy(self.game_board.board)
+
+        # The move at (1, 2) blocks 6 new positions, since (0, 1) and (1, 1) are already blocked. 
+        row, col, newly_blocked = self.game_board.push_move(1, 2, 'O')
+        self.assertEqual((1, 2), (row, col))
+        self.assertEqual(6, len(newly_blocked))
+        self.assertEqual('O', self.game_board.get_symbol(1, 2))
+
+        # Reverting the move restores exactly the previous board. 
+        self.game_board.pop_move()
+        self.assertEqual(previous_board, self.game_board.board)
+
+        # An invalid move is not recorded. 
+        self.assertRaises(InvalidMoveException, self.game_board.push_move, 1, 1, 'O')
+
+    def test_get_top_moves(self):
+        # On the empty board, the inner positions block 8 positions, and the next best are the 16 edge positions which block 5. 
+        best_moves, best_score = self.game_board.get_top_moves()
+        self.assertEqual(8, best_score)
+        self.assertEqual(16, len(best_moves))
+        edge_moves, edge_score = self.game_board.get_top_moves(8)
+        self.assertEqual((5, 16), (edge_score, len(edge_moves)))
+
+        # The buckets follow the moves and their reverts. 
+        self.game_board.push_move(1, 1, 'X')
+        # Only (3, 3) loses a single neighbour, (2, 2). 
+        self.assertEqual(([(3, 3)], 7), self.game_board.get_top_moves(8))
+        self.game_board.pop_move()
+        self.assertEqual(16, len(self.game_board.get_top_moves()[0]))
+
+        # There are no moves blocking fewer than 0 positions. 
+        self.assertEqual(([], 0), self.game_board.get_top_moves(0))
+
     def test_block_adjacent_positions(self):
         # Obtain a random position. 
         random_row = random.randint(0, self.game_board.size - 1)
@@ -106,6 +171,154 @@ class TestBoard(unittest.TestCase):
                 if self.game_board.check_if_position_is_in_board(i, j) and i != random_row and j != random_col:
                     self.assertEqual('-', self.game_board.get_symbol(i, j))
 
+    def test_clone(self):
+        self.game_board.make_move(0, 0, 'X')
+        self.game_board.push_move(3, 3, 'O')
+
+        # The copy has its own positions and its own moves to revert.
+        board_copy = self.game_board.clone()
+        self.assertEqual(self.game_board.board, board_copy.board)
+        board_copy.pop_move()
+        self.assertEqual('O', self.game_board.get_symbol(3, 3))
+        self.assertEqual(' ', board_copy.get_symbol(3, 3))
+        self.assertEqual(self.game_board.get_move_scores(), copy.deepcopy(self.game_board).get_move_scores())
+
+        self.game_board.pop_move()
+        self.assertRaises(IndexError, self.game_board.pop_move)
+
+    def test_memory(self):
+        # A 6 x 6 board is a single object holding a single array of bytes.
+        self.game_board.make_move(2, 2, 'X')
+        self.assertFalse(hasattr(self.game_board, '__dict__'))
+        self.assertLess(sys.getsizeof(self.game_board) + sys.getsizeof(self.game_board._cells), 200)
+
+    def test_add_indices_to_board(self):
+        self.game_board.make_move(1, 1, 'X')
+        self.game_board.add_indices_to_board()
+
+        # The indices are only displayed, the board itself keeps its size.
+        self.assertEqual(6, len(self.game_board.board))
+        self.assertEqual(6, len(self.game_board.board[5]))
+        self.assertEqual(7, len(str(self.game_board).split('\n')) // 2)
+        self.assertIn('/', str(self.game_board))
+
+
+class TestBitBoard(unittest.TestCase):
+    def setUp(self):
+        self.game_board = BitBoard(6)
+
+    def test_make_move(self):
+        # The bitboard must end up in exactly the same state as the matrix board after the same moves. 
+        reference_board = Board(6)
+
+        for row, col, symbol in [(1, 1, 'X'), (3, 4, 'O'), (5, 0, 'X')]:
+            self.game_board.make_move(row, col, symbol)
+            reference_board.make_move(row, col, symbol)
+            self.assertEqual(reference_board.board, self.game_board.board)
+
+        # Occupied and blocked positions cannot be played. 
+        self.assertRaises(InvalidMoveException, self.game_board.make_move, 1, 1, 'O')
+        self.assertRaises(InvalidMoveException, self.game_board.make_move, 2, 2, 'O')
+        self.assertRaises(InvalidMoveException, self.game_board.make_move, 6, 0, 'O')
+
+    def test_check_full_board(self):
+        self.assertEqual(False, self.game_board.check_full_board())
+
+        self.game_board.make_move(1, 1, 'X')
+        self.game_board.make_move(1, 4, 'O')
+        self.game_board.make_move(4, 1, 'X')
+        self.assertEqual(False, self.game_board.check_full_board())
+
+        self.game_board.make_move(4, 4, 'O')
+        self.assertEqual(True, self.game_board.check_full_board())
+
+    def test_undo_move(self):
+        self.game_board.make_move(0, 0, 'X')
+        previous_board = copy.deepcopy(self.game_board.board)
+
+        self.game_board.make_move(3, 3, 'O')
+        self.game_board.undo_move(previous_board)
+
+        self.assertEqual(previous_board, self.game_board.board)
+        self.assertEqual(' ', self.game_board.get_symbol(3, 3))
+
+    def test_push_and_pop_move(self):
+        self.game_board.make_move(0, 0, 'X')
+        previous_board = self.game_board.board
+
+        self.game_board.push_move(1, 2, 'O')
+        self.game_board.push_move(4, 4, 'X')
+        self.assertEqual('X', self.game_board.get_symbol(4, 4))
+
+        # The moves are reverted in the opposite order in which they were made. 
+        self.assertEqual(4, self.game_board.pop_move()[0])
+        self.assertEqual(' ', self.game_board.get_symbol(4, 4))
+        self.assertEqual(1, self.game_board.pop_move()[0])
+        self.assertEqual(previous_board, self.game_board.board)
+
+        self.assertRaises(InvalidMoveException, self.game_board.push_move, 1, 1, 'O')
+
+    def test_get_move_scores(self):
+        # The scores kept up to date by the moves must be the same as the ones counted on the matrix board. 
+        reference_board = Board(6)
+        self.assertEqual(reference_board.get_move_scores(), self.game_board.get_move_scores())
+
+        for row, col, symbol in [(1, 1, 'X'), (3, 4, 'O'), (5, 0, 'X')]:
+            self.game_board.push_move(row, col, symbol)
+            reference_board.make_move(row, col, symbol)
+            self.assertEqual(reference_board.get_move_scores(), self.game_board.get_move_scores())
+
+        # Reverting a move restores the scores. 
+        self.game_board.pop_move()
+        self.assertEqual(3, self.game_board.get_move_scores()[(5, 0)])
+
+        # Replacing the whole board recomputes them. 
+        self.game_board.board = reference_board.board
+        self.assertEqual(reference_board.get_move_scores(), self.game_board.get_move_scores())
+
+    def test_get_top_moves(self):
+        # Random games are played on both boards, checking that the buckets always hold the best moves counted on the matrix board. 
+        reference_board = Board(6)
+        for game in range(5):
+            while not self.game_board.check_full_board():
+                for max_score in [None, 8, 5, 3, 1]:
+                    moves = reference_board.get_move_scores()
+                    scores = [score for score in moves.values() if max_score is None or score < max_score]
+                    expected_score = max(scores) if len(scores) > 0 else 0
+                    expected_moves = [position for position in moves if moves[position] == expected_score and len(scores) > 0]
+
+                    self.assertEqual((expected_moves, expected_score), self.game_board.get_top_moves(max_score))
+                    self.assertEqual((expected_moves, expected_score), reference_board.get_top_moves(max_score))
+
+                row, col = random.choice(self.game_board.get_empty_positions())
+                self.game_board.push_move(row, col, 'X')
+                reference_board.push_move(row, col, 'X')
+
+            while reference_board.get_empty_mask() != (1 << 36) - 1:
+                self.game_board.pop_move()
+                reference_board.pop_move()
+                self.assertEqual(reference_board.get_top_moves(), self.game_board.get_top_moves())
+
+    def test_count_empty_neighbours(self):
+        # A corner has 3 neighbours, an edge 5 and an inner position 8. 
+        self.assertEqual(3, self.game_board.count_empty_neighbours(0, 0))
+        self.assertEqual(5, self.game_board.count_empty_neighbours(0, 3))
+        self.assertEqual(8, self.game_board.count_empty_neighbours(2, 2))
+
+        # After a move at (0, 0), the position (2, 2) only loses its neighbour (1, 1). 
+        self.game_board.make_move(0, 0, 'X')
+        self.assertEqual(7, self.game_board.count_empty_neighbours(2, 2))
+
+    def test_get_empty_positions(self):
+        self.assertEqual(36, len(self.game_board.get_empty_positions()))
+
+        self.game_board.make_move(0, 0, 'X')
+        empty_positions = self.game_board.get_empty_positions()
+
+        self.assertEqual(32, len(empty_positions))
+        self.assertNotIn((0, 0), empty_positions)
+        self.assertNotIn((1, 1), empty_positions)
+
 
 class TestBoardService(unittest.TestCase):
     def setUp(self):
@@ -183,6 +396,17 @@ class TestBoardService(unittest.TestCase):
                     self.assertRaises(InvalidMoveException, self.board_service.make_move, random_row, random_col, 'O')
 
 
+    def test_push_and_pop_move(self):
+        previous_board = copy.deepcopy(self.board_service.get_board())
+
+        self.board_service.push_move(2, 2, 'X')
+        self.assertEqual(True, self.board_service.check_if_position_is_in_board(2, 2))
+        self.assertEqual('X', self.board_service.get_symbol(2, 2))
+
+        self.board_service.pop_move()
+        self.assertEqual(previous_board, self.board_service.get_board())
+
+
 class testAI(unittest.TestCase):
     def setUp(self):
         self.game_board = Board(6)
@@ -238,6 +462,9 @@ class testAI(unittest.TestCase):
         # Make sure the maximum number of positions blocked is 8. 
         self.assertEqual(8, max_profit)
 
+        # Without the valid moves, the moves are taken from the board. 
+        self.assertEqual((best_moves, max_profit), self.computer_player.find_best_moves())
+
         # Check if every 'best move' is inside the board. 
         for position in best_moves:
             self.assertEqual(True, self.board_service.check_if_position_is_in_board(position[0], position[1]))   
@@ -252,6 +479,7 @@ class testAI(unittest.TestCase):
 
         # Make sure the maximum number of positions blocked by the average moves is 5. 
         self.assertEqual(5, average_profit)
+        self.assertEqual((average_moves, average_profit), self.computer_player.find_average_moves(max_profit=max_profit))
 
         # Check if every 'average_move' is inside the board. 
         for position in average_moves:
@@ -279,6 +507,1156 @@ class testAI(unittest.TestCase):
         # Make sure it is a move which blocks the maximum number of positions. 
         self.assertEqual(True, computer_move in best_moves)
 
+    def test_choose_move(self):
+        # After the moves below, only the 3 x 3 square in the bottom right corner is empty, so playing in its center wins the game. 
+        for row, col, symbol in [(1, 1, 'X'), (1, 4, 'O'), (4, 1, 'X')]:
+            self.board_service.make_move(row, col, symbol)
+        initial_board = copy.deepcopy(self.board_service.get_board())
+
+        move = self.computer_player.choose_move()
+
+        # The moves tried while choosing must have been reverted. 
+        self.assertEqual(initial_board, self.board_service.get_board())
+        self.assertEqual((4, 4), move)
+
+
+class TestSolver(unittest.TestCase):
+    def setUp(self):
+        self.brute_force_values = {}
+
+    def brute_force(self, empty_positions):
+        # Every game is tried without any pruning: the player to move wins if one of the moves leaves a lost position for the other one. 
+        if empty_positions not in self.brute_force_values:
+            value = -1
+            for row, col in empty_positions:
+                remaining = frozenset((i, j) for i, j in empty_positions if max(abs(i - row), abs(j - col)) > 1)
+                if self.brute_force(remaining) < 0:
+                    value = 1
+                    break
+
+            self.brute_force_values[empty_positions] = value
+
+        return self.brute_force_values[empty_positions]
+
+    def test_solve_small_boards(self):
+        # The empty boards up to 4 x 4 and random positions of a 5 x 5 board have the values found by trying every game. 
+        positions = [BoardService(BitBoard(size)) for size in range(1, 5)]
+        for game in range(20):
+            board_service = BoardService(BitBoard(5))
+            for move in range(random.randint(1, 3)):
+                empty_positions = board_service.get_empty_positions()
+                if empty_positions:
+                    row, col = random.choice(empty_positions)
+                    board_service.make_move(row, col, random.choice('XO'))
+            positions.append(board_service)
+
+        for board_service in positions:
+            solver = Solver(board_service.get_board_size())
+            value, cell = solver.solve(board_service.get_empty_mask())
+            self.assertEqual(self.brute_force(frozenset(board_service.get_empty_positions())), value)
+
+            # A winning move must leave a lost position for the other player. 
+            if value > 0:
+                row, col = divmod(cell, board_service.get_board_size())
+                board_service.make_move(row, col, 'O')
+                self.assertEqual(-1, self.brute_force(frozenset(board_service.get_empty_positions())))
+
+        # A board without empty positions is lost for the player to move. 
+        self.assertEqual(-1, Solver(3).solve(0)[0])
+
+    def test_solver_ai_winning_moves(self):
+        # Whenever the computer can win, on either board, its move leaves a lost position for the user, who plays at random. 
+        for game_board in [Board(5), BitBoard(5)]:
+            board_service = BoardService(game_board)
+            computer_player = SolverAI(board_service)
+
+            while not board_service.check_if_game_over():
+                row, col = random.choice(board_service.get_empty_positions())
+                board_service.make_move(row, col, 'X')
+                if board_service.check_if_game_over():
+                    break
+
+                won = self.brute_force(frozenset(board_service.get_empty_positions())) > 0
+                row, col = computer_player.choose_move()
+                board_service.make_move(row, col, 'O')
+                if won:
+                    self.assertEqual(-1, self.brute_force(frozenset(board_service.get_empty_positions())))
+
+    def test_solve(self):
+        # The first player can't win on a 4 x 4 board, but can on a 6 x 6 one. 
+        self.assertEqual(-1, Solver(4).solve((1 << 16) - 1)[0])
+
+        solver = Solver(6)
+        value, cell = solver.solve((1 << 36) - 1)
+        self.assertEqual(1, value)
+
+        # After the winning move, the position must be lost for the other player. 
+        self.assertEqual(-1, solver.solve(solver.play((1 << 36) - 1, cell))[0])
+
+        # A board without empty positions is lost for the player to move. 
+        self.assertEqual((-1, None), solver.solve(0))
+
+    def test_solve_timeout(self):
+        # An 8 x 8 board can't be solved without any time. 
+        self.assertRaises(SearchTimeout, Solver(8).solve, (1 << 64) - 1, 0)
+
+    def test_search(self):
+        # A 6 x 6 board is solved well within the budget, and the move found wins. 
+        solver = Solver(6)
+        value, cell = solver.search((1 << 36) - 1, 5000)
+        self.assertEqual(1, value)
+        self.assertEqual(-1, Solver(6).solve(solver.play((1 << 36) - 1, cell))[0])
+
+        # Looking a single move ahead, the result of an 8 x 8 game is not known. 
+        solver = Solver(8)
+        self.assertEqual(0, solver.search((1 << 64) - 1, 5000, max_depth=1)[0])
+        self.assertEqual(1, solver.depth)
+
+        # On a large board the search returns a move when its time is up. 
+        solver = Solver(30)
+        value, cell = solver.search((1 << 900) - 1, 50)
+        self.assertEqual(0, value)
+        self.assertLess(solver.elapsed_ms, 500)
+        self.assertEqual(50, solver.time_budget_ms)
+        self.assertEqual(8, BitBoard.get_neighbourhood_masks(30)[cell].bit_count())
+
+        self.assertEqual((-1, None), solver.search(0, 50))
+
+    def test_search_window(self):
+        # The empty 4 x 4 board is lost, and the 5 x 5 one is only found not to be lost when that is all that is asked for.
+        self.assertEqual(-1, Solver(4).search_window((1 << 16) - 1, 5000, Solver.UNLIMITED_DEPTH))
+        self.assertGreaterEqual(Solver(5).search_window((1 << 25) - 1, 5000, Solver.UNLIMITED_DEPTH, beta=0), 0)
+
+        solver = Solver(8)
+        self.assertEqual(0, solver.search_window((1 << 64) - 1, 5000, 1))
+        self.assertRaises(SearchTimeout, solver.search_window, (1 << 64) - 1, 0, 4)
+
+    def test_cancel(self):
+        # A cancelled search stops at once, however long its budget. 
+        cancel_event = threading.Event()
+        cancel_event.set()
+        solver = Solver(20, cancel_event=cancel_event)
+        solver.search((1 << 400) - 1, 60000)
+        self.assertLess(solver.elapsed_ms, 1000)
+        self.assertRaises(SearchTimeout, solver.solve, (1 << 400) - 1)
+
+    def test_solver_ai_choose_move(self):
+        game_board = BitBoard(6)
+        board_service = BoardService(game_board)
+        computer_player = SolverAI(board_service)
+
+        # On the empty board, the computer's move must leave a lost position for the user. 
+        row, col = computer_player.choose_move()
+        board_service.make_move(row, col, 'O')
+        self.assertEqual(-1, Solver(6).solve(board_service.get_empty_mask())[0])
+
+        # On a large board the computer makes a valid move without solving the game. 
+        board_service = BoardService(BitBoard(20))
+        computer_player = SolverAI(board_service, time_budget_ms=100)
+        row, col = computer_player.choose_move()
+        self.assertEqual(8, board_service.count_empty_neighbours(row, col))
+
+        # If the position can't be solved in time, the computer still makes a valid move. 
+        board_service = BoardService(BitBoard(8))
+        computer_player = SolverAI(board_service, time_budget_ms=0)
+        row, col = computer_player.choose_move()
+        self.assertEqual(' ', board_service.get_symbol(row, col))
+
+
+class TestParallelSolver(unittest.TestCase):
+    def test_root_moves(self):
+        solver = ParallelSolver(6, 2)
+
+        # On the empty board, the moves are the same up to rotations and reflections as the 6 in a corner triangle. 
+        self.assertEqual(6, len(solver.root_moves((1 << 36) - 1)))
+        solver.close()
+
+    def test_solve(self):
+        # The result does not depend on the number of processes. 
+        results = []
+        for workers in [1, 3]:
+            solver = ParallelSolver(6, workers)
+            results.append(solver.solve((1 << 36) - 1))
+            self.assertEqual((-1, None), solver.solve(0))
+            solver.close()
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(1, results[0][0])
+        self.assertEqual(-1, Solver(6).solve(Solver(6).play((1 << 36) - 1, results[0][1]))[0])
+
+        # The first player can't win on a 4 x 4 board. 
+        solver = ParallelSolver(4, 2)
+        self.assertEqual(-1, solver.solve((1 << 16) - 1)[0])
+        solver.close()
+
+    def test_search(self):
+        solver = ParallelSolver(20, 2)
+        value, cell = solver.search((1 << 400) - 1, 100)
+        self.assertEqual(0, value)
+        self.assertLess(solver.elapsed_ms, 2000)
+        solver.close()
+
+    def test_search_depth(self):
+        # The moves are searched one depth at a time, so under the same budget the processes look at least as far ahead as one solver.
+        full_mask = (1 << 81) - 1
+        solver = Solver(9)
+        solver.search(full_mask, 300)
+
+        parallel_solver = ParallelSolver(9, 2)
+        parallel_solver.search(full_mask, 1)
+        parallel_solver.search(full_mask, 300)
+        self.assertGreaterEqual(parallel_solver.depth, solver.depth)
+        parallel_solver.close()
+
+    def test_solver_ai_choose_move(self):
+        board_service = BoardService(BitBoard(6))
+        computer_player = SolverAI(board_service, workers=2)
+
+        row, col = computer_player.choose_move()
+        board_service.make_move(row, col, 'O')
+        self.assertEqual(-1, Solver(6).solve(board_service.get_empty_mask())[0])
+        computer_player.close()
+
+
+class TestSymmetry(unittest.TestCase):
+    def setUp(self):
+        self.symmetry = Symmetry(6)
+
+    def test_transform_mask(self):
+        # A rotation by 90 degrees moves the top left corner to the top right one. 
+        self.assertEqual(1 << 5, self.symmetry.transform_mask(1, 1))
+
+        # Applying every transform keeps the number of cells. 
+        mask = random.getrandbits(36)
+        for transform in range(8):
+            self.assertEqual(mask.bit_count(), self.symmetry.transform_mask(mask, transform).bit_count())
+
+    def test_canonicalise(self):
+        # All the symmetric versions of a mask have the same canonical mask. 
+        mask = random.getrandbits(36)
+        canonical_mask, transform = self.symmetry.canonicalise(mask)
+
+        self.assertEqual(canonical_mask, self.symmetry.transform_mask(mask, transform))
+        for other_transform in range(8):
+            self.assertEqual(canonical_mask, self.symmetry.canonicalise(self.symmetry.transform_mask(mask, other_transform))[0])
+
+    def test_revert_cell(self):
+        # A cell moved by a transform is brought back to where it was. 
+        for transform in range(8):
+            cell = random.randrange(36)
+            moved_cell = self.symmetry.transform_cell(cell, transform)
+            self.assertEqual(cell, self.symmetry.revert_cell(moved_cell, transform))
+
+    def test_large_board(self):
+        # No tables are built for large boards, so every mask is its own canonical mask, but the masks and cells are still moved.
+        symmetry = Symmetry(Symmetry.MAX_TABLE_CELLS // 20 + 1)
+        mask = random.getrandbits(21 * 21)
+        self.assertEqual((mask, 0), symmetry.canonicalise(mask))
+
+        self.assertEqual(1 << 20, symmetry.transform_mask(1, 1))
+        for transform in range(8):
+            moved_mask = symmetry.transform_mask(mask, transform)
+            self.assertEqual(mask.bit_count(), moved_mask.bit_count())
+            self.assertEqual(1 << symmetry.transform_cell(0, transform), symmetry.transform_mask(1, transform))
+
+
+class TestOpeningBook(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.book_path = os.path.join(self.temporary_directory.name, 'opening_book_5.bin')
+        build_opening_book(5, 2, self.book_path)
+        self.opening_book = OpeningBook.load(5, self.book_path)
+
+    def tearDown(self):
+        self.opening_book.close()
+        self.temporary_directory.cleanup()
+
+    def test_load(self):
+        self.assertEqual(5, self.opening_book.size)
+
+        # There is no book for a missing file, nor for another board size. 
+        self.assertEqual(None, OpeningBook.load(5, os.path.join(self.temporary_directory.name, 'missing.bin')))
+        self.assertEqual(None, OpeningBook.load(6, self.book_path))
+
+    def test_lookup(self):
+        solver = Solver(5)
+        empty_mask = (1 << 25) - 1
+
+        # The empty board and every position after one move are in the book, with the same value the solver finds. 
+        self.assertEqual(solver.solve(empty_mask)[0], self.opening_book.lookup(empty_mask)[0])
+
+        for cell in range(25):
+            position = solver.play(empty_mask, cell)
+            value, best_move = self.opening_book.lookup(position)
+            self.assertEqual(solver.solve(position)[0], value)
+
+            # The best move is mapped back to the position which was looked up. 
+            self.assertEqual(1, (position >> best_move) & 1)
+
+        # A position deep into the game is not in the book. 
+        self.assertEqual(None, self.opening_book.lookup(1))
+
+
+class TestRegions(unittest.TestCase):
+    def test_split_regions(self):
+        game_board = BitBoard(6)
+        game_board.make_move(2, 1, 'X')
+        game_board.make_move(2, 4, 'O')
+
+        # The rows 1 to 3 are blocked, so the empty positions form a region on the first row and another one on the last two rows. 
+        regions = split_regions(game_board.get_empty_mask(), BitBoard.get_neighbourhood_masks(6))
+        self.assertEqual(2, len(regions))
+        self.assertEqual(game_board.get_empty_mask(), regions[0] | regions[1])
+        self.assertEqual([6, 12], sorted(region.bit_count() for region in regions))
+
+    def test_canonical_shape(self):
+        # A shape keeps its key wherever it is and however it is rotated. 
+        shape = canonical_shape([(0, 0), (0, 1), (1, 2)])
+        self.assertEqual(shape, canonical_shape([(5, 7), (6, 7), (7, 6)]))
+        self.assertEqual(shape, canonical_shape([(3, 3), (3, 4), (2, 5)]))
+        self.assertNotEqual(shape, canonical_shape([(0, 0), (0, 1), (0, 2)]))
+
+
+class TestGrundyCache(unittest.TestCase):
+    def test_grundy(self):
+        grundy_cache = GrundyCache()
+
+        # The values of rows of cells: 1 or 2 cells are emptied by one move, 3 cells can be emptied or left with one cell, and every 
+        # move in a row of 4 cells leaves a position of value 1. 
+        self.assertEqual(1, grundy_cache.grundy([(0, 0)]))
+        self.assertEqual(1, grundy_cache.grundy([(0, 0), (0, 1)]))
+        self.assertEqual(2, grundy_cache.grundy([(0, 0), (0, 1), (0, 2)]))
+        self.assertEqual(0, grundy_cache.grundy([(0, 0), (0, 1), (0, 2), (0, 3)]))
+
+        # The empty 4 x 4 board is lost for the first player, so its value is 0, while the 5 x 5 one is won. 
+        self.assertEqual(0, grundy_cache.region_value((1 << 16) - 1, 4))
+        self.assertNotEqual(0, grundy_cache.region_value((1 << 25) - 1, 5))
+
+    def test_bounded(self):
+        grundy_cache = GrundyCache(max_entries=4)
+        grundy_cache.region_value((1 << 16) - 1, 4)
+
+        self.assertLessEqual(len(GrundyCache._shared_values), 4)
+        self.assertLessEqual(len(grundy_cache._region_values), 4)
+
+        # The values dropped are found again.
+        self.assertEqual(0, grundy_cache.region_value((1 << 16) - 1, 4))
+        self.assertEqual(2, grundy_cache.grundy([(0, 0), (0, 1), (0, 2)]))
+
+    def test_solver_with_regions(self):
+        # Two rows of 4 cells, each of value 0, so the position is lost. With a third single cell, of value 1, it is won. 
+        solver = Solver(6)
+        two_rows = 0b001111 | (0b001111 << 24)
+        self.assertEqual(-1, solver.solve(two_rows)[0])
+
+        value, cell = solver.solve(two_rows | (1 << 35))
+        self.assertEqual(1, value)
+        self.assertEqual(-1, solver.solve(solver.play(two_rows | (1 << 35), cell))[0])
+
+
+class TestEndgameTablebase(unittest.TestCase):
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        generate_tablebase(5, self.temporary_directory.name)
+        self.tablebase = EndgameTablebase.load(self.temporary_directory.name)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_grundy(self):
+        self.assertEqual(5, self.tablebase.max_cells)
+
+        # A region of 1 or 2 cells is always emptied by one move. 
+        self.assertEqual(1, self.tablebase.grundy([(0, 0)]))
+        self.assertEqual(1, self.tablebase.grundy([(4, 4), (5, 5)]))
+
+        # A row of 3 cells can be emptied or left with one cell, so its value is 2. 
+        self.assertEqual(2, self.tablebase.grundy([(2, 0), (2, 1), (2, 2)]))
+
+        # Every move in a row of 4 cells leaves a position of value 1, so its value is 0. 
+        self.assertEqual(0, self.tablebase.grundy([(0, 0), (0, 1), (0, 2), (0, 3)]))
+
+        # Regions larger than the tablebase have no value. 
+        self.assertEqual(None, self.tablebase.grundy([(0, col) for col in range(6)]))
+
+    def test_lookup(self):
+        solver = Solver(6)
+
+        for i in range(200):
+            # Build random positions with few empty cells and compare the tablebase with the solver. 
+            empty_mask = random.getrandbits(36) & random.getrandbits(36) & random.getrandbits(36)
+            result = self.tablebase.lookup(empty_mask, 6)
+            if result is None:
+                continue
+
+            value, cell = result
+            self.assertEqual(solver.solve(empty_mask)[0], value)
+            if value == 1:
+                self.assertEqual(-1, solver.solve(solver.play(empty_mask, cell))[0])
+
+    def test_generate_resumes(self):
+        # Generating again does not change the existing layers. 
+        generate_tablebase(5, self.temporary_directory.name)
+        self.assertEqual(5, EndgameTablebase.load(self.temporary_directory.name).max_cells)
+
+
+
+class TestBackgroundAI(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.computer_player = BackgroundAI(6, 100, store_path=os.path.join(self.directory.name, 'positions_6.bin'))
+
+    def tearDown(self):
+        self.computer_player.shutdown()
+        self.directory.cleanup()
+
+    def wait_for_move(self):
+        deadline = time.perf_counter() + 30
+        while time.perf_counter() < deadline:
+            move = self.computer_player.poll()
+            if move is not None:
+                return move
+            time.sleep(0.01)
+
+        return None
+
+    def test_start_move(self):
+        self.assertEqual(False, self.computer_player.thinking)
+        self.assertEqual(None, self.computer_player.poll())
+
+        # The move is chosen in the worker process, and the board of the caller is not changed. 
+        game_board = BitBoard(6)
+        game_board.make_move(1, 1, 'X')
+        self.computer_player.start_move(game_board.board)
+        self.assertEqual(True, self.computer_player.thinking)
+
+        row, col = self.wait_for_move()
+        self.assertEqual(False, self.computer_player.thinking)
+        self.assertEqual(' ', game_board.get_symbol(row, col))
+
+    def test_cancel(self):
+        self.computer_player.start_move(BitBoard(6).board)
+        self.computer_player.cancel()
+        self.assertEqual(False, self.computer_player.thinking)
+        self.assertEqual(None, self.computer_player.poll())
+
+        # The worker can still choose moves afterwards. 
+        self.computer_player.start_move(BitBoard(6).board)
+        self.assertIsNotNone(self.wait_for_move())
+
+
+
+class TestSelfPlay(unittest.TestCase):
+    def test_play_game(self):
+        result = play_game(6, ('greedy', 'random'), 7)
+
+        # The player moving first wins exactly when the number of moves is odd. 
+        self.assertEqual(result['first'] if result['moves'] % 2 == 1 else 3 - result['first'], result['winner'])
+        self.assertEqual(result['moves'], len(result['latencies_ms']))
+
+        # A game is played the same way with the same seed. 
+        same_result = play_game(6, ('greedy', 'random'), 7)
+        self.assertEqual((result['winner'], result['moves']), (same_result['winner'], same_result['moves']))
+
+        self.assertRaises(ValueError, create_player, 'unknown', BoardService(BitBoard(6)))
+
+    def test_run_games(self):
+        # The games are the same whatever the number of processes. 
+        results = list(run_games(5, ('greedy', 'search'), 30, seed=3, time_budget_ms=20))
+        parallel_results = list(run_games(5, ('greedy', 'search'), 30, seed=3, workers=2, time_budget_ms=20))
+
+        self.assertEqual(list(range(30)), [result['game'] for result in results])
+        self.assertEqual([(result['winner'], result['moves']) for result in results],
+                         [(result['winner'], result['moves']) for result in parallel_results])
+
+        # The players take turns in moving first. 
+        self.assertEqual([1, 2, 1], [result['first'] for result in results[:3]])
+
+    def test_write_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ['results.jsonl', 'results.csv']:
+                path = os.path.join(directory, name)
+                results = list(write_results(run_games(6, ('random', 'random'), 10), path))
+                self.assertEqual(10, len(results))
+
+                with open(path) as results_file:
+                    lines = results_file.read().splitlines()
+
+                if name.endswith('.csv'):
+                    self.assertEqual(11, len(lines))
+                    self.assertEqual('game,seed,player_1,player_2,first,winner,moves,latencies_ms', lines[0])
+                else:
+                    self.assertEqual(10, len(lines))
+                    self.assertEqual(results[0]['moves'], json.loads(lines[0])['moves'])
+
+    def test_wilson_interval(self):
+        self.assertEqual((0.0, 1.0), wilson_interval(0, 0))
+
+        low, high = wilson_interval(50, 100)
+        self.assertAlmostEqual(0.404, low, places=3)
+        self.assertAlmostEqual(0.596, high, places=3)
+
+        # The interval stays inside [0, 1]. 
+        self.assertEqual(0.0, wilson_interval(0, 10)[0])
+        self.assertEqual(1.0, wilson_interval(10, 10)[1])
+
+    def test_summarise(self):
+        results = [
+            {'player_1': 'greedy', 'player_2': 'random', 'first': 1, 'winner': 1, 'moves': 3, 'latencies_ms': [1, 2, 3]},
+            {'player_1': 'greedy', 'player_2': 'random', 'first': 2, 'winner': 1, 'moves': 2, 'latencies_ms': [4, 5]},
+        ]
+        summary = summarise(results)
+
+        self.assertEqual(2, summary['games'])
+        self.assertEqual(1.0, summary['player_1_win_rate'])
+        self.assertEqual(0.5, summary['first_player_win_rate'])
+        self.assertEqual(3, summary['greedy_mean_latency_ms'])
+        self.assertEqual(3, summary['random_mean_latency_ms'])
+
+
+@unittest.skipUnless(NumpyScorer.available(), "NumPy is not installed")
+class TestBatchedGames(unittest.TestCase):
+    def test_play_batched_games(self):
+        results = play_batched_games(6, ('best_score', 'random'), 200, seed=4)
+        self.assertEqual(200, len(results))
+        self.assertEqual([1, 2, 1], [result['first'] for result in results[:3]])
+
+        for result in results:
+            # The player who made the last move wins.
+            self.assertEqual(result['first'] if result['moves'] % 2 == 1 else 3 - result['first'], result['winner'])
+            self.assertTrue(4 <= result['moves'] <= 9)
+
+        self.assertEqual(results, play_batched_games(6, ('best_score', 'random'), 200, seed=4))
+        self.assertEqual(200, summarise(results)['games'])
+
+        self.assertRaises(ValueError, play_batched_games, 6, ('greedy', 'random'), 10)
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_create_position(self):
+        # The positions are the same every time, and the later phases have fewer empty positions. 
+        self.assertEqual(create_position(10, 'middlegame'), create_position(10, 'middlegame'))
+
+        game_board = BitBoard(10)
+        game_board.board = create_position(10, 'endgame')
+        self.assertLessEqual(len(game_board.get_empty_positions()), 20)
+
+        # The opening is the empty board. 
+        self.assertEqual([[' '] * 10 for i in range(10)], create_position(10, 'opening'))
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks([6], ['opening'], name_filter='check_full_board', repeat=1, min_round_time=0.001)
+        self.assertEqual({'board.check_full_board[6x6,opening]', 'bit_board.check_full_board[6x6,opening]'}, set(results))
+        self.assertGreater(results['board.check_full_board[6x6,opening]']['seconds_per_call'], 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            write_report(results, path)
+            self.assertEqual(results, read_report(path))
+
+    def test_measure(self):
+        seconds, calls = measure(lambda: None, repeat=2, min_round_time=0.001)
+        self.assertGreater(seconds, 0)
+        self.assertGreaterEqual(calls, 1)
+
+    def test_compare_results(self):
+        baseline = {'fast': {'seconds_per_call': 1.0}, 'slow': {'seconds_per_call': 1.0}}
+        results = {'fast': {'seconds_per_call': 1.1}, 'slow': {'seconds_per_call': 1.5}, 'new': {'seconds_per_call': 1.0}}
+
+        comparison = compare_results(results, baseline, threshold=0.25)
+        self.assertEqual({'fast', 'slow'}, set(comparison))
+        self.assertEqual(False, comparison['fast'][1])
+        self.assertEqual(True, comparison['slow'][1])
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.board_service = BoardService(BitBoard(6))
+        self.board_service.make_move(0, 0, 'X')
+
+    def test_disabled(self):
+        computer_player = AI(self.board_service)
+        self.assertIsNone(computer_player.instrumentation)
+        self.assertNotIn('choose_move', vars(computer_player))
+
+        computer_player.enable_instrumentation()
+        self.assertIn('choose_move', vars(computer_player))
+
+        computer_player.disable_instrumentation()
+        self.assertIsNone(computer_player.instrumentation)
+        self.assertNotIn('choose_move', vars(computer_player))
+
+    def test_phases(self):
+        turns = []
+        instrumentation = Instrumentation(turns.append)
+
+        # A phase which comes back in a turn adds up its times, and the turn lasts at least as long as its phases.
+        instrumentation.start_turn()
+        self.assertIsNotNone(instrumentation.current_turn)
+        for name in ['lookup', 'search', 'lookup']:
+            instrumentation.start_phase(name)
+            time.sleep(0.01)
+        stats = instrumentation.end_turn()
+
+        self.assertEqual([stats], turns)
+        self.assertIsNone(instrumentation.current_turn)
+        self.assertEqual(['lookup', 'search'], list(stats.phase_ms))
+        self.assertGreaterEqual(stats.phase_ms['lookup'], 20)
+        self.assertGreaterEqual(stats.total_ms, sum(stats.phase_ms.values()))
+
+    def test_heuristic_turns(self):
+        computer_player = AI(self.board_service)
+        turns = []
+        instrumentation = computer_player.enable_instrumentation(turns.append)
+
+        for turn in range(3):
+            computer_player.choose_move()
+
+        self.assertEqual(3, len(turns))
+        self.assertEqual(turns, instrumentation.turns)
+        self.assertIs(turns[-1], instrumentation.last_turn)
+        self.assertIsNone(instrumentation.current_turn)
+
+        for stats in turns:
+            self.assertIn('find_moves', stats.phase_ms)
+            self.assertGreaterEqual(stats.moves_tried, 1)
+            self.assertGreaterEqual(stats.total_ms, sum(stats.phase_ms.values()))
+            self.assertEqual(0, stats.nodes)
+
+        # The board is left as it was.
+        self.assertEqual(36 - 4, len(self.board_service.get_empty_positions()))
+
+    def test_search_turn(self):
+        computer_player = SolverAI(self.board_service, 1000)
+        instrumentation = computer_player.enable_instrumentation()
+        computer_player.choose_move()
+
+        stats = instrumentation.last_turn
+        self.assertEqual('search', list(stats.phase_ms)[0])
+        self.assertEqual(computer_player.solver.nodes, stats.nodes)
+        self.assertEqual(1000, stats.time_budget_ms)
+        self.assertGreater(stats.cache_hits + stats.cache_misses, 0)
+        self.assertEqual(stats.nodes, json.loads(json.dumps(stats.as_dict()))['nodes'])
+
+    def test_profile(self):
+        computer_player = AI(self.board_service)
+        with self.assertRaises(ValueError):
+            computer_player.enable_instrumentation().dump_profile(os.devnull)
+
+        instrumentation = computer_player.enable_instrumentation(profile=True)
+        computer_player.choose_move()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'turns.prof')
+            instrumentation.dump_profile(path)
+            self.assertGreater(os.path.getsize(path), 0)
+
+    def test_profile_game(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'game.prof')
+            turns = profile_game(6, ('greedy', 'random'), 7, path)
+            self.assertTrue(os.path.exists(path))
+
+        self.assertEqual(play_game(6, ('greedy', 'random'), 7)['moves'], len(turns))
+        self.assertEqual([1, 2], [player for player, stats in turns[:2]])
+
+
+class TestPositionCache(unittest.TestCase):
+    def setUp(self):
+        self.position_cache = PositionCache(max_entries=2)
+        self.full_mask = (1 << 36) - 1
+
+    def test_lookup(self):
+        self.assertIsNone(self.position_cache.lookup(self.full_mask, 6))
+        self.assertEqual(1, self.position_cache.misses)
+
+        # Only the results known for sure are kept.
+        empty_mask = self.full_mask & ~BitBoard.get_neighbourhood_masks(6)[0] & ~1
+        self.position_cache.store(empty_mask, 6, 0, 14)
+        self.assertEqual(0, len(self.position_cache))
+
+        self.position_cache.store(empty_mask, 6, 1, 14)
+        self.assertEqual((1, 14), self.position_cache.lookup(empty_mask, 6))
+
+        # The position with the opposite corner blocked is the same one rotated, and so is its best move.
+        symmetry = Symmetry.for_size(6)
+        rotated_mask = symmetry.transform_mask(empty_mask, 2)
+        self.assertEqual((1, symmetry.transform_cell(14, 2)), self.position_cache.lookup(rotated_mask, 6))
+        self.assertEqual(2, self.position_cache.hits)
+
+        # The same mask on another board size is another position.
+        self.assertIsNone(self.position_cache.lookup(empty_mask, 7))
+
+    def test_eviction(self):
+        masks = [self.full_mask & ~(1 << cell) for cell in (0, 1, 14)]
+        self.position_cache.store(masks[0], 6, 1, 7)
+        self.position_cache.store(masks[1], 6, 1, 7)
+
+        # The first position is used again, so the second one is dropped for the third.
+        self.position_cache.lookup(masks[0], 6)
+        self.position_cache.store(masks[2], 6, -1, 0)
+
+        self.assertEqual(2, len(self.position_cache))
+        self.assertIsNone(self.position_cache.lookup(masks[1], 6))
+        self.assertIsNotNone(self.position_cache.lookup(masks[0], 6))
+
+        self.position_cache.max_entries = 1
+        self.assertEqual(1, len(self.position_cache))
+        self.assertIsNotNone(self.position_cache.lookup(masks[0], 6))
+
+    def test_save_and_load(self):
+        self.position_cache.store(self.full_mask & ~1, 6, 1, 7)
+        self.position_cache.store(self.full_mask & ~2, 6, -1, 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'position_cache.json')
+            self.position_cache.save(path)
+
+            loaded_cache = PositionCache()
+            self.assertEqual(2, loaded_cache.load(path))
+            self.assertEqual(self.position_cache.entries(), loaded_cache.entries())
+
+            # Missing and invalid files are ignored.
+            self.assertEqual(0, loaded_cache.load(os.path.join(directory, 'missing.json')))
+            with open(path, 'w') as cache_file:
+                cache_file.write('{"version": 1, "entries": [[6]]}')
+            self.assertEqual(0, PositionCache().load(path))
+
+    def test_solver_ai(self):
+        board_service = BoardService(BitBoard(5))
+        board_service.make_move(0, 0, 'X')
+        position_cache = PositionCache()
+
+        computer_player = SolverAI(board_service, 5000, position_cache=position_cache)
+        move = computer_player.choose_move()
+        self.assertEqual(1, len(position_cache))
+
+        # The player of the next game answers the same position without searching it.
+        next_player = SolverAI(board_service, 5000, position_cache=position_cache)
+        instrumentation = next_player.enable_instrumentation()
+        self.assertEqual(move, next_player.choose_move())
+        self.assertEqual(1, position_cache.hits)
+        self.assertNotIn('search', instrumentation.last_turn.phase_ms)
+
+
+class TestPositionStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'positions_6.bin')
+        self.position_store = PositionStore.open(6, self.path)
+
+    def tearDown(self):
+        self.position_store.close()
+        self.directory.cleanup()
+
+    def test_lookup(self):
+        empty_mask = ((1 << 36) - 1) & ~BitBoard.get_neighbourhood_masks(6)[0] & ~1
+        self.assertIsNone(self.position_store.lookup(empty_mask))
+
+        self.position_store.store(empty_mask, 0, 14)
+        self.assertEqual(0, len(self.position_store))
+
+        # The results not written yet are already found by the process which added them.
+        self.position_store.store(empty_mask, 1, 14)
+        self.assertEqual((1, 14), self.position_store.lookup(empty_mask))
+
+        symmetry = Symmetry.for_size(6)
+        self.assertEqual((1, symmetry.transform_cell(14, 2)), self.position_store.lookup(symmetry.transform_mask(empty_mask, 2)))
+
+    def test_shared_file(self):
+        other_store = PositionStore.open(6, self.path)
+        masks = random.Random(3).sample(range(1, 1 << 36), 3 * PositionStore.INITIAL_SLOTS)
+
+        # The results are written in batches, and the table grows as it fills up.
+        for mask in masks:
+            self.position_store.store(mask, 1, (mask & -mask).bit_length() - 1)
+        self.position_store.flush()
+
+        self.assertEqual(len(masks), len(self.position_store))
+        self.assertGreater(os.path.getsize(self.path), 2 * len(masks) * PositionStore.SLOT_SIZE)
+
+        # The other store sees the new table and all of its positions.
+        for mask in masks[::50]:
+            self.assertEqual((1, (mask & -mask).bit_length() - 1), other_store.lookup(mask))
+        other_store.close()
+
+        self.assertIsNone(PositionStore.open(7, self.path))
+
+    def test_large_board(self):
+        path = os.path.join(self.directory.name, 'positions_20.bin')
+        position_store = PositionStore.open(20, path)
+        empty_mask = ((1 << 400) - 1) & ~(1 << 210)
+        position_store.store(empty_mask, -1, 0)
+        position_store.close()
+
+        position_store = PositionStore.open(20, path)
+        self.assertEqual((-1, 0), position_store.lookup(empty_mask))
+        self.assertIsNone(position_store.lookup(empty_mask & ~1))
+        position_store.close()
+
+    def test_solver_ai(self):
+        board_service = BoardService(BitBoard(5))
+        board_service.make_move(0, 0, 'X')
+        path = os.path.join(self.directory.name, 'positions_5.bin')
+
+        position_store = PositionStore.open(5, path)
+        move = SolverAI(board_service, 5000, position_store=position_store).choose_move()
+        position_store.close()
+
+        # The player of another process answers the same position from the file, without searching it.
+        position_store = PositionStore.open(5, path)
+        computer_player = SolverAI(board_service, 5000, position_store=position_store)
+        instrumentation = computer_player.enable_instrumentation()
+        self.assertEqual(move, computer_player.choose_move())
+        self.assertNotIn('search', instrumentation.last_turn.phase_ms)
+        position_store.close()
+
+
+@unittest.skipUnless(NumpyScorer.available(), "NumPy is not installed")
+class TestNumpyScoring(unittest.TestCase):
+    def test_scores(self):
+        # Random games are played, checking that the scores computed at once are the ones kept up to date by the board.
+        for board_size in (1, 6, 9):
+            game_board = BitBoard(board_size)
+            scorer = NumpyScorer(board_size)
+            generator = random.Random(board_size)
+
+            while True:
+                scores = scorer.scores(scorer.empty_array(game_board.empty_mask))
+                for (row, col), score in game_board.get_move_scores().items():
+                    self.assertEqual(score, scores[row, col])
+
+                for max_score in (None, 8, 5, 1, 0):
+                    self.assertEqual(game_board.get_top_moves(max_score), scorer.get_top_moves(game_board.empty_mask, max_score))
+
+                if game_board.check_full_board():
+                    break
+                game_board.make_move(*generator.choice(game_board.get_empty_positions()), 'X')
+
+    def test_ai(self):
+        self.assertRaises(ValueError, AI, BoardService(BitBoard(6)), 'vector')
+
+        # Both backends find the same moves, so the heuristic makes the same choices with the same seed.
+        moves = {}
+        for scoring in AI.SCORING_BACKENDS:
+            board_service = BoardService(BitBoard(20))
+            computer_player = AI(board_service, scoring)
+            random.seed(5)
+            moves[scoring] = []
+            while not board_service.check_if_game_over():
+                row, col = computer_player.choose_move()
+                board_service.make_move(row, col, 'O')
+                moves[scoring].append((row, col))
+
+        self.assertEqual(moves['board'], moves['numpy'])
+
+    def test_evaluate_positions(self):
+        # Positions of random games, evaluated all at once, must have the moves and scores of their boards.
+        boards = []
+        generator = random.Random(11)
+        for game in range(20):
+            game_board = BitBoard(7)
+            for move in range(game % 6):
+                if game_board.check_full_board():
+                    break
+                game_board.make_move(*generator.choice(game_board.get_empty_positions()), 'O')
+            boards.append(game_board)
+
+        empty = stack_empty_masks([game_board.empty_mask for game_board in boards], 7)
+        legal, scores, game_over = evaluate_positions(~empty)
+        self.assertEqual((20, 7, 7), scores.shape)
+
+        for index, game_board in enumerate(boards):
+            self.assertEqual(game_board.get_empty_positions(), [(int(row), int(col)) for row, col in zip(*legal[index].nonzero())])
+            self.assertEqual(game_board.get_move_scores(), {position: int(scores[index][position]) for position in game_board.get_move_scores()})
+            self.assertEqual(game_board.check_full_board(), game_over[index])
+
+        # The symbols of the boards can be evaluated too, any symbol other than 0 being a filled position.
+        codes = [[[' XO-'.index(symbol) for symbol in row] for row in game_board.board] for game_board in boards]
+        self.assertTrue((evaluate_positions(codes)[1] == scores).all())
+
+
+class TestBoardRenderer(unittest.TestCase):
+    def setUp(self):
+        # Plain surfaces stand for the window and the images, so no display is needed.
+        self.background = pygame.Surface((60, 60))
+        self.background.fill((200, 200, 200))
+        self.images = {}
+        for symbol, colour in (('X', (255, 0, 0)), ('O', (0, 0, 255)), ('-', (0, 0, 0))):
+            self.images[symbol] = pygame.Surface((10, 10))
+            self.images[symbol].fill(colour)
+
+        self.screen = pygame.Surface((60, 60))
+        self.renderer = BoardRenderer(self.screen, self.background, self.images, 6, 10)
+        self.board_service = BoardService(BitBoard(6))
+
+    def assert_screen_shows_board(self):
+        for i in range(6):
+            for j in range(6):
+                symbol = self.board_service.get_symbol(i, j)
+                colour = self.images[symbol].get_at((0, 0)) if symbol in self.images else self.background.get_at((0, 0))
+                self.assertEqual(colour, self.screen.get_at((j * 10 + 5, i * 10 + 5)))
+
+    def test_render(self):
+        self.assertEqual([self.screen.get_rect()], self.renderer.render(self.board_service))
+        self.assert_screen_shows_board()
+
+        # Nothing is drawn while the board does not change.
+        self.assertEqual([], self.renderer.render(self.board_service))
+
+        self.board_service.make_move(0, 0, 'X')
+        self.renderer.move_made(0, 0)
+        dirty_rects = self.renderer.render(self.board_service)
+        self.assertEqual(4, len(dirty_rects))
+        self.assertEqual(pygame.Rect(0, 0, 20, 20), dirty_rects[0].unionall(dirty_rects))
+        self.assert_screen_shows_board()
+
+        self.board_service.make_move(3, 3, 'O')
+        self.renderer.move_made(3, 3)
+        self.assertEqual(9, len(self.renderer.render(self.board_service)))
+        self.assert_screen_shows_board()
+
+        self.renderer.invalidate()
+        self.assertEqual([self.screen.get_rect()], self.renderer.render(self.board_service))
+
+    def test_overlay(self):
+        self.renderer.render(self.board_service)
+
+        overlay = pygame.Surface((15, 5))
+        overlay.fill((0, 255, 0))
+        area = pygame.Rect(5, 52, 15, 5)
+
+        self.renderer.set_overlay(1, overlay, area)
+        self.assertEqual([area], self.renderer.render(self.board_service))
+        self.assertEqual((0, 255, 0, 255), self.screen.get_at((10, 55)))
+
+        # The same overlay is not drawn again, unless a cell under it is.
+        self.renderer.set_overlay(1, overlay, area)
+        self.assertEqual([], self.renderer.render(self.board_service))
+        self.board_service.make_move(5, 0, 'X')
+        self.renderer.move_made(5, 0)
+        self.assertIn(area, self.renderer.render(self.board_service))
+        self.assertEqual((0, 255, 0, 255), self.screen.get_at((10, 55)))
+
+        # Once it is removed, the cells under it are shown again.
+        self.renderer.set_overlay(None)
+        self.renderer.render(self.board_service)
+        self.assert_screen_shows_board()
+
+
+class TestStartupBenchmark(unittest.TestCase):
+    def test_read_import_times(self):
+        text = ("import time: self [us] | cumulative | imported package\n"
+                "import time:       120 |        120 |   board.board\n"
+                "import time:       300 |       1420 | main\n"
+                "import time:        80 |         80 | os\n"
+                "sh: 1: cls: not found\n")
+
+        # Only the modules imported by the code itself are counted, since the others are part of their times.
+        self.assertEqual({'main': 0.00142, 'os': 0.00008}, read_import_times(text))
+
+    def test_time_startup(self):
+        code = "import json\nprint('<first>')\ninput()\nprint('<second>')\n"
+        times, import_times = time_startup(code, "\n", [('first', '<first>'), ('second', '<second>')])
+
+        self.assertEqual({'first', 'second'}, set(times))
+        self.assertLessEqual(times['first'], times['second'])
+        self.assertIn('json', import_times)
+
+        # An interpreter which exits before being ready is reported.
+        with self.assertRaises(RuntimeError):
+            time_startup("print('<first>')", "", [('first', '<first>'), ('second', '<second>')])
+
+
+class TestTerminalRenderer(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.renderer = TerminalRenderer(10, "Title\n", self.stream, terminal_lines=40)
+        self.board_service = BoardService(BitBoard(10))
+
+    def play(self, output):
+        """
+            This method shows the output of the renderer in an emulated terminal, which understands the escape sequences it writes.
+
+        :param output: String
+        :return: List of strings, the lines of the terminal.
+        """
+        screen = [''] * 40
+        line, column = 0, 0
+        for token in re.findall(r'\x1b\[(\d*);?(\d*)([HJK])|(\n)|([^\x1b\n])', output):
+            first, second, command, newline, character = token
+            if command == 'H':
+                line, column = int(first or 1) - 1, int(second or 1) - 1
+            elif command == 'J':
+                screen = screen[:line] + [screen[line][:column]] + [''] * (len(screen) - line - 1) if first != '2' else [''] * len(screen)
+            elif command == 'K':
+                screen[line] = ''
+            elif newline:
+                line, column = line + 1, 0
+            else:
+                screen[line] = screen[line][:column].ljust(column) + character + screen[line][column + 1:]
+                column += 1
+
+        return screen
+
+    def test_render(self):
+        self.renderer.render(self.board_service, "Score 0")
+        screen = self.play(self.stream.getvalue())
+        self.assertEqual(['Title', '', 'Score 0', ''], screen[:4])
+        self.assertEqual('|    |    |    |    |    |    |    |    |    |    | 1  |', screen[5])
+        self.assertEqual('| 1  | 2  | 3  | 4  | 5  | 6  | 7  | 8  | 9  | 10 | /  |', screen[25])
+
+        # The next frames only write the cells which changed.
+        self.board_service.make_move(4, 9, 'X')
+        self.board_service.make_move(0, 0, 'O')
+        start = len(self.stream.getvalue())
+        self.renderer.render(self.board_service, "Score 0", "Invalid move!")
+        frame = self.stream.getvalue()[start:]
+        self.assertNotIn(CLEAR_SCREEN, frame)
+        self.assertNotIn('Score', frame)
+        self.assertEqual(10 + 1, frame.count('H'))
+
+        # The terminal then shows the same as a frame written whole.
+        screen = self.play(self.stream.getvalue())
+        full_output = io.StringIO()
+        TerminalRenderer(10, "Title\n", full_output, terminal_lines=40).render(self.board_service, "Score 0", "Invalid move!")
+        self.assertEqual(self.play(full_output.getvalue()), screen)
+        self.assertEqual('Invalid move!', screen[27])
+
+        # The message is cleared by the next frame, and a new status line is written.
+        self.renderer.render(self.board_service, "Score 1")
+        screen = self.play(self.stream.getvalue())
+        self.assertEqual('Score 1', screen[2])
+        self.assertEqual('', screen[27])
+
+    def test_full_frames(self):
+        self.board_service.make_move(5, 5, 'X')
+        self.renderer.render(self.board_service, "Score 0")
+
+        # Another board is written whole.
+        self.board_service = BoardService(BitBoard(10))
+        start = len(self.stream.getvalue())
+        self.renderer.render(self.board_service, "Score 0")
+        self.assertTrue(self.stream.getvalue()[start:].startswith(CLEAR_SCREEN))
+
+        # And so is every frame if the terminal is too small for the positions of the cells to be known.
+        small_renderer = TerminalRenderer(10, "Title\n", self.stream, terminal_lines=20)
+        small_renderer.render(self.board_service, "Score 0")
+        start = len(self.stream.getvalue())
+        small_renderer.render(self.board_service, "Score 0")
+        self.assertTrue(self.stream.getvalue()[start:].startswith(CLEAR_SCREEN))
+
+
+class TestPondering(unittest.TestCase):
+    def setUp(self):
+        self.board_service = BoardService(BitBoard(7))
+        self.cancel_event = threading.Event()
+        self.computer_player = SolverAI(self.board_service, time_budget_ms=50, cancel_event=self.cancel_event)
+
+    def make_likely_move(self, board_service=None):
+        board_service = board_service if board_service is not None else self.board_service
+        cell = Solver(board_service.get_board_size()).ordered_moves(board_service.get_empty_mask())[0]
+        board_service.make_move(*divmod(cell, board_service.get_board_size()), 'X')
+
+    def test_hit(self):
+        # The user's most likely move is pondered first, so the computer already knows its answer. 
+        instrumentation = self.computer_player.enable_instrumentation()
+        self.assertGreater(self.computer_player.ponder(max_ms=500), 0)
+        self.make_likely_move()
+
+        row, col = self.computer_player.choose_move()
+        self.assertEqual(' ', self.board_service.get_symbol(row, col))
+        self.assertEqual('hit', self.computer_player.last_ponder)
+        self.assertEqual({'hit': 1, 'partial': 0, 'miss': 0}, self.computer_player.ponder_counts)
+        self.assertEqual('hit', instrumentation.turns[-1].ponder)
+        self.assertNotIn('search', instrumentation.turns[-1].phase_ms)
+
+        # The pondering is only used for the turn after it. 
+        self.make_likely_move()
+        self.computer_player.choose_move()
+        self.assertEqual(None, self.computer_player.last_ponder)
+
+    def test_cancel(self):
+        # A cancelled pondering searches nothing, and the move which was not pondered is searched in its turn. 
+        self.cancel_event.set()
+        self.assertEqual(0, self.computer_player.ponder())
+        self.cancel_event.clear()
+
+        self.make_likely_move()
+        self.computer_player.choose_move()
+        self.assertEqual('miss', self.computer_player.last_ponder)
+        self.assertEqual({'hit': 0, 'partial': 0, 'miss': 1}, self.computer_player.ponder_counts)
+
+    def test_partial(self):
+        # The time spent pondering a move counts towards the budget of its turn, which searches the rest. 
+        self.computer_player.ponder(max_ms=10)
+        self.make_likely_move()
+        self.computer_player.choose_move()
+        self.assertEqual('partial', self.computer_player.last_ponder)
+
+    def test_parallel_search(self):
+        # The parallel search ponders like the single one, and can be cancelled too. 
+        board_service = BoardService(BitBoard(9))
+        processes = set(multiprocessing.active_children())
+        computer_player = SolverAI(board_service, time_budget_ms=50, cancel_event=self.cancel_event, workers=2)
+        try:
+            # The processes of the search are started with the player, and not by the first search, in the thread pondering. 
+            self.assertEqual(2, len(set(multiprocessing.active_children()) - processes))
+
+            self.assertGreater(computer_player.ponder(max_ms=500), 0)
+            self.make_likely_move(board_service)
+            computer_player.choose_move()
+            self.assertIn(computer_player.last_ponder, ['hit', 'partial'])
+
+            self.cancel_event.set()
+            self.assertEqual(0, computer_player.ponder())
+        finally:
+            self.cancel_event.clear()
+            computer_player.close()
+
+    def test_background_pondering(self):
+        # The positions of a 9 x 9 board are not solved within the budget, and every worker starts with an empty position store, so the
+        # moves are not answered by the store instead.
+        for workers in [1, 2]:
+            board_service = BoardService(BitBoard(9))
+            directory = tempfile.TemporaryDirectory()
+            computer_player = BackgroundAI(9, 50, workers, os.path.join(directory.name, 'positions_9.bin'))
+            try:
+                computer_player.start_pondering(board_service.get_board())
+                self.assertEqual(False, computer_player.thinking)
+                time.sleep(0.5)
+
+                # Starting the move stops the pondering, whose result is used by the move. 
+                self.make_likely_move(board_service)
+                computer_player.start_move(board_service.get_board())
+                deadline = time.perf_counter() + 30
+                while computer_player.poll() is None and time.perf_counter() < deadline:
+                    time.sleep(0.01)
+
+                ponder_counts = computer_player.ponder_counts
+                self.assertEqual(1, ponder_counts['hit'] + ponder_counts['partial'])
+            finally:
+                computer_player.shutdown()
+                directory.cleanup()
+
+
+class TestMain(unittest.TestCase):
+    def test_read_board_size(self):
+        arguments = argparse.Namespace(board_size=None)
+        self.assertEqual(8, main.read_board_size({'board_size': '8'}, arguments))
+
+        # The sizes out of range in the settings file are replaced by the default one.
+        for board_size in (str(main.MIN_BOARD_SIZE - 1), str(main.MAX_BOARD_SIZE + 1), 'large'):
+            self.assertEqual(main.DEFAULT_BOARD_SIZE, main.read_board_size({'board_size': board_size}, arguments))
+
+    def test_large_board_solver(self):
+        # The largest board searches its positions without building the symmetry tables.
+        board_size = main.MAX_BOARD_SIZE
+        solver = Solver(board_size)
+        empty_mask = ((1 << board_size * board_size) - 1) ^ ((1 << board_size * board_size) - 1 >> 1)
+        self.assertEqual((1, board_size * board_size - 1), solver.solve(empty_mask))
+        self.assertEqual((empty_mask, 0), solver.symmetry.canonicalise(empty_mask))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,139 @@
+import pygame
+
+
+class BoardRenderer:
+    # Draws the game board on the screen, redrawing only what changed since the last frame instead of the whole window. The user interface
+    # reports the moves, which change the cell of the move and the cells around it, and the renderer redraws those cells and returns their
+    # areas, so only those are sent to the display. A frame where nothing changed draws nothing at all.
+    # The overlay is a surface drawn over the board, like the message shown while the computer is thinking. The cells under it are
+    # redrawn when it changes or goes away.
+    def __init__(self, screen, background, symbol_images, board_size, cell_size):
+        self._screen = screen
+        self._background = background
+        self._symbol_images = symbol_images
+        self._size = board_size
+        self._cell_size = cell_size
+
+        self._dirty_cells = set()
+        self._full_redraw = True
+        self._overlay_key = None
+        self._overlay_image = None
+        self._overlay_rect = None
+        self._drawn_overlay_key = None
+        self._drawn_overlay_rect = None
+
+    def cell_rect(self, row, col):
+        """
+            This method returns the area of the screen taken by a cell.
+
+        :param row: Integer
+        :param col: Integer
+        :return: pygame.Rect
+        """
+        return pygame.Rect(col * self._cell_size, row * self._cell_size, self._cell_size, self._cell_size)
+
+    def invalidate(self):
+        """
+            This method makes the next frame redraw the whole board, for example when a new game starts or the board was covered by
+        another screen.
+        """
+        self._full_redraw = True
+        self._dirty_cells.clear()
+
+    def mark_cell(self, row, col):
+        """
+            This method makes the next frame redraw a cell.
+
+        :param row: Integer
+        :param col: Integer
+        """
+        if 0 <= row < self._size and 0 <= col < self._size:
+            self._dirty_cells.add((row, col))
+
+    def move_made(self, row, col):
+        """
+            This method makes the next frame redraw the cells changed by a move: the cell of the move and the ones it blocked around it.
+
+        :param row: Integer
+        :param col: Integer
+        """
+        for i in range(row - 1, row + 2):
+            for j in range(col - 1, col + 2):
+                self.mark_cell(i, j)
+
+    def set_overlay(self, key, image=None, rect=None):
+        """
+            This method sets the surface drawn over the board. It is drawn again only if its key changes.
+
+        :param key: Any value identifying the contents of the overlay, or None to remove it.
+        :param image: pygame.Surface
+        :param rect: pygame.Rect, where the overlay is drawn.
+        """
+        if key is None:
+            image, rect = None, None
+
+        self._overlay_key = key
+        self._overlay_image = image
+        self._overlay_rect = rect
+
+    def _mark_area(self, area):
+        """
+            This method makes the next frame redraw the cells overlapping an area of the screen.
+
+        :param area: pygame.Rect
+        """
+        first_row, first_col = area.top // self._cell_size, area.left // self._cell_size
+        last_row, last_col = (area.bottom - 1) // self._cell_size, (area.right - 1) // self._cell_size
+
+        for i in range(first_row, last_row + 1):
+            for j in range(first_col, last_col + 1):
+                self.mark_cell(i, j)
+
+    def _draw_cell(self, board_service, row, col):
+        rect = self.cell_rect(row, col)
+        self._screen.blit(self._background, rect, rect)
+
+        image = self._symbol_images.get(board_service.get_symbol(row, col))
+        if image is not None:
+            self._screen.blit(image, rect)
+
+        return rect
+
+    def render(self, board_service):
+        """
+            This method draws what changed since the last frame.
+
+        :param board_service: BoardService, of the board which is drawn.
+        :return: List of pygame.Rect, the areas of the screen which were drawn, to be passed to pygame.display.update. The list is empty if
+        nothing changed.
+        """
+        uncovered_rects = []
+        overlay_changed = self._overlay_key != self._drawn_overlay_key
+        if overlay_changed and self._drawn_overlay_rect is not None:
+            # The area under the previous overlay is uncovered, along with the cells it was drawn over.
+            self._screen.blit(self._background, self._drawn_overlay_rect, self._drawn_overlay_rect)
+            uncovered_rects.append(self._drawn_overlay_rect)
+            self._mark_area(self._drawn_overlay_rect)
+
+        if self._full_redraw:
+            self._screen.blit(self._background, (0, 0))
+            for i in range(self._size):
+                for j in range(self._size):
+                    image = self._symbol_images.get(board_service.get_symbol(i, j))
+                    if image is not None:
+                        self._screen.blit(image, self.cell_rect(i, j))
+            dirty_rects = [self._screen.get_rect()]
+        else:
+            dirty_rects = uncovered_rects + [self._draw_cell(board_service, row, col) for row, col in self._dirty_cells]
+
+        # The overlay is drawn again if it changed, or if some of the cells under it were.
+        if self._overlay_image is not None and (overlay_changed or self._full_redraw or self._overlay_rect.collidelist(dirty_rects) != -1):
+            self._screen.blit(self._overlay_image, self._overlay_rect)
+            dirty_rects.append(self._overlay_rect)
+
+        self._full_redraw = False
+        self._dirty_cells.clear()
+        self._drawn_overlay_key = self._overlay_key
+        self._drawn_overlay_rect = self._overlay_rect
+
+        return dirty_rects
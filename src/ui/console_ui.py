@@ -1,7 +1,14 @@
-from board.board import Board, InvalidMoveException
+from board.board import InvalidMoveException
+from board.bit_board import BitBoard
 from service.board_service import BoardService
-from ai.ai import AI
-import os
+from ai.solver import SolverAI
+from ai.opening_book import OpeningBook
+from ai.tablebase import EndgameTablebase
+from ai.position_cache import PositionCache
+from ai.position_store import PositionStore
+from ui.terminal_renderer import TerminalRenderer
+from ui.messages import ponder_message
+import threading
 
 
 class InvalidInputException(Exception):
@@ -9,9 +16,21 @@ class InvalidInputException(Exception):
 
 
 class ConsoleUI:
-    def __init__(self, last_winner):
-        self._board_size = 6
+    # With ponder set, the computer thinks about its answers in another thread while the user is typing a move, and stops as soon as the
+    # move is made.
+    # The solved positions are kept in the position store at store_path, or at the default path of the board size if it is None.
+    def __init__(self, last_winner, board_size=6, time_budget_ms=1000, workers=1, ponder=False, store_path=None):
+        self._board_size = board_size
+        self._time_budget_ms = time_budget_ms
+        self._workers = workers
+        self._ponder = ponder
+        self._ponder_event = threading.Event()
+        self._ponder_counts = {'hit': 0, 'partial': 0, 'miss': 0}
         self._last_winner = last_winner
+        self._opening_book = OpeningBook.load(self._board_size)
+        self._tablebase = EndgameTablebase.load()
+        self._position_store = PositionStore.open(self._board_size, store_path)
+        self._renderer = TerminalRenderer(self._board_size, self.get_title())
 
     def game_over_message(self, winner):
         if winner == 'player':
@@ -31,7 +50,7 @@ class ConsoleUI:
     |_|  \_\__,_|_|\___||___/                
         """)
 
-        print("~ The game is played on a 6 x 6 grid. The user plays with 'X' and the computer uses 'O'.")
+        print(f"~ The game is played on a {self._board_size} x {self._board_size} grid. The user plays with 'X' and the computer uses 'O'.")
         print("\n~ The players take turns in writing their symbol in an empty cell. Placing a symbol blocks all \n"
         "of the neighbouring cells from both players, which is indicated by the symbol '-'.")
         print("\n~ The first player unable to make a move loses.")
@@ -43,20 +62,26 @@ class ConsoleUI:
     def invalid_move_message(self):
         return "\nInvalid move!"
 
-    def display_title(self):
-        print("""
+    def get_title(self):
+        """
+            This method returns the title of the game and the instructions, shown above the board.
+
+        :return: String
+        """
+        title = """
      ___  _         _                   _   _             
     / _ \| |__  ___| |_ _ __ _   _  ___| |_(_) ___  _ __  
    | | | | '_ \/ __| __| '__| | | |/ __| __| |/ _ \| '_ \ 
    | |_| | |_) \__ \ |_| |  | |_| | (__| |_| | (_) | | | |
     \___/|_.__/|___/\__|_|   \__,_|\___|\__|_|\___/|_| |_|
-        """)
+        """
 
-        print("~ After typing each command, hit ENTER.")
-        print("~ To make a move: Type 'move <row> <column>'")
-        print("~ Indexing starts at 1.")
-        print("~ Type 'rules' to see the rules of the game.")
-        print("~ Type 'exit' to stop the game.\n")
+        return (title + "\n"
+                "~ After typing each command, hit ENTER.\n"
+                "~ To make a move: Type 'move <row> <column>'\n"
+                "~ Indexing starts at 1.\n"
+                "~ Type 'rules' to see the rules of the game.\n"
+                "~ Type 'exit' to stop the game.\n")
 
     def read_user_move(self):
         user_input = input('\n>> ').strip().lower()
@@ -81,8 +106,33 @@ class ConsoleUI:
 
         return tokens 
 
-    def display_score(self, player, computer):
-        print(f"\t~ Score => Player: {player} vs. Computer: {computer}\n")
+    def score_message(self, player, computer):
+        return f"\t~ Score => Player: {player} vs. Computer: {computer}"
+
+    def start_pondering(self, computer_player):
+        """
+            This method starts the computer thinking about its answers to the user's moves in another thread.
+
+        :param computer_player: SolverAI
+        :return: threading.Thread
+        """
+        thread = threading.Thread(target=computer_player.ponder, daemon=True)
+        thread.start()
+        return thread
+
+    def stop_pondering(self, thread):
+        """
+            This method stops the computer thinking about its answers, if it is, and waits for it.
+
+        :param thread: threading.Thread, as returned by start_pondering, or None.
+        :return: None, so the thread can be forgotten with the same statement.
+        """
+        if thread is not None:
+            self._ponder_event.set()
+            thread.join()
+            self._ponder_event.clear()
+
+        return None
 
     def start(self):
         stop_game = False
@@ -91,13 +141,14 @@ class ConsoleUI:
         computer_score = 0
 
         while True:
-            game_board = Board(self._board_size)
+            game_board = BitBoard(self._board_size)
             board_service = BoardService(game_board)
-            computer_player = AI(board_service)
-
-            board_service.add_indices_to_board()
+            computer_player = SolverAI(board_service, self._time_budget_ms, opening_book=self._opening_book, tablebase=self._tablebase,
+                                       cancel_event=self._ponder_event, workers=self._workers, position_cache=PositionCache.shared(),
+                                       position_store=self._position_store)
 
             error_message = None
+            ponder_thread = None
 
             winner = None
             game_over = False
@@ -106,33 +157,35 @@ class ConsoleUI:
                 computer_player.computer_move()
 
             while True:
-                os.system('cls')
-                self.display_title()
-                self.display_score(player_score, computer_score)
-                print(game_board)
+                # Only the cells filled since the last turn are drawn again. 
+                self._renderer.render(board_service, self.score_message(player_score, computer_score), error_message)
+                error_message = None
 
                 if game_over:
                     break
 
-                if error_message is not None:
-                    print(error_message)
-                    error_message = None
+                if self._ponder and ponder_thread is None:
+                    ponder_thread = self.start_pondering(computer_player)
 
                 try:
                     tokens = self.read_user_move()
 
                     if tokens[0] == 'exit':
                         # The user chose to stop the game. 
+                        ponder_thread = self.stop_pondering(ponder_thread)
                         stop_game = True
                         break
 
                     elif tokens[0] == 'rules':
-                        os.system('cls')
+                        self._renderer.clear()
                         self.display_rules_menu()
 
                         exit_rules_menu = input("\nPress ENTER to return to the game...")
 
                     elif tokens[0] == 'move':
+                        # The board must not change under the pondering. 
+                        ponder_thread = self.stop_pondering(ponder_thread)
+
                         try:
                             board_service.make_move(int(tokens[1]) - 1, int(tokens[2]) - 1, 'X')
 
@@ -155,6 +208,10 @@ class ConsoleUI:
                 except InvalidInputException:
                     error_message = self.invalid_input_message()
 
+            for outcome, count in computer_player.ponder_counts.items():
+                self._ponder_counts[outcome] += count
+            computer_player.close()
+
             if winner is not None:
                 self._last_winner = winner
 
@@ -167,6 +224,12 @@ class ConsoleUI:
         if winner is None:
             self.game_over_message(winner)
 
+        if self._ponder:
+            print(f"\n~ {ponder_message(self._ponder_counts)}")
+
+        if self._position_store is not None:
+            self._position_store.close()
+
         exit_pause = input("\nPress ENTER to exit the application...")
 
         return self._last_winner
@@ -1,32 +1,75 @@
-from board.board import Board
+from board.bit_board import BitBoard
 from service.board_service import BoardService
-from ai.ai import AI
+from ai.background_ai import BackgroundAI
+from ui.board_renderer import BoardRenderer
+from ui.sound_effects import SoundEffects
+from ui.messages import ponder_message
 from config.definitions import ROOT_DIR
 import pygame
 import os
+import time
 
 
 class GraphicalUI:
-    def __init__(self, last_winner):
-        self._board_size = 6
+    # The size of the board drawn in the board.png image.
+    IMAGE_BOARD_SIZE = 6
+
+    # The computer waits at least this many milliseconds before making its move, so the user can see their own move first.
+    COMPUTER_MOVE_DELAY = 500
+
+    # The states of the window. The loop sleeps until something happens, so it only wakes up regularly while the computer is thinking, to
+    # check for its move and animate the thinking message, and at the end of a game, to start the next one.
+    MENU = 'menu'
+    RULES = 'rules'
+    PLAYING = 'playing'
+    GAME_OVER = 'game_over'
+
+    # While the computer is thinking, the window checks for its move this often, in milliseconds.
+    THINKING_POLL_INTERVAL = 50
+
+    # The next game starts this many milliseconds after the end of a game, so the user can see the last move.
+    GAME_OVER_DELAY = 1100
+
+    # The areas of the buttons of the menu and rules images, as (left, top, width, height).
+    MENU_BUTTONS = {'play': (222, 183, 159, 68), 'rules': (211, 284, 183, 69), 'quit': (217, 383, 167, 68)}
+    RULES_BUTTONS = {'return': (200, 498, 201, 55)}
+
+    def __init__(self, last_winner, board_size=6, time_budget_ms=1000, workers=1, ponder=False, store_path=None):
+        self._board_size = board_size
+        self._time_budget_ms = time_budget_ms
+        self._workers = workers
+        self._ponder = ponder
         self._last_winner = last_winner
         self.first_computer_move = True
-
-        # Initialize the pygame instance and the mixer used for sound effects. 
-        pygame.init()
-        pygame.mixer.init()
-
-        # Create instances of the board, the board service and the computer player. 
-        self.game_board = Board(self._board_size)
+        self.computer_move_time = 0
+        self.state = None
+        self.winner = None
+        self.new_game_time = 0
+        self.player_score = 0
+        self.computer_score = 0
+
+        # Initialize the parts of pygame needed to show the window. The mixer used for sound effects is started later, with the sounds. 
+        pygame.display.init()
+        pygame.font.init()
+        self.sound_effects = SoundEffects()
+
+        # Create instances of the board, the board service and the computer player, which thinks in another process. 
+        self.game_board = BitBoard(self._board_size)
         self.board_service = BoardService(self.game_board)
-        self.computer_player = AI(self.board_service)
+        self.computer_player = BackgroundAI(self._board_size, self._time_budget_ms, self._workers, store_path)
         
         # Define the window size.  
         self.WIN_SIZE = 600
-        self.CELL_SIZE = self.WIN_SIZE // 6
+        self.CELL_SIZE = self.WIN_SIZE // self._board_size
         self.screen = pygame.display.set_mode((self.WIN_SIZE, self.WIN_SIZE))
         pygame.display.set_caption("Obstruction")
-        self.clock = pygame.time.Clock()
+
+        # Moving the mouse changes nothing, so it does not wake the window up.
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
+
+        # The buttons are looked up once per click, in their areas computed once.
+        self.menu_buttons = {name: pygame.Rect(area) for name, area in GraphicalUI.MENU_BUTTONS.items()}
+        self.rules_buttons = {name: pygame.Rect(area) for name, area in GraphicalUI.RULES_BUTTONS.items()}
 
         # Load the images. 
         self.board_image = pygame.image.load(os.path.join(ROOT_DIR, "assets/images/board.png"))
@@ -35,189 +78,319 @@ class GraphicalUI:
         self.blocked_image = pygame.image.load(os.path.join(ROOT_DIR, "assets/images/blocked.png"))
         self.menu_image = pygame.image.load(os.path.join(ROOT_DIR, "assets/images/menu.png"))
         self.rules_image = pygame.image.load(os.path.join(ROOT_DIR, "assets/images/rules.png"))
+        self.thinking_font = pygame.font.SysFont('comicsansms', 22, bold=True, italic=True)
+
+        # The images are drawn for a 6 x 6 board, so they are adapted to other board sizes.
+        if self._board_size != GraphicalUI.IMAGE_BOARD_SIZE:
+            self.board_image = self.create_board_image()
+            self.x_image = pygame.transform.smoothscale(self.x_image, (self.CELL_SIZE, self.CELL_SIZE))
+            self.o_image = pygame.transform.smoothscale(self.o_image, (self.CELL_SIZE, self.CELL_SIZE))
+            self.blocked_image = pygame.transform.smoothscale(self.blocked_image, (self.CELL_SIZE, self.CELL_SIZE))
+            self.write_board_size_in_rules()
+
+        # The images are converted to the pixel format of the window once, so drawing them does not convert them every time.
+        self.board_image = self.board_image.convert()
+        self.menu_image = self.menu_image.convert()
+        self.rules_image = self.rules_image.convert()
+        self.x_image = self.x_image.convert_alpha()
+        self.o_image = self.o_image.convert_alpha()
+        self.blocked_image = self.blocked_image.convert_alpha()
+        self.thinking_images = [self.create_thinking_image(num_dots) for num_dots in range(4)]
+
+        # Only the cells changed by the moves are drawn again from one frame to the next.
+        self.renderer = BoardRenderer(self.screen, self.board_image, {'X': self.x_image, 'O': self.o_image, '-': self.blocked_image},
+                                      self._board_size, self.CELL_SIZE)
+
+    @staticmethod
+    def get_ticks():
+        """
+            This method returns the time in milliseconds, like pygame.time.get_ticks, which only works once all of pygame is initialized.
+
+        :return: Integer
+        """
+        return int(time.monotonic() * 1000)
+
+    def create_board_image(self):
+        """
+            This method draws the background of a board whose size is different from the one in the board image, using the colours of
+        the image.
+
+        :return: pygame.Surface
+        """
+        background_colour = self.board_image.get_at((self.WIN_SIZE // 12, self.WIN_SIZE // 12))
+        line_colour = (0, 0, 0)
+        line_width = max(1, 24 // self._board_size)
+
+        board_image = pygame.Surface((self.WIN_SIZE, self.WIN_SIZE))
+        board_image.fill(background_colour)
+
+        for i in range(self._board_size + 1):
+            position = i * self.CELL_SIZE
+            pygame.draw.line(board_image, line_colour, (position, 0), (position, self._board_size * self.CELL_SIZE), line_width)
+            pygame.draw.line(board_image, line_colour, (0, position), (self._board_size * self.CELL_SIZE, position), line_width)
+
+        return board_image
+
+    def write_board_size_in_rules(self):
+        """
+            This method replaces the "6 x 6" written in the rules image with the size of the board.
+        """
+        background_colour = self.rules_image.get_at((10, 10))
+        size_area = pygame.Rect(280, 100, 62, 28)
+
+        font = pygame.font.SysFont('comicsansms', 22, bold=True, italic=True)
+        text = font.render(f"{self._board_size} x {self._board_size}", True, (0, 0, 0))
+
+        # The text of a size with two digits is wider than the "6 x 6" it replaces, so the area cleared is sized from both.
+        text_area = text.get_rect(center=size_area.center)
+        self.rules_image.fill(background_colour, size_area.union(text_area))
+        self.rules_image.blit(text, text_area)
+
+    def create_thinking_image(self, num_dots):
+        """
+            This method draws the message which shows that the computer is thinking, with a given number of dots.
 
-        # Load the sound effects. 
-        self.player_draw_sound = pygame.mixer.Sound(os.path.join(ROOT_DIR, "assets/sounds/draw_sound0.ogg"))
-        self.computer_draw_sound = pygame.mixer.Sound(os.path.join(ROOT_DIR, "assets/sounds/draw_sound1.ogg"))
-        self.button_sound = pygame.mixer.Sound(os.path.join(ROOT_DIR, "assets/sounds/button_sound.ogg"))
-        self.win_sound = pygame.mixer.Sound(os.path.join(ROOT_DIR, "assets/sounds/win_sound.ogg"))
-        self.loss_sound = pygame.mixer.Sound(os.path.join(ROOT_DIR, "assets/sounds/loss_sound.ogg"))
+        :param num_dots: Integer
+        :return: pygame.Surface
+        """
+        text = self.thinking_font.render(f"Thinking{'.' * num_dots:<3}", True, (255, 255, 255))
+
+        image = pygame.Surface((140, 36), pygame.SRCALPHA)
+        pygame.draw.rect(image, (0, 0, 0), image.get_rect(), border_radius=8)
+        image.blit(text, text.get_rect(midleft=(14, image.get_height() // 2)))
+
+        return image.convert_alpha()
 
-    def draw_objects(self):
+    def update_thinking_indicator(self):
         """
-            This method draws the objects over the background image(the game board).
+            This method shows that the computer is thinking, with a message at the bottom of the board whose dots move while it waits,
+        and hides the message once it is done.
+        """
+        if not self.computer_player.thinking:
+            self.renderer.set_overlay(None)
+            return
+
+        num_dots = self.get_ticks() // 300 % 4
+        image = self.thinking_images[num_dots]
+        self.renderer.set_overlay(num_dots, image, image.get_rect(midbottom=(self.WIN_SIZE // 2, self.WIN_SIZE - 10)))
+
+    @staticmethod
+    def find_button(buttons, position):
         """
-        for i in range(self._board_size):
-            for j in range(self._board_size):
-                symbol = self.board_service.get_symbol(i, j)
-                if symbol != None:
-                    if symbol == 'X':
-                        self.screen.blit(self.x_image, (j * self.CELL_SIZE, i * self.CELL_SIZE))
-                    elif symbol == 'O':
-                        self.screen.blit(self.o_image, (j * self.CELL_SIZE, i * self.CELL_SIZE))
-                    elif symbol == '-':
-                        self.screen.blit(self.blocked_image, (j * self.CELL_SIZE, i * self.CELL_SIZE))
+            This method finds the button which was clicked.
+
+        :param buttons: Dictionary mapping the names of the buttons to their areas(pygame.Rect).
+        :param position: Tuple (x, y), the position of the click in the window.
+        :return: String, the name of the button, or None if the click is outside all the buttons.
+        """
+        for name, area in buttons.items():
+            if area.collidepoint(position):
+                return name
+
+        return None
 
     def show_menu(self):
+        self.state = GraphicalUI.MENU
         self.screen.blit(self.menu_image, (0, 0))
+        pygame.display.update()
 
     def show_rules(self):
+        self.state = GraphicalUI.RULES
         self.screen.blit(self.rules_image, (0, 0))
+        pygame.display.update()
 
-    def run_menu(self):
-        mouse_y, mouse_x = pygame.mouse.get_pos()
-        left_click = pygame.mouse.get_pressed()[0]
+    def draw(self):
+        """
+            This method draws what changed on the board since the last frame.
 
-        if left_click and mouse_y >= 222 and mouse_y <= 380 and mouse_x >= 183 and mouse_x <= 250:
-            return 'play'
+        :return: List of pygame.Rect, the areas of the window to update.
+        """
+        self.update_thinking_indicator()
+        return self.renderer.render(self.board_service)
 
-        elif left_click and mouse_y >= 211 and mouse_y <= 393 and mouse_x >= 284 and mouse_x <= 352:
-            return 'rules'
+    def start_computer_move(self):
+        """
+            This method lets the computer start thinking about its move. The move is made later by finish_computer_move, so the window
+        keeps being drawn and responding in the meantime.
+        """
+        self.computer_player.start_move(self.game_board.board, self.first_computer_move)
+        self.first_computer_move = False
+        self.computer_move_time = self.get_ticks() + GraphicalUI.COMPUTER_MOVE_DELAY
 
-        elif left_click and mouse_y >= 217 and mouse_y <= 383 and mouse_x >= 383 and mouse_x <= 450:
-            return 'quit'
+    def start_user_turn(self):
+        """
+            This method lets the computer think about its answers to the user's moves while the user is choosing one, if pondering is on.
+        The pondering stops when the computer starts its move.
+        """
+        if self._ponder:
+            self.computer_player.start_pondering(self.game_board.board)
 
-        return None
+    def finish_computer_move(self):
+        """
+            This method makes the computer move once it is chosen.
 
-    def run_rules(self):
-        mouse_y, mouse_x = pygame.mouse.get_pos()
-        left_click = pygame.mouse.get_pressed()[0]
+        :return: 'computer' if the move ends the game, None otherwise.
+        """
+        if self.get_ticks() < self.computer_move_time:
+            return None
 
-        if left_click and mouse_y >= 200 and mouse_y <= 400 and mouse_x >= 498 and mouse_x <= 552:
-            return 'return'
+        move = self.computer_player.poll()
+        if move is None:
+            return None
 
-        return None
+        self.board_service.make_move(move[0], move[1], 'O')
+        self.renderer.move_made(move[0], move[1])
+        self.sound_effects.play('computer_draw')
 
-    def draw(self):
-        self.screen.blit(self.board_image, (0, 0))
-        self.draw_objects()
-
-    def check_events(self):
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return not None
+        if self.board_service.check_if_game_over():
+            return 'computer'
 
+        self.start_user_turn()
         return None
 
-    def run_game_process(self):
-        mouse_y, mouse_x = pygame.mouse.get_pos()
-        col, row = mouse_y // self.CELL_SIZE, mouse_x // self.CELL_SIZE
-        left_click = pygame.mouse.get_pressed()[0]
+    def run_game_process(self, position):
+        """
+            This method makes the move of the user in the cell which was clicked, and lets the computer think about its answer.
+
+        :param position: Tuple (x, y), the position of the click in the window.
+        :return: 'player' if the move ends the game, None otherwise.
+        """
+        # The user's clicks are ignored while the computer is thinking. 
+        if self.computer_player.thinking:
+            return None
+
+        row, col = position[1] // self.CELL_SIZE, position[0] // self.CELL_SIZE
 
-        if left_click and self.board_service.get_symbol(row, col) == ' ':
+        if self.board_service.check_if_position_is_in_board(row, col) and self.board_service.get_symbol(row, col) == ' ':
             self.board_service.make_move(row, col, 'X')
-            pygame.mixer.Sound.play(self.player_draw_sound)
-            if not self.board_service.check_if_game_over():
-                self.draw()
-                pygame.display.update()
-                pygame.time.wait(500)
-                self.computer_player.computer_move(self.first_computer_move)
-                self.first_computer_move = False
-                pygame.mixer.Sound.play(self.computer_draw_sound)
-            else:
+            self.renderer.move_made(row, col)
+            self.sound_effects.play('player_draw')
+            if self.board_service.check_if_game_over():
                 return 'player'
 
-            if self.board_service.check_if_game_over():
-                return 'computer'
+            self.start_computer_move()
 
-    def start(self):
-        player_score = 0
-        computer_score = 0
+        return None
+
+    def start_game(self):
+        """
+            This method starts a new game, where the computer moves first if it won the last one.
+        """
+        # A move the computer is still thinking about belongs to the game which just ended. 
+        self.computer_player.cancel()
+        self.game_board = BitBoard(self._board_size)
+        self.board_service = BoardService(self.game_board)
+        self.first_computer_move = True
+        self.winner = None
+        self.state = GraphicalUI.PLAYING
+
+        pygame.display.set_caption(f"Obstruction                                    Player: {self.player_score} vs. Computer: {self.computer_score}")
+        self.renderer.invalidate()
+
+        if self._last_winner == 'computer':
+            self.start_computer_move()
+        else:
+            self.start_user_turn()
+
+    def end_game(self):
+        """
+            This method counts the game which was just won, and waits a little before starting the next one.
+        """
+        # The computer may still be pondering the user's winning move. 
+        self.computer_player.cancel()
+
+        if self.winner == 'player':
+            self.player_score += 1
+            self.sound_effects.play('win')
+        else:
+            self.computer_score += 1
+            self.sound_effects.play('loss')
 
-        stop_game = False
-        winner = None
-        game_over = False
+        self._last_winner = self.winner
+        self.state = GraphicalUI.GAME_OVER
+        self.new_game_time = self.get_ticks() + GraphicalUI.GAME_OVER_DELAY
 
-        while True:
-            self.show_menu()
+    def get_wait_timeout(self):
+        """
+            This method returns how long the window can sleep while waiting for an event.
+
+        :return: Integer, in milliseconds, 0 meaning until the next event.
+        """
+        if self.state == GraphicalUI.PLAYING and self.computer_player.thinking:
+            return GraphicalUI.THINKING_POLL_INTERVAL
+
+        if self.state == GraphicalUI.GAME_OVER:
+            return max(1, self.new_game_time - self.get_ticks())
+
+        return 0
+
+    def handle_event(self, event):
+        """
+            This method reacts to an event of the window, depending on its state.
+
+        :param event: pygame.event.Event
+        """
+        if event.type == pygame.QUIT:
+            self.state = None
+
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            # Only the changed areas of the window are updated, so all of it is shown again once it is uncovered.
             pygame.display.update()
-            quit_game = self.check_events()
-            self.clock.tick(60)
-
-            if quit_game is not None:
-                pygame.quit()
-                break
-
-            if self.run_menu() == 'play':
-                pygame.mixer.Sound.play(self.button_sound)
-                while True:
-                    self.first_computer_move = True
-                    quit_game = None
-                    winner = None
-                    pygame.time.wait(300)
-
-                    if self._last_winner == 'computer':
-                        self.computer_player.computer_move(self.first_computer_move)
-                        self.first_computer_move = False
-
-                    while True:
-                        self.draw()
-                        pygame.display.update()
-
-                        pygame.display.set_caption(f"Obstruction                                    Player: {player_score} vs. Computer: {computer_score}")
-
-                        quit_game = self.check_events()
-                        self.clock.tick(60)
-
-                        if winner is not None:
-                            quit_game = not None
-
-                        if quit_game is not None and winner is None:
-                            stop_game = True
-                            break
-
-                        elif quit_game is not None and winner is not None:
-                            if winner == 'player':
-                                pygame.time.wait(100)
-                                player_score += 1
-                                pygame.mixer.Sound.play(self.win_sound)
-                            else:
-                                pygame.time.wait(100)
-                                computer_score += 1
-                                pygame.mixer.Sound.play(self.loss_sound)
-
-                            pygame.time.wait(1000)
-                            break
-                        
-                        winner = self.run_game_process()
-
-                    self.game_board = Board(self._board_size)
-                    self.board_service = BoardService(self.game_board)
-                    self.computer_player = AI(self.board_service)
-
-                    if winner is not None:
-                        self._last_winner = winner
-
-                    if quit_game is not None and winner is None:
-                        stop_game = True
-                        break
-
-                if stop_game:
-                    break
-
-            elif self.run_menu() == 'rules':
-                pygame.mixer.Sound.play(self.button_sound)
-                pygame.time.wait(50)
-                while True:
+
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == pygame.BUTTON_LEFT:
+            if self.state == GraphicalUI.MENU:
+                button = self.find_button(self.menu_buttons, event.pos)
+                if button == 'play':
+                    self.sound_effects.play('button')
+                    self.start_game()
+                elif button == 'rules':
+                    self.sound_effects.play('button')
                     self.show_rules()
-                    pygame.display.update()
-                    quit_game = self.check_events()
-                    self.clock.tick(60)
+                elif button == 'quit':
+                    self.state = None
+
+            elif self.state == GraphicalUI.RULES:
+                if self.find_button(self.rules_buttons, event.pos) == 'return':
+                    self.sound_effects.play('button')
+                    self.show_menu()
+
+            elif self.state == GraphicalUI.PLAYING and self.winner is None:
+                self.winner = self.run_game_process(event.pos)
+
+    def update(self):
+        """
+            This method does what the state of the window needs besides reacting to events: making the computer's move, drawing the
+        changes of the board and starting the next game.
+        """
+        if self.state == GraphicalUI.PLAYING:
+            if self.winner is None and self.computer_player.thinking:
+                self.winner = self.finish_computer_move()
+
+            dirty_rects = self.draw()
+            if dirty_rects:
+                pygame.display.update(dirty_rects)
 
-                    if self.run_rules() == 'return':
-                        pygame.time.wait(50)
-                        pygame.mixer.Sound.play(self.button_sound)
-                        break
+            if self.winner is not None:
+                self.end_game()
 
-                    if quit_game is not None:
-                        stop_game = True
-                        break
+        elif self.state == GraphicalUI.GAME_OVER and self.get_ticks() >= self.new_game_time:
+            self.start_game()
+            self.update()
 
-            elif self.run_menu() == 'quit':
-                break
+    def start(self):
+        self.show_menu()
+        self.sound_effects.start_loading()
 
-            if stop_game:
-                break
+        while self.state is not None:
+            # The window sleeps until an event comes, or until the timeout if it has something to do in the meantime. 
+            self.handle_event(pygame.event.wait(self.get_wait_timeout()))
+            self.update()
 
+        self.computer_player.shutdown()
+        self.sound_effects.wait()
         pygame.quit()
-        return self._last_winner
+
+        if self._ponder:
+            print(ponder_message(self.computer_player.ponder_counts))
+
+        return self._last_winner
\ No newline at end of file
@@ -0,0 +1,14 @@
+def ponder_message(ponder_counts):
+    """
+        This function describes how much the pondering of the computer helped it during the games, for the user interfaces to show at
+    exit.
+
+    :param ponder_counts: Dictionary, as returned by SolverAI.ponder_counts.
+    :return: String
+    """
+    turns = sum(ponder_counts.values())
+    if turns == 0:
+        return "The computer did not need to think ahead of you."
+
+    return (f"The computer had thought ahead of your move in {ponder_counts['hit']} of its {turns} searches, "
+            f"and had a head start in {ponder_counts['partial']} more.")
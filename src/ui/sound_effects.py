@@ -0,0 +1,58 @@
+from config.definitions import ROOT_DIR
+import pygame
+import os
+import threading
+
+
+class SoundEffects:
+    # The sound effects of the graphical user interface. Starting the mixer and reading the sound files takes longer than showing the
+    # window, so they are loaded in another thread once the window is shown. A sound played before they are ready waits for them.
+    # Without a sound device, the sounds are not played at all.
+    FILES = {
+        'player_draw': "assets/sounds/draw_sound0.ogg",
+        'computer_draw': "assets/sounds/draw_sound1.ogg",
+        'button': "assets/sounds/button_sound.ogg",
+        'win': "assets/sounds/win_sound.ogg",
+        'loss': "assets/sounds/loss_sound.ogg",
+    }
+
+    def __init__(self):
+        self._sounds = {}
+        self._loader = None
+
+    def start_loading(self):
+        """
+            This method starts loading the sounds in another thread, if they are not loaded yet.
+        """
+        if self._loader is None:
+            self._loader = threading.Thread(target=self._load, daemon=True)
+            self._loader.start()
+
+    def _load(self):
+        try:
+            pygame.mixer.init()
+            sounds = {name: pygame.mixer.Sound(os.path.join(ROOT_DIR, path)) for name, path in SoundEffects.FILES.items()}
+        except pygame.error:
+            return
+
+        self._sounds = sounds
+
+    def wait(self):
+        """
+            This method waits until the sounds are loaded, if they are being loaded.
+        """
+        if self._loader is not None:
+            self._loader.join()
+
+    def play(self, name):
+        """
+            This method plays a sound, waiting for the sounds to be loaded if they are not yet.
+
+        :param name: String, one of the keys of FILES.
+        """
+        self.start_loading()
+        self.wait()
+
+        sound = self._sounds.get(name)
+        if sound is not None:
+            sound.play()
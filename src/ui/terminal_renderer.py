@@ -0,0 +1,168 @@
+import os
+import shutil
+import sys
+
+
+# The ANSI escape sequences used to draw in the terminal.
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+CLEAR_LINE = '\x1b[2K'
+CLEAR_TO_END = '\x1b[J'
+
+# The lines written below the board by the user interface, for a message and the prompt, which must fit in the terminal too.
+LINES_BELOW_BOARD = 5
+
+
+def move_cursor(line, column):
+    """
+        This function returns the escape sequence which moves the cursor to a position of the terminal.
+
+    :param line: Integer, starting from 0 at the top of the terminal.
+    :param column: Integer, starting from 0 at the left of the terminal.
+    :return: String
+    """
+    return f'\x1b[{line + 1};{column + 1}H'
+
+
+def enable_ansi_sequences():
+    """
+        This function makes the Windows console interpret the ANSI escape sequences, which the other terminals always do.
+    """
+    if os.name != 'nt':
+        return
+
+    import ctypes
+
+    # ENABLE_VIRTUAL_TERMINAL_PROCESSING, for the standard output.
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.GetStdHandle(-11)
+    mode = ctypes.c_uint32()
+    if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+        kernel32.SetConsoleMode(handle, mode.value | 0x0004)
+
+
+class TerminalRenderer:
+    # Draws the console user interface with ANSI escape sequences instead of clearing the terminal and printing everything again. The
+    # first frame is written whole: the header, the status line and the board with its borders and indices. The next frames only move
+    # the cursor to the cells filled since the previous one and write their symbols, and rewrite the status line if it changed. Every
+    # frame is a single write, so the terminal never shows half of it.
+    # The positions of the cells are counted from the top of the terminal, so a frame taller than the terminal, which scrolls, is always
+    # written whole.
+    def __init__(self, board_size, header='', stream=None, terminal_lines=None):
+        self._size = board_size
+        self._header_lines = header.split('\n') if header else []
+        self._stream = stream if stream is not None else sys.stdout
+        self._terminal_lines = terminal_lines
+
+        # Every cell is as wide as the largest index, so the board is a regular grid.
+        self._cell_width = len(str(board_size))
+        self._border = '+' + ('-' * (self._cell_width + 2) + '+') * (board_size + 1)
+
+        self._drawn_empty_mask = None
+        self._drawn_status = None
+
+        if self._stream is sys.stdout and self._stream.isatty():
+            enable_ansi_sequences()
+
+    @property
+    def board_top(self):
+        """
+            The line of the terminal where the board starts, below the header, the status line and a blank line.
+        """
+        return len(self._header_lines) + 2
+
+    @property
+    def board_height(self):
+        return 2 * self._size + 3
+
+    def fits(self):
+        """
+            This method checks if a frame fits in the terminal, so the cells can be found by their positions.
+
+        :return: True, if the frame fits, False otherwise.
+        """
+        terminal_lines = self._terminal_lines
+        if terminal_lines is None:
+            terminal_lines = shutil.get_terminal_size().lines
+
+        return self.board_top + self.board_height + LINES_BELOW_BOARD <= terminal_lines
+
+    def cell_position(self, row, col):
+        """
+            This method returns the position in the terminal of the symbol of a cell.
+
+        :param row: Integer
+        :param col: Integer
+        :return: Tuple (line, column)
+        """
+        return self.board_top + 2 * row + 1, col * (self._cell_width + 3) + 2
+
+    def format_row(self, cells, label):
+        return '|' + ''.join(f" {cell:<{self._cell_width}} |" for cell in cells) + f" {label:<{self._cell_width}} |"
+
+    def board_lines(self, board_service):
+        """
+            This method draws the whole board, with the indices of the rows on the right and the ones of the columns at the bottom.
+
+        :param board_service: BoardService
+        :return: List of strings
+        """
+        lines = [self._border]
+        for i in range(self._size):
+            lines.append(self.format_row([board_service.get_symbol(i, j) for j in range(self._size)], i + 1))
+            lines.append(self._border)
+
+        lines.append(self.format_row([j + 1 for j in range(self._size)], '/'))
+        lines.append(self._border)
+
+        return lines
+
+    def invalidate(self):
+        """
+            This method makes the next frame be written whole, for example when something else was written over the current one.
+        """
+        self._drawn_empty_mask = None
+        self._drawn_status = None
+
+    def clear(self):
+        """
+            This method clears the terminal, so something else can be shown in it.
+        """
+        self._stream.write(CLEAR_SCREEN)
+        self._stream.flush()
+        self.invalidate()
+
+    def render(self, board_service, status, message=None):
+        """
+            This method draws what changed since the last frame, and leaves the cursor under the board, where everything was cleared.
+
+        :param board_service: BoardService, of the board which is drawn.
+        :param status: String, the line shown above the board.
+        :param message: String, shown under the board, or None.
+        """
+        empty_mask = board_service.get_empty_mask()
+
+        # Moves only fill cells, so a cell which became empty means this is another board.
+        if self._drawn_empty_mask is None or empty_mask & ~self._drawn_empty_mask or not self.fits():
+            parts = [CLEAR_SCREEN, '\n'.join(self._header_lines + [status, ''] + self.board_lines(board_service)), '\n']
+        else:
+            parts = []
+            if status != self._drawn_status:
+                parts += [move_cursor(len(self._header_lines), 0), CLEAR_LINE, status]
+
+            changed = self._drawn_empty_mask & ~empty_mask
+            while changed:
+                low_bit = changed & -changed
+                row, col = divmod(low_bit.bit_length() - 1, self._size)
+                parts += [move_cursor(*self.cell_position(row, col)), board_service.get_symbol(row, col)]
+                changed ^= low_bit
+
+            parts += [move_cursor(self.board_top + self.board_height, 0), CLEAR_TO_END]
+
+        if message is not None:
+            parts += [message, '\n']
+
+        self._stream.write(''.join(parts))
+        self._stream.flush()
+
+        self._drawn_empty_mask = empty_mask
+        self._drawn_status = status